@@ -0,0 +1,137 @@
+"""
+Minimal rcon server that answers every command with `ran <command>`,
+used to time rcon round trips without a minecraft server
+
+    python bench/fake_rcon.py [--port N] [--pwd PWD] [--latency SECS] [--response-size BYTES]
+"""
+import argparse
+import asyncio
+import struct
+
+from typing import Callable, Optional
+
+
+HEADER = struct.Struct("<ii")
+LENGTH = struct.Struct("<i")
+
+TYPE_RESPONSE = 0
+TYPE_COMMAND = 2
+TYPE_LOGIN = 3
+
+MAX_FRAGMENT = 4096
+READ_SIZE = 1460
+
+
+def _packet(req_id: int, req_type: int, payload: bytes) -> bytes:
+    body = HEADER.pack(req_id, req_type) + payload + b"\x00\x00"
+    return LENGTH.pack(len(body)) + body
+
+
+class FakeRcon:
+    """
+    Serves the rcon protocol on localhost, responses longer than a packet are split like the real server does
+    Unknown packet types are answered the way vanilla does, which is what sentinel based clients rely on
+    Like vanilla it handles a single packet per read and disconnects clients whose read doesn't hold exactly one,
+    so clients that write several packets back to back fail here as well
+    Every response is delayed by the latency and padded up to the response size,
+    the handler can answer a command itself by returning something other than None
+    """
+
+    def __init__(
+        self,
+        pwd: str = "bench",
+        port: int = 0,
+        latency: float = 0.0,
+        response_size: int = 0,
+        handler: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> None:
+        self.pwd: str = pwd
+        self.port: int = port
+        self.latency: float = latency
+        self.response_size: int = response_size
+        self._handler: Optional[Callable[[str], Optional[str]]] = handler
+        self._server: Optional[asyncio.Server] = None
+
+    def _respond(self, comm: str) -> bytes:
+        resp = self._handler(comm) if self._handler is not None else None
+        out = (f"ran {comm}" if resp is None else resp).encode("utf-8")
+
+        if len(out) < self.response_size:
+            out += b"." * (self.response_size - len(out))
+
+        return out
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+
+                if len(data) < LENGTH.size + 10:
+                    break
+
+                (length,) = LENGTH.unpack_from(data)
+
+                if length != len(data) - LENGTH.size:
+                    break
+
+                body = data[LENGTH.size:]
+                req_id, req_type = HEADER.unpack_from(body)
+                payload = body[8:-2]
+
+                if req_type == TYPE_LOGIN:
+                    ok = payload.decode("utf-8", errors="replace") == self.pwd
+                    writer.write(_packet(req_id if ok else -1, TYPE_COMMAND, b""))
+                elif req_type == TYPE_COMMAND:
+                    if self.latency > 0:
+                        await asyncio.sleep(self.latency)
+
+                    out = self._respond(payload.decode("utf-8", errors="replace"))
+
+                    for i in range(0, len(out), MAX_FRAGMENT):
+                        writer.write(_packet(req_id, TYPE_RESPONSE, out[i:i + MAX_FRAGMENT]))
+                else:
+                    writer.write(_packet(req_id, TYPE_RESPONSE, f"Unknown request {req_type:x}".encode()))
+
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> int:
+        """
+        Starts serving and returns the port it is bound to
+        """
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+async def _serve(port: int, pwd: str, latency: float, response_size: int) -> None:
+    server = FakeRcon(pwd, port, latency, response_size)
+    print(f"Fake rcon listening on 127.0.0.1:{await server.start()}")
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=25575)
+    parser.add_argument("--pwd", default="bench")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before answering each command")
+    parser.add_argument("--response-size", type=int, default=0, help="pad every response up to this many bytes")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args.port, args.pwd, args.latency, args.response_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Compares the compiled rcon command policy against the old substring scan
+over a corpus of realistic commands, and checks that both deny the same ones
+
+    python bench/rcon_policy.py [--size N] [--repeat N]
+
+The substring scan only recognizes commands written with their slash, so the corpus writes every command,
+nested ones included, with it. `/stopsound` is left out, the substring scan wrongly denies it when `/stop` is banned
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from server.services.rcon.comm_policy import CommPolicy  # noqa: E402
+from server.services.rcon.constants import MINECRAFT_COMMS  # noqa: E402
+from server.services.rcon.errors import CommErr  # noqa: E402
+
+
+TEMPLATES = [
+    "/say {word} {word} {word}",
+    "/give {player} minecraft:{item} {num}",
+    "/tp {player} {num} {num} {num}",
+    "/time set {num}",
+    "/weather clear {num}",
+    "/gamerule {word} true",
+    "/whitelist add {player}",
+    "/execute as @a[tag={word}] at @s run /playsound minecraft:{item} master @s",
+    "/execute if entity @p[distance=..{num}] run /say {word}",
+    "/tellraw @a {{\"text\":\"{word} {word}\",\"color\":\"gold\"}}",
+    "/scoreboard players add {player} {word} {num}",
+    "/kick {player} {word}",
+    "/save-all flush",
+    "/list",
+    "/stop",
+    # arguments named like the keyword before the actual nested command
+    "/execute as run run /stop",
+    "/execute if score {player} run matches {num} run /stop",
+    "/execute as {player} run /execute as run run /{word}",
+    "/return run /stop",
+]
+
+WORDS = ["alpha", "bravo", "run", "stone", "night", "spawn", "event", "reward"]
+ITEMS = ["diamond", "stick", "oak_log", "ender_pearl", "block.note_block.bell"]
+PLAYERS = ["Steve", "Alex", "@a", "@p", "@r"]
+
+
+class SubstringPolicy:
+    """
+    Policy used before the compiled one, every banned entry is searched in the whole command
+    """
+
+    def __init__(self, max_comm_len: int, banned_comms: list[str]) -> None:
+        self._max_comm_len = max_comm_len
+        self._bcomms = banned_comms
+
+    def check(self, comm: str) -> None:
+        if not comm.strip():
+            raise CommErr("The command is empty")
+
+        if len(comm) > self._max_comm_len:
+            raise CommErr("The command is too long")
+
+        for icomm in self._bcomms:
+            if icomm in comm.lower():
+                raise CommErr(f"Command {icomm} is not allowed")
+
+
+def make_corpus(size: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    corpus = []
+
+    for _ in range(size):
+        template = rng.choice(TEMPLATES)
+        corpus.append(template.format_map(_Filler(rng)))
+
+    return corpus
+
+
+class _Filler(dict):
+    def __init__(self, rng: random.Random) -> None:
+        super().__init__()
+        self._rng = rng
+
+    def __missing__(self, key: str) -> str:
+        match key:
+            case "word":
+                return self._rng.choice(WORDS)
+            case "item":
+                return self._rng.choice(ITEMS)
+            case "player":
+                return self._rng.choice(PLAYERS)
+            case _:
+                return str(self._rng.randint(0, 1000))
+
+
+def run(policy, corpus: list[str], repeat: int) -> tuple[float, set[str]]:
+    """
+    Returns the best time per command in nanoseconds and the commands that were denied
+    """
+    best = float("inf")
+    denied: set[str] = set()
+
+    for _ in range(repeat):
+        denied = set()
+        start = time.perf_counter_ns()
+
+        for comm in corpus:
+            try:
+                policy.check(comm)
+            except CommErr:
+                denied.add(comm)
+
+        best = min(best, (time.perf_counter_ns() - start) / len(corpus))
+
+    return best, denied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--banned", type=int, default=len(MINECRAFT_COMMS) // 4, help="size of the banned list")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.size)
+    # commands that nest others stay allowed, otherwise the nested ones would never be checked
+    banned = sorted(MINECRAFT_COMMS - {"/stop", "/execute", "/return"})[: args.banned]
+
+    policies = {
+        "substring": SubstringPolicy(256, [*banned, "/stop"]),
+        "compiled": CommPolicy(256, banned, ["/stop"]),
+    }
+
+    print(f"{args.size} commands, {len(banned) + 1} banned entries")
+
+    denials = {}
+
+    for name, policy in policies.items():
+        ns, denials[name] = run(policy, corpus, args.repeat)
+        print(f"{name:>10}: {ns:8.1f} ns/command, {len(denials[name])} distinct commands denied")
+
+    differ = denials["substring"] ^ denials["compiled"]
+    assert not differ, f"The policies disagree on {len(differ)} commands, like {sorted(differ)[:5]}"
+
+
+if __name__ == "__main__":
+    main()
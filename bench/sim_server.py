@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Simulated minecraft server that can be used as PROCESS_SCRIPT to load test the daemon without java
+
+    PROCESS_SCRIPT=bench/sim_server.py python src/main.py
+
+Options are read from the command line or, since the daemon runs the script without arguments,
+from SIM_* environment variables (SIM_BOOT_DELAY=5 is the same as --boot-delay 5)
+
+It starts listening on the game port after the boot delay, answers server list pings with the
+number of connected clients, counts every connection that starts a login as a player and speaks
+rcon with the configured latency and response size. Like the real server it stops on `/stop`
+through stdin or `stop` through rcon
+
+Failures can be scripted with flags or triggered through rcon or stdin:
+    sim crash [code]    exits immediately with the code (1 by default)
+    sim hang [secs]     blocks the whole process, forever if no time is provided
+    sim kick            closes every client connection
+    sim lag <mspt>      changes the milliseconds per tick reported by `tick query`
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import stat
+import sys
+import time
+
+from typing import Optional
+
+from fake_rcon import FakeRcon
+
+
+MAX_VARINT_BYTES = 5
+NEXT_STATE_STATUS = 1
+NEXT_STATE_LOGIN = 2
+
+
+def _varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    out = bytearray()
+
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _packet(packet_id: int, payload: bytes) -> bytes:
+    body = _varint(packet_id) + payload
+    return _varint(len(body)) + body
+
+
+async def _read_varint(reader: asyncio.StreamReader) -> int:
+    value = 0
+
+    for i in range(MAX_VARINT_BYTES):
+        (byte,) = await reader.readexactly(1)
+        value |= (byte & 0x7F) << (7 * i)
+
+        if not byte & 0x80:
+            return value
+
+    raise ValueError("VarInt is too big")
+
+
+def _split_varint(data: bytes, offset: int) -> tuple[int, int]:
+    value = 0
+
+    for i in range(MAX_VARINT_BYTES):
+        byte = data[offset + i]
+        value |= (byte & 0x7F) << (7 * i)
+
+        if not byte & 0x80:
+            return value, offset + i + 1
+
+    raise ValueError("VarInt is too big")
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    data = await reader.readexactly(await _read_varint(reader))
+    packet_id, offset = _split_varint(data, 0)
+    return packet_id, data[offset:]
+
+
+class SimServer:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args: argparse.Namespace = args
+        self.players: dict[asyncio.StreamWriter, str] = {}
+        self.stopped: asyncio.Event = asyncio.Event()
+        self.mspt: float = args.mspt
+
+        self._game: Optional[asyncio.Server] = None
+        self._rcon: Optional[FakeRcon] = None
+
+    def log(self, msg: str) -> None:
+        print(f"[{time.strftime('%H:%M:%S')}] [Server thread/INFO]: {msg}", flush=True)
+
+    def _status(self) -> bytes:
+        return json.dumps({
+            "version": {"name": "sim", "protocol": -1},
+            "players": {
+                "max": self.args.max_players,
+                "online": len(self.players),
+                # vanilla shows at most 12 players
+                "sample": [{"name": name, "id": "00000000-0000-0000-0000-000000000000"} for name in list(self.players.values())[:12]],
+            },
+            "description": {"text": "mc-daemon simulator"},
+        }).encode("utf-8")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answers status requests and keeps login attempts open as connected players
+        """
+        try:
+            packet_id, handshake = await _read_packet(reader)
+
+            if packet_id != 0:
+                return
+
+            _, offset = _split_varint(handshake, 0)
+            addr_len, offset = _split_varint(handshake, offset)
+            next_state, _ = _split_varint(handshake, offset + addr_len + 2)
+
+            if next_state == NEXT_STATE_STATUS:
+                while True:
+                    packet_id, payload = await _read_packet(reader)
+
+                    if packet_id == 0:
+                        status = self._status()
+                        writer.write(_packet(0, _varint(len(status)) + status))
+                    elif packet_id == 1:
+                        writer.write(_packet(1, payload))
+
+                    await writer.drain()
+
+            if next_state == NEXT_STATE_LOGIN:
+                _, login = await _read_packet(reader)
+                name_len, offset = _split_varint(login, 0)
+
+                self.players[writer] = login[offset:offset + name_len].decode("utf-8", errors="replace")
+                self.log(f"Player joined, {len(self.players)} online")
+
+                # players never send anything meaningful, wait until they leave
+                while await reader.read(4096):
+                    pass
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError):
+            pass
+        finally:
+            if writer in self.players:
+                del self.players[writer]
+                self.log(f"Player left, {len(self.players)} online")
+
+            writer.close()
+
+    def command(self, comm: str) -> Optional[str]:
+        """
+        Runs the commands the simulator understands, returns None for the rest
+        """
+        words = comm.strip().lstrip("/").split()
+
+        if not words:
+            return None
+
+        match words:
+            case ["list"]:
+                return f"There are {len(self.players)} of a max of {self.args.max_players} players online: "
+            case ["tick", "query"]:
+                return (
+                    "The game is running normally\n"
+                    "Target tick rate: 20.0 per second.\n"
+                    f"Average time per tick: {self.mspt:.1f}ms (Target: 50.0ms)"
+                )
+            case ["sim", "lag", mspt]:
+                self.mspt = float(mspt)
+                return f"Ticks now take {self.mspt}ms"
+            case ["stop"]:
+                asyncio.get_running_loop().call_soon(self.stop)
+                return "Stopping the server"
+            case ["sim", "crash", *rest]:
+                self.crash(int(rest[0]) if rest else 1)
+            case ["sim", "hang", *rest]:
+                self.hang(float(rest[0]) if rest else None)
+                return "Resumed"
+            case ["sim", "kick"]:
+                for writer in list(self.players):
+                    writer.close()
+                return "Kicked every player"
+
+        return None
+
+    def crash(self, code: int) -> None:
+        self.log(f"Simulating crash with exit code {code}")
+        os._exit(code)
+
+    def hang(self, secs: Optional[float]) -> None:
+        self.log(f"Simulating hang for {'ever' if secs is None else f'{secs}s'}")
+
+        # blocking on purpose, a hung server doesn't answer anything
+        if secs is None:
+            while True:
+                time.sleep(3600)
+
+        time.sleep(secs)
+
+    def stop(self) -> None:
+        if not self.stopped.is_set():
+            self.log("Stopping the server")
+            self.stopped.set()
+
+    async def _read_stdin(self) -> None:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+
+        # the loop can only watch pipes and terminals, not files or /dev/null
+        if not (stat.S_ISFIFO(mode := os.fstat(sys.stdin.fileno()).st_mode) or stat.S_ISSOCK(mode) or sys.stdin.isatty()):
+            return
+
+        try:
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        except (ValueError, OSError):
+            return
+
+        # the daemon closes stdin right after writing the stop command
+        while line := (await reader.readline()).decode("utf-8", errors="replace"):
+            if line.strip() in ("/stop", "stop"):
+                self.stop()
+            else:
+                self.command(line)
+
+    async def _boot(self) -> None:
+        args = self.args
+
+        if args.hang_on_boot:
+            self.log("Simulating a startup that never finishes")
+            await self.stopped.wait()
+            return
+
+        self.log(f"Starting minecraft server simulator, ready in {args.boot_delay}s")
+        await asyncio.sleep(args.boot_delay)
+
+        if args.rcon_port:
+            self._rcon = FakeRcon(args.rcon_pwd, args.rcon_port, args.rcon_latency, args.response_size, self.command)
+            await self._rcon.start()
+            self.log(f"RCON running on 127.0.0.1:{args.rcon_port}")
+
+        self._game = await asyncio.start_server(self._handle_client, args.host, args.port)
+        self.log(f"Done! Listening on {args.host}:{args.port}")
+
+        if args.crash_after is not None:
+            asyncio.get_running_loop().call_later(args.crash_after, self.crash, 1)
+
+        if args.hang_after is not None:
+            asyncio.get_running_loop().call_later(args.hang_after, self.hang, None)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+
+        stdin_task = asyncio.create_task(self._read_stdin())
+        boot_task = asyncio.create_task(self._boot())
+
+        await self.stopped.wait()
+
+        boot_task.cancel()
+        stdin_task.cancel()
+
+        await asyncio.sleep(self.args.stop_delay)
+
+        for writer in list(self.players):
+            writer.close()
+
+        if self._game is not None:
+            self._game.close()
+
+        if self._rcon is not None:
+            await self._rcon.stop()
+
+        self.log("Stopped")
+
+
+def _env(name: str, default: str) -> str:
+    return os.getenv(f"SIM_{name.upper()}", default)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=_env("host", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(_env("port", "25565")))
+    parser.add_argument("--max-players", type=int, default=int(_env("max_players", "20")))
+    parser.add_argument("--boot-delay", type=float, default=float(_env("boot_delay", "3")), help="seconds until the game port is opened")
+    parser.add_argument("--stop-delay", type=float, default=float(_env("stop_delay", "1")), help="seconds spent saving before exiting")
+    parser.add_argument("--rcon-port", type=int, default=int(_env("rcon_port", "25575")), help="0 disables rcon")
+    parser.add_argument("--rcon-pwd", default=_env("rcon_pwd", ""))
+    parser.add_argument("--rcon-latency", type=float, default=float(_env("rcon_latency", "0")), help="seconds before answering each rcon command")
+    parser.add_argument("--response-size", type=int, default=int(_env("response_size", "0")), help="pad every rcon response up to this many bytes")
+    parser.add_argument("--mspt", type=float, default=float(_env("mspt", "8")), help="milliseconds per tick reported by `tick query`")
+    parser.add_argument("--crash-after", type=float, default=_optional_float(_env("crash_after", "")), help="exit with code 1 this many seconds after opening")
+    parser.add_argument("--hang-after", type=float, default=_optional_float(_env("hang_after", "")), help="hang forever this many seconds after opening")
+    parser.add_argument("--hang-on-boot", action="store_true", default=_env("hang_on_boot", "") not in ("", "0"), help="never open the game port")
+    return parser.parse_args()
+
+
+def _optional_float(value: str) -> Optional[float]:
+    return float(value) if value else None
+
+
+def main() -> None:
+    asyncio.run(SimServer(parse_args()).run())
+
+
+if __name__ == "__main__":
+    main()
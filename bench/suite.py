@@ -0,0 +1,325 @@
+"""
+Times the hot paths of the daemon and compares them against a saved baseline
+
+    python bench/suite.py [--filter SUBSTR] [--repeat N] [--save FILE] [--baseline FILE] [--threshold PCT]
+
+Every case reports the best time per operation over the repeats, so numbers are comparable between runs
+on the same machine. With --baseline the run fails if any case is slower than the baseline by more than
+the threshold, cases missing from either side are reported but never fail the run
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from server.domain.event.ebus import ServerEventBus  # noqa: E402
+from server.domain.event.membus import MemoryEventBus  # noqa: E402
+from server.domain.event.types import ServerEvent, OverflowPolicy  # noqa: E402
+from server.services.conn import psutil_conn  # noqa: E402
+from server.services.conn.netlink_conn import NetlinkConn  # noqa: E402
+from server.services.rcon.async_rcon import AsyncRcon  # noqa: E402
+from server.services.rcon.comm_policy import CommPolicy  # noqa: E402
+from server.services.rcon.errors import CommErr  # noqa: E402
+
+from fake_rcon import FakeRcon  # noqa: E402
+from rcon_policy import make_corpus  # noqa: E402
+
+
+PORT = 25565
+TABLE_SIZES = [1_000, 10_000, 100_000]
+SUBSCRIBERS = [1, 10, 100]
+
+# a case returns how many operations it ran and how long they took in nanoseconds
+Case = Callable[[], tuple[int, int]]
+
+
+def timed(fn: Callable[[], None], ops: int) -> tuple[int, int]:
+    start = time.perf_counter_ns()
+    fn()
+    return ops, time.perf_counter_ns() - start
+
+
+def synthetic_table(size: int) -> list[tuple[int, int, int]]:
+    """
+    Returns `(local port, remote port, state)` rows, a listening socket and a handful of clients
+    on the server port hidden among unrelated connections
+    """
+    rows = [(PORT, 0, NetlinkConn.TCP_LISTEN)]
+    rows += [(PORT, 40000 + i, NetlinkConn.TCP_ESTABLISHED) for i in range(min(size // 100, 20))]
+    rows += [(1024 + i % 60000, 50000 + i % 15000, NetlinkConn.TCP_ESTABLISHED) for i in range(size - len(rows))]
+    return rows
+
+
+class _FakePsutil(SimpleNamespace):
+    CONN_LISTEN = "LISTEN"
+    CONN_ESTABLISHED = "ESTABLISHED"
+
+
+def psutil_case(size: int) -> Case:
+    states = {NetlinkConn.TCP_LISTEN: _FakePsutil.CONN_LISTEN, NetlinkConn.TCP_ESTABLISHED: _FakePsutil.CONN_ESTABLISHED}
+    table = [
+        SimpleNamespace(
+            laddr=SimpleNamespace(ip="127.0.0.1", port=lport),
+            raddr=SimpleNamespace(ip="127.0.0.1", port=rport) if rport else (),
+            status=states[state],
+        )
+        for lport, rport, state in synthetic_table(size)
+    ]
+
+    def run() -> tuple[int, int]:
+        original = psutil_conn.psutil
+        psutil_conn.psutil = _FakePsutil(net_connections=lambda kind: table)
+
+        try:
+            conn = psutil_conn.PsutilConn(PORT, snapshot_ttl=0.0)
+            return timed(lambda: (conn.is_open(), conn.client_count()), 2)
+        finally:
+            psutil_conn.psutil = original
+
+    return run
+
+
+def proc_case(size: int) -> Case:
+    """
+    Scans a synthetic `/proc/net/tcp` through the netlink backend fallback
+    """
+    lines = ["  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode"]
+
+    for i, (lport, rport, state) in enumerate(synthetic_table(size)):
+        lines.append(f"{i:4}: 0100007F:{lport:04X} 0100007F:{rport:04X} {state:02X} 00000000:00000000 00:00000000 00000000  1000        0 {i}")
+
+    fd, path = tempfile.mkstemp(prefix="mcd-bench-", suffix=".tcp")
+
+    with os.fdopen(fd, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    atexit.register(os.remove, path)
+
+    class ProcConn(NetlinkConn):
+        PROC_PATHS = {socket.AF_INET: path}
+
+    def run() -> tuple[int, int]:
+        conn = ProcConn(PORT, snapshot_ttl=0.0)
+        conn._use_netlink = False
+        return timed(lambda: (conn.is_open(), conn.client_count()), 2)
+
+    return run
+
+
+def emit_case(subscribers: int) -> Case:
+    bus = ServerEventBus()
+
+    for _ in range(subscribers):
+        bus.subscribe(ServerEvent.EMPTY, lambda: None)
+
+    def run() -> tuple[int, int]:
+        emit = bus.emit
+        ops = 10_000
+
+        def loop() -> None:
+            for _ in range(ops):
+                emit(ServerEvent.EMPTY)
+
+        return timed(loop, ops)
+
+    return run
+
+
+def membus_case(policy: OverflowPolicy) -> Case:
+    """
+    Emits bursts larger than the queue and drains it, half the events are of a type nobody listens to
+    """
+    async def run_async() -> tuple[int, int]:
+        bus = MemoryEventBus([ServerEvent.OCCUPIED, ServerEvent.EMPTY], capacity=256, policy=policy)
+        events = [ServerEvent.OCCUPIED, ServerEvent.OPENED, ServerEvent.EMPTY, ServerEvent.CLOSED] * 128
+        rounds = 20
+
+        start = time.perf_counter_ns()
+
+        for _ in range(rounds):
+            for event in events:
+                bus.emit(event)
+
+            while bus.stats().queued:
+                await bus.pop()
+
+        elapsed = time.perf_counter_ns() - start
+        await bus.close()
+
+        return rounds * len(events), elapsed
+
+    return lambda: asyncio.run(run_async())
+
+
+def policy_case() -> Case:
+    corpus = make_corpus(10_000)
+    policy = CommPolicy(256, ["op", "deop", "ban", "pardon", "whitelist"], ["/stop"])
+
+    def run() -> tuple[int, int]:
+        def loop() -> None:
+            for comm in corpus:
+                try:
+                    policy.check(comm)
+                except CommErr:
+                    pass
+
+        return timed(loop, len(corpus))
+
+    return run
+
+
+def rcon_case(batch: int) -> Case:
+    async def run_async() -> tuple[int, int]:
+        server = FakeRcon()
+        port = await server.start()
+        rcon = AsyncRcon(port, server.pwd, timeout=5.0, max_comm_len=256, banned_comms=[])
+
+        try:
+            await rcon.execute("list")
+            rounds = 200 if batch == 1 else 20
+            comms = [f"say {i}" for i in range(batch)]
+
+            start = time.perf_counter_ns()
+
+            for _ in range(rounds):
+                if batch == 1:
+                    await rcon.execute(comms[0])
+                else:
+                    await rcon.execute_many(comms)
+
+            return rounds * batch, time.perf_counter_ns() - start
+        finally:
+            await rcon.close()
+            await server.stop()
+
+    return lambda: asyncio.run(run_async())
+
+
+def cases() -> dict[str, Callable[[], Case]]:
+    """
+    Returns the builders of every case by name, cases are only built if selected
+    """
+    builders: dict[str, Callable[[], Case]] = {}
+
+    for size in TABLE_SIZES:
+        builders[f"conn.psutil.{size}"] = lambda size=size: psutil_case(size)
+        builders[f"conn.proc.{size}"] = lambda size=size: proc_case(size)
+
+    for subscribers in SUBSCRIBERS:
+        builders[f"ebus.emit.{subscribers}"] = lambda subscribers=subscribers: emit_case(subscribers)
+
+    builders["membus.drop_oldest"] = lambda: membus_case(OverflowPolicy.DROP_OLDEST)
+    builders["membus.drop_newest"] = lambda: membus_case(OverflowPolicy.DROP_NEWEST)
+    builders["rcon.policy"] = policy_case
+    builders["rcon.roundtrip"] = lambda: rcon_case(1)
+    builders["rcon.batch.64"] = lambda: rcon_case(64)
+
+    return builders
+
+
+def run_case(case: Case, repeat: int) -> float:
+    """
+    Returns the best time per operation in nanoseconds
+    """
+    best = float("inf")
+
+    for _ in range(repeat):
+        ops, elapsed = case()
+        best = min(best, elapsed / ops)
+
+    return best
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """
+    Prints the change of every case against the baseline, returns the cases that regressed
+    """
+    regressions = []
+
+    print(f"\n{'case':<24} {'baseline':>12} {'current':>12} {'change':>8}")
+
+    for name in sorted(set(results) | set(baseline)):
+        if name not in baseline or name not in results:
+            print(f"{name:<24} {'missing from ' + ('baseline' if name not in baseline else 'run'):>34}")
+            continue
+
+        change = results[name] / baseline[name] - 1
+        mark = ""
+
+        if change > threshold:
+            regressions.append(name)
+            mark = "  REGRESSED"
+
+        print(f"{name:<24} {fmt(baseline[name]):>12} {fmt(results[name]):>12} {change:+8.1%}{mark}")
+
+    return regressions
+
+
+def fmt(ns: float) -> str:
+    if ns >= 1_000_000:
+        return f"{ns / 1_000_000:.2f} ms"
+    if ns >= 1_000:
+        return f"{ns / 1_000:.2f} us"
+    return f"{ns:.1f} ns"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write the results to this file as the new baseline")
+    parser.add_argument("--baseline", help="compare the results against this baseline")
+    parser.add_argument("--threshold", type=float, default=25.0, help="allowed slowdown in percent (default 25)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    baseline: Optional[dict[str, float]] = None
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results: dict[str, float] = {}
+
+    for name, build in cases().items():
+        if args.filter not in name:
+            continue
+
+        results[name] = run_case(build(), args.repeat)
+        print(f"{name:<24} {fmt(results[name]):>12}/op")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+    if baseline is None:
+        return
+
+    regressions = compare(results, baseline, args.threshold / 100)
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed more than {args.threshold:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
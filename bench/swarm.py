@@ -0,0 +1,137 @@
+"""
+Generates a swarm of fake players that join and leave a server, meant to be pointed at sim_server.py
+to exercise the monitor, /status and /stats with a changing player count
+
+    python bench/swarm.py [--port N] [--clients N] [--ramp SECS] [--session SECS SECS] [--duration SECS]
+
+Every client performs the handshake of a login and then stays connected for a random session,
+after which it leaves and rejoins after a random pause. The number of players online is printed
+every few seconds, together with a server list ping of the server for comparison
+"""
+import argparse
+import asyncio
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from server.services.conn.errors import SlpErr  # noqa: E402
+from server.services.conn.slp import ServerListPing  # noqa: E402
+
+
+PROTOCOL_VERSION = 767
+NEXT_STATE_LOGIN = 2
+PACKET_LOGIN_START = 0x00
+
+
+class Swarm:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args: argparse.Namespace = args
+        self.online: int = 0
+        self.joins: int = 0
+        self.failures: int = 0
+        self._rng: random.Random = random.Random(args.seed)
+
+    def _login(self, name: str) -> bytes:
+        host = self.args.host.encode("utf-8")
+        handshake = ServerListPing._packet(
+            ServerListPing.PACKET_HANDSHAKE,
+            ServerListPing._varint(PROTOCOL_VERSION)
+            + ServerListPing._varint(len(host)) + host
+            + struct.pack(">H", self.args.port)
+            + ServerListPing._varint(NEXT_STATE_LOGIN),
+        )
+        login = ServerListPing._packet(
+            PACKET_LOGIN_START,
+            ServerListPing._varint(len(name)) + name.encode("utf-8") + os.urandom(16),
+        )
+        return handshake + login
+
+    async def _client(self, i: int) -> None:
+        min_session, max_session = self.args.session
+
+        await asyncio.sleep(self.args.ramp * i / max(self.args.clients, 1))
+
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.args.host, self.args.port)
+            except OSError:
+                self.failures += 1
+                await asyncio.sleep(1.0)
+                continue
+
+            self.online += 1
+            self.joins += 1
+
+            try:
+                writer.write(self._login(f"sim{i}"))
+                await writer.drain()
+
+                # leaves early if the server kicks the player or goes down
+                await asyncio.wait_for(reader.read(), self._rng.uniform(min_session, max_session))
+            except (asyncio.TimeoutError, ConnectionError):
+                pass
+            finally:
+                self.online -= 1
+                writer.close()
+
+            await asyncio.sleep(self._rng.uniform(0, self.args.pause))
+
+    async def _report(self) -> None:
+        start = time.monotonic()
+
+        while True:
+            await asyncio.sleep(self.args.report)
+
+            try:
+                status = await ServerListPing.query(self.args.host, self.args.port, 2.0)
+                pinged = f"{status.online} ({status.latency_ms:.1f}ms)"
+            except SlpErr:
+                pinged = "unreachable"
+
+            print(
+                f"[{time.monotonic() - start:7.1f}s] online {self.online:5}  server says {pinged:>11}  "
+                f"joins {self.joins}  failed {self.failures}",
+                flush=True,
+            )
+
+    async def run(self) -> None:
+        tasks = [asyncio.create_task(self._client(i)) for i in range(self.args.clients)]
+        tasks.append(asyncio.create_task(self._report()))
+
+        try:
+            if self.args.duration:
+                await asyncio.sleep(self.args.duration)
+            else:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=25565)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds until every client has joined once")
+    parser.add_argument("--session", type=float, nargs=2, default=[5.0, 60.0], metavar=("MIN", "MAX"), help="seconds a client stays online")
+    parser.add_argument("--pause", type=float, default=10.0, help="maximum seconds a client waits before rejoining")
+    parser.add_argument("--duration", type=float, default=0.0, help="seconds to run, forever if 0")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between reports")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(Swarm(args).run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,60 @@
 import discord
+import time
+
+from typing import Optional
 
 from discord import app_commands
 from discord.ext import commands
 
 from server.domain.cntl.types import ServerStatus
 from server.services.rcon.errors import CommErr, RconErr
+from server.services.rcon.types import CommResult
+from server.services.lag.loop_lag import LoopLag
 
 from server.types import ServerData
 
+from .status_view import StatusView
+
 
 class ServerCommands(commands.Cog):
-    def __init__(self, data: ServerData, guild_id: int) -> None:
-        self._server: ServerData = data
-        self._locked: bool = False
+    SCRIPT_SEPARATORS = ("\n", ";")
+    EMBED_DESC_LIMIT = 4096
+    MAX_CHOICES = 25
+    MAX_SLOW_CALLS = 10
+
+    def __init__(
+        self,
+        servers: dict[str, ServerData],
+        views: dict[str, StatusView],
+        lag: LoopLag,
+        guild_id: int,
+    ) -> None:
+        self._servers: dict[str, ServerData] = servers
+        self._views: dict[str, StatusView] = views
+        self._lag: LoopLag = lag
+        self._locked: set[str] = set()
         self._guild_id: int = guild_id
 
+    async def _resolve(self, inter: discord.Interaction, instance: Optional[str]) -> Optional[str]:
+        """
+        Returns the name of the server the command is about, the only one if there is a single server
+        Answers with the available servers and returns None if it isn't clear
+        """
+        if instance is None and len(self._servers) == 1:
+            return next(iter(self._servers))
+
+        if instance in self._servers:
+            return instance
+
+        await inter.response.send_message(
+            embed=discord.Embed(
+                title="Please choose one of the servers ❌" if instance is None else f"There is no server called {instance} ❌",
+                description=", ".join(f"`{name}`" for name in self._servers),
+                color=discord.Color.red(),
+            )
+        )
+        return None
+
     async def _validate_guild(self, inter: discord.Interaction) -> bool:
         """
         Returns whether the current guild is the guild id provided by the user for privileged commands
@@ -29,6 +69,47 @@ class ServerCommands(commands.Cog):
             return False
         return True
 
+    @staticmethod
+    def _split_script(script: str) -> list[str]:
+        """
+        Splits a script into its commands at newlines and semicolons, dropping blank ones
+        """
+        comms = [script]
+
+        for sep in ServerCommands.SCRIPT_SEPARATORS:
+            comms = [part for comm in comms for part in comm.split(sep)]
+
+        return [comm.strip() for comm in comms if comm.strip()]
+
+    @staticmethod
+    def _batch_embed(results: list[CommResult]) -> discord.Embed:
+        """
+        Builds a single embed summarizing the result of every command in a batch
+        """
+        lines = []
+
+        for result in results:
+            if result.ok:
+                lines.append(f"✅ `{result.comm}`" + (f": `{result.resp}`" if result.resp else ""))
+            else:
+                lines.append(f"❌ `{result.comm}`: {result.err}")
+
+        description = "\n".join(lines)
+
+        if len(description) > ServerCommands.EMBED_DESC_LIMIT:
+            description = description[: ServerCommands.EMBED_DESC_LIMIT - 1] + "…"
+
+        failed = sum(1 for result in results if not result.ok)
+
+        if failed == 0:
+            title, color = f"The {len(results)} commands were executed correctly ✅", discord.Color.green()
+        elif failed == len(results):
+            title, color = f"Couldn't execute any of the {len(results)} commands ❌", discord.Color.red()
+        else:
+            title, color = f"{failed} of {len(results)} commands failed ⚠️", discord.Color.yellow()
+
+        return discord.Embed(title=title, description=description, color=color)
+
     @app_commands.command(name="help", description="View available commands")
     async def help(self, inter: discord.Interaction):
         await inter.response.send_message(
@@ -37,62 +118,74 @@ class ServerCommands(commands.Cog):
                 description=(
                     "- `/status` Shows the server status\n"
                     "- `/start` Tries to start the server\n"
+                    "- `/stats` Shows how busy the server has been\n"
                     "- `/stop` Tries to stop the server (admin)\n"
                     "- `/lock` Locks and closes the server (admin)\n"
                     "- `/unlock` Unlocks the server (admin)\n"
-                    "- `/inject` Executes the provided command in the server (admin)"
+                    "- `/inject` Executes the provided commands in the server, separated by `;` (admin)\n"
+                    "- `/lag` Shows how late the bot runs its tasks and what blocks it (admin)"
+                    + (
+                        f"\n\nEvery command takes the server as `instance`: {', '.join(self._servers)}"
+                        if len(self._servers) > 1 else ""
+                    )
                 ),
                 color=discord.Color.yellow(),
             )
         )
 
     @app_commands.command(name="status", description="Shows the server status")
-    async def status(self, inter: discord.Interaction) -> None:
-        srv = self._server
+    @app_commands.describe(instance="Server to check, only needed if there are several")
+    async def status(self, inter: discord.Interaction, instance: Optional[str] = None) -> None:
+        if (name := await self._resolve(inter, instance)) is None:
+            return
 
-        status = srv.cntl.status()
+        await inter.response.send_message(embed=self._views[name].embed(name in self._locked))
+
+    @app_commands.command(name="stats", description="Shows how busy the server has been")
+    @app_commands.rename(period="range")
+    @app_commands.describe(period="How far back to look", instance="Server to check, only needed if there are several")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="last hour", value=60 * 60),
+        app_commands.Choice(name="last day", value=24 * 60 * 60),
+        app_commands.Choice(name="last week", value=7 * 24 * 60 * 60),
+        app_commands.Choice(name="last month", value=30 * 24 * 60 * 60),
+        app_commands.Choice(name="last year", value=365 * 24 * 60 * 60),
+    ])
+    async def stats(self, inter: discord.Interaction, period: app_commands.Choice[int], instance: Optional[str] = None) -> None:
+        if (name := await self._resolve(inter, instance)) is None:
+            return
 
-        await inter.response.defer()
+        now = time.time()
+        summary = self._servers[name].stats.summary(now - period.value, now)
 
-        if status != ServerStatus.OPEN:
-            await inter.followup.send(
+        if summary is None:
+            await inter.response.send_message(
                 embed=discord.Embed(
-                    title=f"The server is {status} 📊", color=discord.Color.blue(),
-                    description="It is currently locked by admins" if self._locked else None,
+                    title=f"There is no activity recorded for the {period.name} 📊",
+                    color=discord.Color.blue(),
                 )
             )
             return
 
-        remaining = srv.mntr.timeout_in()
-        client_count = srv.conn.client_count()
-
-        if client_count > 0 or remaining is None:
-            verb = "is" if client_count == 1 else "are"
-            plural = "" if client_count == 1 else "s"
-
-            embed = discord.Embed(
-                title=f"The server is {status} 📊",
-                description=f"There {verb} currently {client_count} player{plural} online",
-                color=discord.Color.blue(),
-            )
-        else:
-            mins = int(remaining // 60)
-            secs = int(remaining % 60)
-
-            min_plural = "" if mins == 1 else "s"
-            sec_plural = "" if secs == 1 else "s"
-
-            embed = discord.Embed(
-                title=f"The server is {status} but empty ⚠️",
-                description=f"It will close in {mins} minute{min_plural} and {secs} second{sec_plural} if nobody joins",
-                color=discord.Color.yellow(),
-            )
+        embed = discord.Embed(
+            title=f"Server activity for the {period.name} 📊",
+            color=discord.Color.blue(),
+        )
+        embed.add_field(name="Peak", value=f"{summary.peak} players")
+        embed.add_field(name="Average", value=f"{summary.average:.1f} players")
+        embed.add_field(name="Median", value=f"{summary.p50:.1f} players")
+        embed.add_field(name="95th percentile", value=f"{summary.p95:.1f} players")
+        embed.set_footer(text=f"Based on {summary.samples} samples taken while the server was open")
 
-        await inter.followup.send(embed=embed)
+        await inter.response.send_message(embed=embed)
 
     @app_commands.command(name="start", description="Tries to start the server")
-    async def start(self, inter: discord.Interaction) -> None:
-        if self._locked:
+    @app_commands.describe(instance="Server to start, only needed if there are several")
+    async def start(self, inter: discord.Interaction, instance: Optional[str] = None) -> None:
+        if (name := await self._resolve(inter, instance)) is None:
+            return
+
+        if name in self._locked:
             await inter.response.send_message(
                 embed=discord.Embed(
                     title="The server has been locked by admins ❌",
@@ -101,11 +194,13 @@ class ServerCommands(commands.Cog):
             )
             return
 
-        srv = self._server
+        srv = self._servers[name]
 
-        if srv.cntl.try_open():
-            await inter.response.defer()
+        # spawning the process may take longer than discord waits for an answer
+        await inter.response.defer()
 
+        # everyone who asks while it opens waits for the same startup
+        if await srv.cntl.try_open_async() or srv.cntl.status() == ServerStatus.OPENING:
             opened = await srv.cntl.wait_open()
 
             if not opened:
@@ -142,20 +237,24 @@ class ServerCommands(commands.Cog):
                     title="Please try again ❌", color=discord.Color.red()
                 )
 
-        await inter.response.send_message(embed=embed)
+        await inter.followup.send(embed=embed)
 
     @app_commands.command(name="stop", description="Tries to stop the server")
     @app_commands.guild_only()
     @app_commands.default_permissions(discord.Permissions(administrator=True))
-    async def stop(self, inter: discord.Interaction) -> None:
+    @app_commands.describe(instance="Server to stop, only needed if there are several")
+    async def stop(self, inter: discord.Interaction, instance: Optional[str] = None) -> None:
         if not await self._validate_guild(inter):
             return
 
-        srv = self._server
+        if (name := await self._resolve(inter, instance)) is None:
+            return
+
+        srv = self._servers[name]
 
         await inter.response.defer()
 
-        if srv.cntl.try_close():
+        if await srv.cntl.try_close_async():
             await inter.followup.send(embed=discord.Embed(
                     title=f"The server closed correctly ✅",
                     color=discord.Color.green(),
@@ -186,11 +285,15 @@ class ServerCommands(commands.Cog):
     @app_commands.command(name="lock", description="Locks and closes the server")
     @app_commands.guild_only()
     @app_commands.default_permissions(discord.Permissions(administrator=True))
-    async def lock(self, inter: discord.Interaction) -> None:
+    @app_commands.describe(instance="Server to lock, only needed if there are several")
+    async def lock(self, inter: discord.Interaction, instance: Optional[str] = None) -> None:
         if not await self._validate_guild(inter):
             return
 
-        if self._locked:
+        if (name := await self._resolve(inter, instance)) is None:
+            return
+
+        if name in self._locked:
             await inter.response.send_message(
                 embed=discord.Embed(
                     title="The server is already locked ✅", color=discord.Color.green()
@@ -198,7 +301,7 @@ class ServerCommands(commands.Cog):
             )
             return
 
-        srv = self._server
+        srv = self._servers[name]
         status = srv.cntl.status()
 
         if status == ServerStatus.OPENING or status == ServerStatus.CLOSING:
@@ -211,12 +314,12 @@ class ServerCommands(commands.Cog):
             )
             return
 
-        self._locked = True
+        self._locked.add(name)
 
         await inter.response.defer()
 
         if status == ServerStatus.OPEN:
-            if not srv.cntl.try_close():
+            if not await srv.cntl.try_close_async():
                 await inter.followup.send(
                     embed=discord.Embed(
                         title="The server has been locked but couldn't be closed ⚠️",
@@ -235,16 +338,20 @@ class ServerCommands(commands.Cog):
     @app_commands.command(name="unlock", description="Unlocks the server")
     @app_commands.guild_only()
     @app_commands.default_permissions(discord.Permissions(administrator=True))
-    async def unlock(self, inter: discord.Interaction) -> None:
+    @app_commands.describe(instance="Server to unlock, only needed if there are several")
+    async def unlock(self, inter: discord.Interaction, instance: Optional[str] = None) -> None:
         if not await self._validate_guild(inter):
             return
 
-        if not self._locked:
+        if (name := await self._resolve(inter, instance)) is None:
+            return
+
+        if name not in self._locked:
             embed = discord.Embed(
                 title="The server is already unlocked ✅", color=discord.Color.green()
             )
         else:
-            self._locked = False
+            self._locked.discard(name)
             embed = discord.Embed(
                 title="The server has been unlocked 🔓", color=discord.Color.yellow()
             )
@@ -256,13 +363,19 @@ class ServerCommands(commands.Cog):
     )
     @app_commands.guild_only()
     @app_commands.rename(comm="command")
-    @app_commands.describe(comm="Command to execute")
+    @app_commands.describe(
+        comm="Command to execute, several can be separated by `;`",
+        instance="Server to execute it in, only needed if there are several",
+    )
     @app_commands.default_permissions(discord.Permissions(administrator=True))
-    async def inject(self, inter: discord.Interaction, comm: str) -> None:
+    async def inject(self, inter: discord.Interaction, comm: str, instance: Optional[str] = None) -> None:
         if not await self._validate_guild(inter):
             return
 
-        srv = self._server
+        if (name := await self._resolve(inter, instance)) is None:
+            return
+
+        srv = self._servers[name]
         status = srv.cntl.status()
 
         if status != ServerStatus.OPEN:
@@ -282,7 +395,14 @@ class ServerCommands(commands.Cog):
         )
 
         try:
-            resp = srv.rcon.execute(comm)
+            comms = self._split_script(comm)
+
+            # a script of separators alone is rejected by the batch checks as having no commands
+            if len(comms) != 1:
+                embed = self._batch_embed(await srv.rcon.execute_many(comms))
+                return
+
+            resp = await srv.rcon.execute(comms[0])
 
             embed = discord.Embed(
                 title=f"The command was executed correctly ✅",
@@ -309,3 +429,72 @@ class ServerCommands(commands.Cog):
             )
         finally:
             await inter.followup.send(embed=embed)
+
+    @app_commands.command(name="lag", description="Shows how late the bot runs its tasks")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(discord.Permissions(administrator=True))
+    async def lag(self, inter: discord.Interaction) -> None:
+        if not await self._validate_guild(inter):
+            return
+
+        summary = self._lag.summary()
+
+        if summary is None:
+            await inter.response.send_message(
+                embed=discord.Embed(
+                    title="The event loop hasn't been measured yet ⏱️",
+                    description="Try again in a few seconds",
+                    color=discord.Color.blue(),
+                )
+            )
+            return
+
+        if summary.slow_calls or summary.worst > LoopLag.WARN_LAG:
+            color = discord.Color.yellow()
+        else:
+            color = discord.Color.green()
+
+        if self._lag.slow_callback() is None:
+            description = "Set `LOOP_SLOW_CALLBACK` to find out which tasks block the loop"
+        elif not summary.slow_calls:
+            description = f"No task blocked the loop for longer than {self._lag.slow_callback() * 1000:.0f}ms"
+        else:
+            description = "\n".join(
+                f"`{call.source}` {call.count}x, up to {call.worst * 1000:.0f}ms ({call.total * 1000:.0f}ms in total)"
+                for call in summary.slow_calls[:ServerCommands.MAX_SLOW_CALLS]
+            )
+
+            if len(description) > ServerCommands.EMBED_DESC_LIMIT:
+                description = description[: ServerCommands.EMBED_DESC_LIMIT - 1] + "…"
+
+        period = f"{summary.period / 60:.0f} minutes" if summary.period >= 60 else f"{summary.period:.0f} seconds"
+
+        embed = discord.Embed(
+            title=f"Event loop lag over the last {period} ⏱️",
+            description=description,
+            color=color,
+        )
+        embed.add_field(name="Now", value=f"{summary.current * 1000:.1f}ms")
+        embed.add_field(name="Median", value=f"{summary.p50 * 1000:.1f}ms")
+        embed.add_field(name="95th percentile", value=f"{summary.p95 * 1000:.1f}ms")
+        embed.add_field(name="Worst", value=f"{summary.worst * 1000:.1f}ms")
+        embed.set_footer(text=f"Based on {summary.samples} heartbeats")
+
+        await inter.response.send_message(embed=embed)
+
+    @status.autocomplete("instance")
+    @stats.autocomplete("instance")
+    @start.autocomplete("instance")
+    @stop.autocomplete("instance")
+    @lock.autocomplete("instance")
+    @unlock.autocomplete("instance")
+    @inject.autocomplete("instance")
+    async def _instance_choices(self, inter: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        """
+        Suggests the servers whose name contains what has been typed so far
+        """
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self._servers
+            if current.lower() in name.lower()
+        ][:ServerCommands.MAX_CHOICES]
@@ -0,0 +1,140 @@
+import discord
+import time
+
+from typing import Optional
+
+from server.domain.cntl.types import ServerStatus
+from server.domain.event.ebus import ServerEventBus
+from server.domain.event.types import ServerEvent, EventRecord
+from server.services.conn.types import PingStatus
+
+from server.types import ServerData
+
+
+class StatusView:
+    """
+    Keeps the embed shown by /status built from the events of the bus and the samples of the monitor,
+    it is only rebuilt after one of them changes what it shows, answering needs no scan nor ping
+    """
+
+    def __init__(self, data: ServerData, ebus: ServerEventBus, instance: Optional[str] = None) -> None:
+        self._server: ServerData = data
+        self._instance: Optional[str] = instance
+
+        self._clients: int = 0
+        self._ping: Optional[PingStatus] = None
+        self._tps: Optional[str] = None
+
+        self._embed: Optional[discord.Embed] = None
+        self._locked: bool = False
+
+        ebus.tap(self._on_record)
+        data.mntr.on_sample(self._on_sample)
+        data.mntr.on_deadline(self._on_deadline)
+
+    def _on_record(self, record: EventRecord) -> None:
+        """
+        Every event may change the status or the idle countdown
+        """
+        match record.event:
+            case ServerEvent.OCCUPIED if record.payload is not None:
+                self._clients = record.payload
+            case ServerEvent.EMPTY | ServerEvent.CLOSED | ServerEvent.CRASHED | ServerEvent.HUNG:
+                self._clients = 0
+                self._ping = None
+
+        self._embed = None
+
+    def _on_sample(self, clients: int) -> None:
+        """
+        Takes the count of the monitor and the ping it has just made, if any
+        """
+        ping = self._server.ping.cached()
+        tps = self._describe_tps()
+
+        if (clients, self._shown(ping), tps) != (self._clients, self._shown(self._ping), self._tps):
+            self._embed = None
+
+        self._clients, self._ping, self._tps = clients, ping, tps
+
+    def _on_deadline(self) -> None:
+        """
+        The idle countdown has moved without any event, as when the confirmation scan times out
+        """
+        self._embed = None
+
+    @staticmethod
+    def _shown(ping: Optional[PingStatus]) -> Optional[tuple]:
+        """
+        Returns the part of the ping that ends up in the embed, a new ping with the same values changes nothing
+        """
+        if ping is None:
+            return None
+
+        return ping.online, ping.max_players, ping.sample, ping.version, round(ping.latency_ms)
+
+    def _describe_tps(self) -> Optional[str]:
+        wdog = self._server.wdog
+
+        if (tps := wdog.tps()) is None:
+            return None
+
+        return f"{tps:.1f} ({wdog.mspt():.1f} mspt, {wdog.health()})"
+
+    def _build(self, locked: bool) -> discord.Embed:
+        status = self._server.cntl.status()
+
+        if status != ServerStatus.OPEN:
+            return discord.Embed(
+                title=f"The server is {status} 📊", color=discord.Color.blue(),
+                description="It is currently locked by admins" if locked else None,
+            )
+
+        remaining = self._server.mntr.timeout_in()
+        client_count = self._clients
+        ping = self._ping
+
+        if client_count > 0 or remaining is None:
+            verb = "is" if client_count == 1 else "are"
+            plural = "" if client_count == 1 else "s"
+            out_of = "" if ping is None else f" out of {ping.max_players}"
+
+            embed = discord.Embed(
+                title=f"The server is {status} 📊",
+                description=f"There {verb} currently {client_count} player{plural} online{out_of}",
+                color=discord.Color.blue(),
+            )
+
+            if ping is not None and ping.sample:
+                embed.add_field(name="Players", value=", ".join(discord.utils.escape_markdown(name) for name in ping.sample), inline=False)
+
+            if ping is not None:
+                embed.add_field(name="Version", value=ping.version or "unknown")
+                embed.add_field(name="Ping", value=f"{ping.latency_ms:.0f} ms")
+
+            if self._tps is not None:
+                embed.add_field(name="TPS", value=self._tps)
+
+            return embed
+
+        # discord renders the countdown, so the embed stays valid until the deadline changes
+        closes_at = int(time.time() + remaining)
+
+        return discord.Embed(
+            title=f"The server is {status} but empty ⚠️",
+            description=f"It will close <t:{closes_at}:R> if nobody joins",
+            color=discord.Color.yellow(),
+        )
+
+    def embed(self, locked: bool) -> discord.Embed:
+        """
+        Returns the current status embed, only building it if something changed since the last call
+        """
+        if self._embed is None or self._locked != locked:
+            self._embed = self._build(locked)
+            self._locked = locked
+
+            if self._instance is not None:
+                self._embed.set_author(name=self._instance)
+
+        return self._embed
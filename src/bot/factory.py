@@ -1,14 +1,24 @@
 import discord
+import os
+
+from typing import Optional
 
 from bot.commands.cog import ServerCommands
+from bot.commands.status_view import StatusView
 from bot.validate.http_validate import HttpValidate
 from bot.logger.event_logger import EventLogger
 
-from server.domain.event.types import ServerEvent
-from server.domain.event.ebus import ServerEventBus
+from server.domain.event.types import ServerEvent, OverflowPolicy
+from server.domain.event.async_ebus import AsyncEventBus
 from server.domain.event.membus import MemoryEventBus
+from server.domain.event.journal import EventJournal
 
 from server.factory import ServerDataFactory
+from server.services.metrics.registry import MetricsRegistry
+from server.services.metrics.exporter import MetricsExporter
+from server.services.offload.factory import OffloadFactory
+from server.services.lag.factory import LagFactory
+from server.services.lag.loop_lag import LoopLag
 
 from conf.types import GlobalConf
 
@@ -16,35 +26,88 @@ from .mcdaemon_bot import McDaemonBot
 
 
 class BotFactory:
+    # name of the server when no instances are configured, it never has to be typed
+    DEFAULT_INSTANCE = "default"
+
+    @staticmethod
+    def _make_ebus(bot: McDaemonBot, conf: GlobalConf, instance: Optional[str], lag: LoopLag) -> AsyncEventBus:
+        """
+        Makes the event bus of a server, with its journal and its logger if they are configured
+        Each instance keeps its journal in a subdirectory named after it
+        Its slow handlers are reported to the lag monitor if it looks for slow callbacks
+        """
+        journal_dir = conf.event_journal_dir
+
+        if journal_dir is not None and instance is not None:
+            journal_dir = os.path.join(journal_dir, instance)
+
+        journal = EventJournal(journal_dir) if journal_dir else None
+        first_seq = journal.next_seq() if journal else 0
+
+        if conf.discord_log_channel is not None:
+            # we need memory bus for logging
+            try:
+                policy = OverflowPolicy(conf.event_queue_policy.upper().replace("-", "_"))
+            except ValueError:
+                raise ValueError(f"Invalid event queue policy: {conf.event_queue_policy}")
+
+            ebus = MemoryEventBus(
+                list(ServerEvent),
+                capacity=conf.event_queue_size,
+                policy=policy,
+                coalesce_window=conf.event_coalesce_window,
+                first_seq=first_seq,
+            )
+            bot.add_logger(EventLogger(bot, ebus, conf.discord_log_channel, instance))
+        else:
+            ebus = AsyncEventBus(first_seq)
+
+        if journal:
+            ebus.tap(journal.append)
+
+        if (threshold := lag.slow_callback()) is not None:
+            ebus.on_slow(threshold, lag.record_slow)
+
+        return ebus
+
     @staticmethod
     async def make(conf: GlobalConf) -> McDaemonBot:
         """
         Makes a new instance of `McDaemonBot` through `ServerConf`
         """
-        await HttpValidate.validate_discord_config(
-            conf.discord_token,
-            conf.discord_guild,
-            [conf.discord_log_channel] if conf.discord_log_channel else [],
-        )
+        channels = {
+            instance.discord_log_channel
+            for instance in [conf, *conf.instances.values()]
+            if instance.discord_log_channel
+        }
+
+        await HttpValidate.validate_discord_config(conf.discord_token, conf.discord_guild, list(channels))
 
         intents = discord.Intents.default()
         intents.message_content = True
 
         bot = McDaemonBot(conf.discord_guild, intents=intents)
+        metrics = MetricsRegistry()
+        offload = OffloadFactory.make(conf, metrics)
+        bot.set_offload(offload)
+        lag = LagFactory.make(conf, metrics)
+        bot.set_lag(lag)
 
-        if conf.discord_log_channel is not None:
-            # we need memory bus for logging
-            ebus = MemoryEventBus(list(ServerEvent))
-            logger = EventLogger(bot, ebus, conf.discord_log_channel)
-        else:
-            ebus = ServerEventBus()
-            logger = None
+        if conf.metrics_port is not None:
+            bot.add_exporter(MetricsExporter(metrics, conf.metrics_port))
 
-        if logger:
-            bot.add_logger(logger)
+        if conf.instances:
+            ebuses = {name: BotFactory._make_ebus(bot, instance, name, lag) for name, instance in conf.instances.items()}
+            servers = ServerDataFactory.make_all(conf.instances, ebuses, metrics, offload)
+        else:
+            ebuses = {BotFactory.DEFAULT_INSTANCE: BotFactory._make_ebus(bot, conf, None, lag)}
+            servers = {BotFactory.DEFAULT_INSTANCE: ServerDataFactory.make(conf, ebuses[BotFactory.DEFAULT_INSTANCE], metrics, offload)}
 
-        data = ServerDataFactory.make(conf, ebus)
-        cog = ServerCommands(data, conf.discord_guild)
+        views = {
+            name: StatusView(data, ebuses[name], name if conf.instances else None)
+            for name, data in servers.items()
+        }
+        cog = ServerCommands(servers, views, lag, conf.discord_guild)
 
         await bot.add_cog(cog)
 
@@ -13,13 +13,31 @@ from .protocol import BotLogger
 
 
 class EventLogger(BotLogger):
+    """
+    Logs the events popped from the bus, events arriving close together are sent as a single message
+    If the daemon runs several servers every embed names the one it is about
+    """
+
+    MAX_EMBEDS = 10
+    DEBOUNCE: float = 1.0
+    MAX_ATTEMPTS = 5
+    MIN_BACKOFF: float = 1.0
+    MAX_BACKOFF: float = 60.0
+    DEFAULT_RETRY_AFTER: float = 1.0
+
+    HTTP_FORBIDDEN = 403
+    HTTP_NOT_FOUND = 404
+    HTTP_TOO_MANY_REQUESTS = 429
+
     def __init__(
-        self, client: discord.Client, membus: MemoryEventBus, channel_id: int
+        self, client: discord.Client, membus: MemoryEventBus, channel_id: int, instance: Optional[str] = None
     ) -> None:
         self._client: discord.Client = client
         self._membus: MemoryEventBus = membus
+        self._instance: Optional[str] = instance
 
         self._channel_id: int = channel_id
+        self._channel: Optional[TextChannel] = None
 
         self._task: Optional[asyncio.Task] = None
         self._logger: logging.Logger = logging.getLogger(
@@ -29,9 +47,13 @@ class EventLogger(BotLogger):
     async def _fetch_channel(self) -> Optional[TextChannel]:
         """
         Tries to fetch the channel, returns None if the channel isn't a `discord.TextChannel`
+        The client cache is checked first so the REST api is only used if the channel isn't cached
         """
         try:
-            channel = await self._client.fetch_channel(self._channel_id)
+            channel = self._client.get_channel(self._channel_id)
+
+            if channel is None:
+                channel = await self._client.fetch_channel(self._channel_id)
 
             if isinstance(channel, TextChannel):
                 return channel
@@ -55,63 +77,160 @@ class EventLogger(BotLogger):
 
         self._task.cancel()
 
-    async def _logger_loop(self) -> None:
-        try:
-            while (channel := await self._fetch_channel()) is not None:
-                match await self._membus.pop():
-                    case ServerEvent.OPENED:
-                        embed = discord.Embed(
-                            title="The server has successfully opened ✅",
-                            color=discord.Color.green(),
-                        )
-                    case ServerEvent.CLOSED:
-                        embed = discord.Embed(
-                            title="The server has shut down successfully ✅",
-                            color=discord.Color.green(),
-                        )
-                    case ServerEvent.OPENING:
-                        embed = discord.Embed(
-                            title="The server is starting up 📊",
-                            color=discord.Color.blue(),
-                        )
-                    case ServerEvent.CLOSING:
-                        embed = discord.Embed(
-                            title="The server is shutting down 📊",
-                            color=discord.Color.blue(),
-                        )
-                    case ServerEvent.CRASHED:
-                        embed = discord.Embed(
-                            title="The server has crashed ❌",
-                            description="Restart will begin shortly",
-                            color=discord.Color.red(),
-                        )
-                    case ServerEvent.HUNG:
-                        embed = discord.Embed(
-                            title="The server has become unresponsive during startup ❌",
-                            description="Admins should investigate the issue",
-                            color=discord.Color.red(),
-                        )
-                    case ServerEvent.OCCUPIED:
-                        embed = discord.Embed(
-                            title="The server is now occupied ✅",
-                            description="Timeout has been cancelled",
-                            color=discord.Color.green(),
-                        )
-                    case ServerEvent.EMPTY:
-                        embed = discord.Embed(
-                            title="The server is now empty ⚠️",
-                            description="It will shut down soon if not occupied",
-                            color=discord.Color.yellow(),
-                        )
-                    case ServerEvent.IDLE:
-                        embed = discord.Embed(
-                            title="The server has timed out due to inactivity ⚠️",
-                            description="Shutdown will begin shortly",
-                            color=discord.Color.yellow(),
-                        )
+    @staticmethod
+    def _embed_for(event: ServerEvent) -> discord.Embed:
+        match event:
+            case ServerEvent.OPENED:
+                return discord.Embed(
+                    title="The server has successfully opened ✅",
+                    color=discord.Color.green(),
+                )
+            case ServerEvent.CLOSED:
+                return discord.Embed(
+                    title="The server has shut down successfully ✅",
+                    color=discord.Color.green(),
+                )
+            case ServerEvent.OPENING:
+                return discord.Embed(
+                    title="The server is starting up 📊",
+                    color=discord.Color.blue(),
+                )
+            case ServerEvent.CLOSING:
+                return discord.Embed(
+                    title="The server is shutting down 📊",
+                    color=discord.Color.blue(),
+                )
+            case ServerEvent.CRASHED:
+                return discord.Embed(
+                    title="The server has crashed ❌",
+                    description="Restart will begin shortly",
+                    color=discord.Color.red(),
+                )
+            case ServerEvent.HUNG:
+                return discord.Embed(
+                    title="The server has become unresponsive during startup ❌",
+                    description="Admins should investigate the issue",
+                    color=discord.Color.red(),
+                )
+            case ServerEvent.OCCUPIED:
+                return discord.Embed(
+                    title="The server is now occupied ✅",
+                    description="Timeout has been cancelled",
+                    color=discord.Color.green(),
+                )
+            case ServerEvent.EMPTY:
+                return discord.Embed(
+                    title="The server is now empty ⚠️",
+                    description="It will shut down soon if not occupied",
+                    color=discord.Color.yellow(),
+                )
+            case ServerEvent.IDLE:
+                return discord.Embed(
+                    title="The server has timed out due to inactivity ⚠️",
+                    description="Shutdown will begin shortly",
+                    color=discord.Color.yellow(),
+                )
+            case ServerEvent.LAGGING:
+                return discord.Embed(
+                    title="The server is lagging ⚠️",
+                    description="Ticks are taking longer than they should",
+                    color=discord.Color.yellow(),
+                )
+            case ServerEvent.RECOVERED:
+                return discord.Embed(
+                    title="The server has recovered from lag ✅",
+                    color=discord.Color.green(),
+                )
+            case ServerEvent.FROZEN:
+                return discord.Embed(
+                    title="The server has frozen ❌",
+                    description="Restart will begin shortly",
+                    color=discord.Color.red(),
+                )
+
+    async def _next_batch(self) -> list[ServerEvent]:
+        """
+        Waits for an event and gathers the ones that follow it within the debounce window,
+        up to the number of embeds a single message can hold
+        """
+        batch = [await self._membus.pop()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + EventLogger.DEBOUNCE
+
+        while len(batch) < EventLogger.MAX_EMBEDS:
+            remaining = deadline - loop.time()
+
+            if remaining <= 0:
+                break
+
+            try:
+                batch.append(await asyncio.wait_for(self._membus.pop(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    @staticmethod
+    def _retry_after(e: discord.HTTPException) -> float:
+        """
+        Reads how long to wait before retrying from the rate limit headers of the response
+        """
+        headers = getattr(e.response, "headers", None) or {}
+
+        for header in ("Retry-After", "X-RateLimit-Reset-After"):
+            try:
+                return float(headers[header])
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        return EventLogger.DEFAULT_RETRY_AFTER
+
+    async def _send(self, embeds: list[discord.Embed]) -> None:
+        """
+        Sends the embeds as a single message, waiting out rate limits and refetching the channel if it fails
+        The message is only dropped after repeated failures that aren't rate limits
+        """
+        attempts = 0
+        backoff = EventLogger.MIN_BACKOFF
+
+        while attempts < EventLogger.MAX_ATTEMPTS:
+            if self._channel is None:
+                self._channel = await self._fetch_channel()
+
+            if self._channel is not None:
                 try:
-                    await channel.send(embed=embed)
+                    await self._channel.send(embeds=embeds)
+                    return
+                except discord.HTTPException as e:
+                    if e.status == EventLogger.HTTP_TOO_MANY_REQUESTS:
+                        retry_after = self._retry_after(e)
+                        self._logger.warning(f"Rate limited logging events, retrying in {retry_after}s")
+                        await asyncio.sleep(retry_after)
+                        continue
+
+                    if e.status in (EventLogger.HTTP_FORBIDDEN, EventLogger.HTTP_NOT_FOUND):
+                        self._channel = None
+
+                    self._logger.error(f"There was an error logging an event: {e}")
                 except Exception as e:
                     self._logger.error(f"There was an error logging an event: {e}")
+
+            attempts += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, EventLogger.MAX_BACKOFF)
+
+        self._logger.error(f"Dropped {len(embeds)} events after {attempts} failed attempts")
+
+    async def _logger_loop(self) -> None:
+        try:
+            while True:
+                batch = await self._next_batch()
+                embeds = [self._embed_for(event) for event in batch]
+
+                if self._instance is not None:
+                    for embed in embeds:
+                        embed.set_author(name=self._instance)
+
+                await self._send(embeds)
         except asyncio.CancelledError:
             pass
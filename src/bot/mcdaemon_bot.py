@@ -1,21 +1,36 @@
 import discord
 
+from typing import Optional
+
 from discord.ext import commands
 
 from bot.logger.protocol import BotLogger
 
+from server.services.metrics.exporter import MetricsExporter
+from server.services.offload.offload import Offload
+from server.services.lag.loop_lag import LoopLag
+
 
 class McDaemonBot(commands.Bot):
     def __init__(self, guild_id: int, *, intents: discord.Intents) -> None:
         self._loggers: list[BotLogger] = []
+        self._exporters: list[MetricsExporter] = []
+        self._offload: Optional[Offload] = None
+        self._lag: Optional[LoopLag] = None
         self._guild: discord.Object = discord.Object(id=guild_id)
 
         super().__init__(command_prefix="!", intents=intents)
 
     async def setup_hook(self) -> None:
+        if self._lag is not None:
+            self._lag.start()
+
         for logger in self._loggers:
             logger.start()
 
+        for exporter in self._exporters:
+            await exporter.start()
+
         await self.tree.sync()
         await self.tree.sync(guild=self._guild)
 
@@ -23,6 +38,15 @@ class McDaemonBot(commands.Bot):
         for logger in self._loggers:
             logger.stop()
 
+        for exporter in self._exporters:
+            await exporter.stop()
+
+        if self._offload is not None:
+            self._offload.shutdown()
+
+        if self._lag is not None:
+            self._lag.stop()
+
         await super().close()
 
     def add_logger(self, logger: BotLogger) -> None:
@@ -30,3 +54,21 @@ class McDaemonBot(commands.Bot):
         Adds a new logger to the list
         """
         self._loggers.append(logger)
+
+    def add_exporter(self, exporter: MetricsExporter) -> None:
+        """
+        Adds a new metrics exporter to the list
+        """
+        self._exporters.append(exporter)
+
+    def set_offload(self, offload: Offload) -> None:
+        """
+        Sets the thread pool that is shut down together with the bot
+        """
+        self._offload = offload
+
+    def set_lag(self, lag: LoopLag) -> None:
+        """
+        Sets the lag monitor that runs together with the bot
+        """
+        self._lag = lag
@@ -1,4 +1,5 @@
 import os
+import re
 
 from conf.types import GlobalConf
 
@@ -10,20 +11,42 @@ from .protocol import GlobalConfLoader
 
 
 class EnvConfLoader(GlobalConfLoader):
-    ENV_DISCORD_TOKEN       = "DISCORD_TOKEN"
-    ENV_DISCORD_GUILD       = "DISCORD_GUILD"
-    ENV_PROCESS_SCRIPT      = "PROCESS_SCRIPT"
-    ENV_PROCESS_TIMEOUT     = "PROCESS_TIMEOUT"
-    ENV_DISCORD_LOG_CHANNEL = "DISCORD_LOG_CHANNEL"
-    ENV_MINECRAFT_PORT      = "MINECRAFT_PORT"
-    ENV_RCON_PORT           = "RCON_PORT"
-    ENV_RCON_PWD            = "RCON_PWD"
-    ENV_RCON_TIMEOUT        = "RCON_TIMEOUT"
-    ENV_RCON_MAX_COMM_LEN   = "RCON_MAX_COMM_LEN"
-    ENV_RCON_BANNED_COMM    = "RCON_BANNED_COMM"
-    ENV_STARTUP_TIMEOUT     = "STARTUP_TIMEOUT"
-    ENV_IDLE_TIMEOUT        = "IDLE_TIMEOUT"
-    ENV_POLLING_INTV        = "POLLING_INTV"
+    ENV_DISCORD_TOKEN         = "DISCORD_TOKEN"
+    ENV_DISCORD_GUILD         = "DISCORD_GUILD"
+    ENV_PROCESS_SCRIPT        = "PROCESS_SCRIPT"
+    ENV_PROCESS_TIMEOUT       = "PROCESS_TIMEOUT"
+    ENV_DISCORD_LOG_CHANNEL   = "DISCORD_LOG_CHANNEL"
+    ENV_EVENT_QUEUE_SIZE      = "EVENT_QUEUE_SIZE"
+    ENV_EVENT_QUEUE_POLICY    = "EVENT_QUEUE_POLICY"
+    ENV_EVENT_COALESCE_WINDOW = "EVENT_COALESCE_WINDOW"
+    ENV_EVENT_JOURNAL_DIR     = "EVENT_JOURNAL_DIR"
+    ENV_MINECRAFT_PORT        = "MINECRAFT_PORT"
+    ENV_CONN_BACKEND          = "CONN_BACKEND"
+    ENV_CONN_SNAPSHOT_TTL     = "CONN_SNAPSHOT_TTL"
+    ENV_READINESS_PROBE       = "READINESS_PROBE"
+    ENV_PLAYER_COUNT          = "PLAYER_COUNT"
+    ENV_PING_TTL              = "PING_TTL"
+    ENV_RCON_PORT             = "RCON_PORT"
+    ENV_RCON_PWD              = "RCON_PWD"
+    ENV_RCON_TIMEOUT          = "RCON_TIMEOUT"
+    ENV_RCON_MAX_COMM_LEN     = "RCON_MAX_COMM_LEN"
+    ENV_RCON_BANNED_COMM      = "RCON_BANNED_COMM"
+    ENV_STARTUP_TIMEOUT       = "STARTUP_TIMEOUT"
+    ENV_IDLE_TIMEOUT          = "IDLE_TIMEOUT"
+    ENV_POLLING_INTV          = "POLLING_INTV"
+    ENV_POLLING_FLOOR         = "POLLING_FLOOR"
+    ENV_TICK_SAMPLE_INTV      = "TICK_SAMPLE_INTV"
+    ENV_TICK_LAG_MSPT         = "TICK_LAG_MSPT"
+    ENV_TICK_FROZEN_AFTER     = "TICK_FROZEN_AFTER"
+    ENV_STATS_FILE            = "STATS_FILE"
+    ENV_METRICS_PORT          = "METRICS_PORT"
+    ENV_OFFLOAD_WORKERS       = "OFFLOAD_WORKERS"
+    ENV_OFFLOAD_TIMEOUT       = "OFFLOAD_TIMEOUT"
+    ENV_LOOP_LAG_INTV         = "LOOP_LAG_INTV"
+    ENV_LOOP_SLOW_CALLBACK    = "LOOP_SLOW_CALLBACK"
+    ENV_INSTANCES             = "INSTANCES"
+
+    INSTANCE_NAME = re.compile(r"[A-Za-z0-9_-]+")
 
     T = TypeVar("T")
 
@@ -49,12 +72,20 @@ class EnvConfLoader(GlobalConfLoader):
             raise ConfLoaderErr(f"couldn't parse list {env}: {e}")
 
     @staticmethod
-    def _fetch_mandatory_as(envname: str, cast: Callable[[str], T]) -> T:
+    def _getenv(envname: str, prefix: str) -> Optional[str]:
+        """
+        Fetches the field of an instance, which falls back to the field shared by every instance
+        """
+        env = os.getenv(f"{prefix}{envname}") if prefix else None
+        return env if env is not None else os.getenv(envname)
+
+    @staticmethod
+    def _fetch_mandatory_as(envname: str, cast: Callable[[str], T], prefix: str = "") -> T:
         """
         Fetches a mandatory field from env and casts it with the provided function
         Raises `ServerConfLoaderErr` if the mandatory field isn't on env
         """
-        env = os.getenv(envname)
+        env = EnvConfLoader._getenv(envname, prefix)
 
         if env is None:
             raise ConfLoaderErr(f"mandatory env variable {envname} is missing")
@@ -62,11 +93,11 @@ class EnvConfLoader(GlobalConfLoader):
         return cast(env)
 
     @staticmethod
-    def _fetch_optional_as(envname: str, cast: Callable[[str], T]) -> Optional[T]:
+    def _fetch_optional_as(envname: str, cast: Callable[[str], T], prefix: str = "") -> Optional[T]:
         """
         Fetches an optional field from env and casts it with the provided function if it isn't None
         """
-        env = os.getenv(envname)
+        env = EnvConfLoader._getenv(envname, prefix)
 
         if env is None:
             return env
@@ -74,22 +105,67 @@ class EnvConfLoader(GlobalConfLoader):
         return cast(env)
 
     @staticmethod
-    def load() -> GlobalConf:
-        load_dotenv()
+    def _instance_prefix(name: str) -> str:
+        """
+        Returns the prefix of the variables of an instance, `survival` is configured through `SURVIVAL_*`
+        Raises `ConfLoaderErr` if the name can't be part of a variable name
+        """
+        if EnvConfLoader.INSTANCE_NAME.fullmatch(name) is None:
+            raise ConfLoaderErr(f"invalid instance name {name}: only letters, digits, '-' and '_' are allowed")
 
+        return f"{name.upper().replace('-', '_')}_"
+
+    @staticmethod
+    def _load(prefix: str, instances: Optional[dict[str, GlobalConf]]) -> GlobalConf:
+        """
+        Builds the configuration from the variables with the provided prefix, or the unprefixed ones if missing
+        """
         return GlobalConf(
-            EnvConfLoader._fetch_mandatory_as(EnvConfLoader.ENV_DISCORD_TOKEN, str),
-            EnvConfLoader._fetch_mandatory_as(EnvConfLoader.ENV_DISCORD_GUILD, int),
-            EnvConfLoader._fetch_mandatory_as(EnvConfLoader.ENV_PROCESS_SCRIPT, str),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_PROCESS_TIMEOUT, float),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_DISCORD_LOG_CHANNEL, int),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_MINECRAFT_PORT, int),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_PORT, int),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_PWD, str),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_TIMEOUT, float),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_MAX_COMM_LEN, int),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_BANNED_COMM, EnvConfLoader._list_from_env),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_STARTUP_TIMEOUT, float),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_IDLE_TIMEOUT, float),
-            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_POLLING_INTV, float),
+            EnvConfLoader._fetch_mandatory_as(EnvConfLoader.ENV_DISCORD_TOKEN, str, prefix),
+            EnvConfLoader._fetch_mandatory_as(EnvConfLoader.ENV_DISCORD_GUILD, int, prefix),
+            EnvConfLoader._fetch_mandatory_as(EnvConfLoader.ENV_PROCESS_SCRIPT, str, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_PROCESS_TIMEOUT, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_DISCORD_LOG_CHANNEL, int, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_EVENT_QUEUE_SIZE, int, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_EVENT_QUEUE_POLICY, str, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_EVENT_COALESCE_WINDOW, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_EVENT_JOURNAL_DIR, str, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_MINECRAFT_PORT, int, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_CONN_BACKEND, str, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_CONN_SNAPSHOT_TTL, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_READINESS_PROBE, str, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_PLAYER_COUNT, str, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_PING_TTL, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_PORT, int, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_PWD, str, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_TIMEOUT, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_MAX_COMM_LEN, int, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_RCON_BANNED_COMM, EnvConfLoader._list_from_env, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_STARTUP_TIMEOUT, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_IDLE_TIMEOUT, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_POLLING_INTV, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_POLLING_FLOOR, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_TICK_SAMPLE_INTV, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_TICK_LAG_MSPT, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_TICK_FROZEN_AFTER, int, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_STATS_FILE, str, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_METRICS_PORT, int, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_OFFLOAD_WORKERS, int, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_OFFLOAD_TIMEOUT, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_LOOP_LAG_INTV, float, prefix),
+            EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_LOOP_SLOW_CALLBACK, float, prefix),
+            instances,
         )
+
+    @staticmethod
+    def load() -> GlobalConf:
+        load_dotenv()
+
+        names = EnvConfLoader._fetch_optional_as(EnvConfLoader.ENV_INSTANCES, EnvConfLoader._list_from_env) or []
+
+        if len({EnvConfLoader._instance_prefix(name) for name in names}) != len(names):
+            raise ConfLoaderErr(f"instance names must be unique: {', '.join(names)}")
+
+        instances = {name: EnvConfLoader._load(EnvConfLoader._instance_prefix(name), None) for name in names}
+
+        return EnvConfLoader._load("", instances)
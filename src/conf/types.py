@@ -9,7 +9,16 @@ class GlobalConf:
         process_script: str,
         process_timeout: Optional[float],
         discord_log_channel: Optional[int],
+        event_queue_size: Optional[int],
+        event_queue_policy: Optional[str],
+        event_coalesce_window: Optional[float],
+        event_journal_dir: Optional[str],
         minecraft_port: Optional[int],
+        conn_backend: Optional[str],
+        conn_snapshot_ttl: Optional[float],
+        readiness_probe: Optional[str],
+        player_count: Optional[str],
+        ping_ttl: Optional[float],
         rcon_port: Optional[int],
         rcon_pwd: Optional[str],
         rcon_timeout: Optional[float],
@@ -18,6 +27,17 @@ class GlobalConf:
         startup_timeout: Optional[float],
         idle_timeout: Optional[float],
         polling_intv: Optional[float],
+        polling_floor: Optional[float],
+        tick_sample_intv: Optional[float],
+        tick_lag_mspt: Optional[float],
+        tick_frozen_after: Optional[int],
+        stats_file: Optional[str],
+        metrics_port: Optional[int],
+        offload_workers: Optional[int],
+        offload_timeout: Optional[float],
+        loop_lag_intv: Optional[float],
+        loop_slow_callback: Optional[float],
+        instances: Optional[dict[str, "GlobalConf"]],
     ) -> None:
 
         # discord config
@@ -30,9 +50,20 @@ class GlobalConf:
 
         # logger config
         self.discord_log_channel: Optional[int] = discord_log_channel or None
+        self.event_queue_size: int = event_queue_size or 256
+        self.event_queue_policy: str = event_queue_policy or "drop-oldest"
+        self.event_coalesce_window: float = event_coalesce_window or 30.0
+
+        # journal config
+        self.event_journal_dir: Optional[str] = event_journal_dir or None
 
         # conn config
         self.minecraft_port: int = minecraft_port or 25565
+        self.conn_backend: Optional[str] = conn_backend or None
+        self.conn_snapshot_ttl: float = conn_snapshot_ttl or 1.0
+        self.readiness_probe: str = readiness_probe or "connect"
+        self.player_count: str = player_count or "ping"
+        self.ping_ttl: float = ping_ttl or 5.0
 
         # rcon config
         self.rcon_port: int = rcon_port or 25575
@@ -47,3 +78,26 @@ class GlobalConf:
         # mntr config
         self.idle_timeout: Optional[float] = idle_timeout or None
         self.polling_intv: float = polling_intv or 60.0
+        self.polling_floor: float = polling_floor or 5.0
+
+        # wdog config
+        self.tick_sample_intv: Optional[float] = tick_sample_intv or None
+        self.tick_lag_mspt: float = tick_lag_mspt or 50.0
+        self.tick_frozen_after: int = tick_frozen_after or 3
+
+        # stats config
+        self.stats_file: Optional[str] = stats_file or None
+
+        # metrics config
+        self.metrics_port: Optional[int] = metrics_port or None
+
+        # offload config
+        self.offload_workers: int = offload_workers or 4
+        self.offload_timeout: float = offload_timeout or 10.0
+
+        # lag config
+        self.loop_lag_intv: float = loop_lag_intv or 1.0
+        self.loop_slow_callback: Optional[float] = loop_slow_callback or None
+
+        # instances config
+        self.instances: dict[str, GlobalConf] = instances or {}
@@ -0,0 +1,92 @@
+import argparse
+import os
+import time
+
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+
+from server.domain.event.journal import EventJournal
+from server.domain.event.types import ServerEvent
+
+
+UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+
+
+def parse_ago(ago: str) -> int:
+    """
+    Converts a duration like `7d` or `12h` into the wall clock timestamp that long ago, in nanoseconds
+    """
+    try:
+        secs = float(ago[:-1]) * UNITS[ago[-1]]
+    except (KeyError, ValueError, IndexError):
+        raise argparse.ArgumentTypeError(f"invalid duration {ago}, expected something like 30m, 12h or 7d")
+
+    return time.time_ns() - int(secs * 1e9)
+
+
+def instance_names() -> list[str]:
+    """
+    Returns the instances listed in INSTANCES, the daemon keeps the journal of each one in a subdirectory named after it
+    """
+    return [name.strip() for name in os.getenv("INSTANCES", "").split(",") if name.strip()]
+
+
+def journal_dir(base: Optional[str], instance: Optional[str]) -> Optional[str]:
+    """
+    Returns the directory of the journal, taking the base from the variables of the instance if none is provided,
+    where `survival` overrides EVENT_JOURNAL_DIR with SURVIVAL_EVENT_JOURNAL_DIR
+    """
+    if instance is None:
+        return base or os.getenv("EVENT_JOURNAL_DIR")
+
+    base = base or os.getenv(f"{instance.upper().replace('-', '_')}_EVENT_JOURNAL_DIR") or os.getenv("EVENT_JOURNAL_DIR")
+
+    return os.path.join(base, instance) if base else None
+
+
+def main() -> None:
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Query the mc-daemon event journal")
+    parser.add_argument("--dir", help="journal directory, defaults to EVENT_JOURNAL_DIR")
+    parser.add_argument("--instance", help="server whose journal to query, needed when INSTANCES is set")
+    parser.add_argument("--event", action="append", type=lambda e: ServerEvent(e.upper()), help="only show this event, can be repeated")
+    parser.add_argument("--since", type=parse_ago, help="only show events newer than this, like 7d")
+    parser.add_argument("--until", type=parse_ago, help="only show events older than this, like 1h")
+    parser.add_argument("--count", action="store_true", help="only print how many events match")
+    args = parser.parse_args()
+
+    names = instance_names()
+
+    if names and args.instance is None:
+        parser.error(f"every instance has its own journal, pick one with --instance: {', '.join(names)}")
+
+    if names and args.instance not in names:
+        parser.error(f"unknown instance {args.instance}, expected one of: {', '.join(names)}")
+
+    path = journal_dir(args.dir, args.instance)
+
+    if not path:
+        parser.error("no journal directory, use --dir or set EVENT_JOURNAL_DIR")
+
+    # the daemon may be writing to it, so it must not be touched
+    try:
+        journal = EventJournal.open_readonly(path)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    records = journal.query(set(args.event) if args.event else None, args.since, args.until)
+
+    if args.count:
+        print(sum(1 for _ in records))
+        return
+
+    for record in records:
+        stamp = datetime.fromtimestamp(record.wall_ns / 1e9).strftime("%Y-%m-%d %H:%M:%S")
+        payload = "" if record.payload is None else f" {record.payload}"
+        print(f"#{record.seq} [{stamp}] {record.event.value}{payload}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,16 @@
 import asyncio
 import logging
+import signal
+import time
 
-from typing import Optional
+from typing import Coroutine, Optional
 
 from server.services.conn.protocol import ServerConn
 from server.services.conn.errors import TimeoutExpired
-from server.services.proc.protocol import ServerProc
+from server.services.proc.protocol import AsyncServerProc
 from server.services.proc.errors import ProcErr
 
-from server.domain.event.ebus import ServerEventBus
+from server.domain.event.async_ebus import AsyncEventBus
 from server.domain.event.types import ServerEvent
 
 from .types import ServerStatus
@@ -19,8 +21,8 @@ class EventCntl(ServerCntl):
     def __init__(
         self,
         conn: ServerConn,
-        proc: ServerProc,
-        ebus: ServerEventBus,
+        proc: AsyncServerProc,
+        ebus: AsyncEventBus,
         startup_timeout: float,
     ) -> None:
         if startup_timeout <= 0:
@@ -32,74 +34,134 @@ class EventCntl(ServerCntl):
         )
 
         self._conn: ServerConn = conn
-        self._proc: ServerProc = proc
-        self._ebus: ServerEventBus = ebus
+        self._proc: AsyncServerProc = proc
+        self._ebus: AsyncEventBus = ebus
         self._startup_timeout: float = startup_timeout
 
         self._startup_task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Future[bool]] = None
+        self._opening_since: Optional[float] = None
+        self._tasks: set[asyncio.Task] = set()
 
-        self._ebus.subscribe(ServerEvent.IDLE, lambda: (self.try_close(), None)[1])
-        self._ebus.subscribe(ServerEvent.CRASHED, lambda: (self.try_restart(), None)[1])
+        self._ebus.subscribe_async(ServerEvent.IDLE, self.try_close_async)
+        self._ebus.subscribe_async(ServerEvent.CRASHED, self.try_restart_async)
+        self._ebus.subscribe_async(ServerEvent.FROZEN, self.try_restart_async)
+
+        self._proc.on_exit(self._handle_exit)
 
     async def _handle_startup(self) -> None:
         """
-        Tracks the startup and updates the status if the server finishes opening or it freezes
+        Tracks the startup and updates the status if the server finishes opening or it freezes,
+        this is the only task probing the server while it opens, everyone else waits for its outcome
         Emits event `HUNG` if it freezes and event 'OPENED' if it opens correctly
         """
-        if await self.wait_open():
+        opened = await self._probe_open()
+
+        if self._status != ServerStatus.OPENING:
+            # the startup was abandoned, the server was closed or the process exited on its own
+            return
+
+        if opened:
             self._status = ServerStatus.OPEN
-            self._ebus.emit(ServerEvent.OPENED)
+            self._settle_ready(True)
+            self._ebus.emit(ServerEvent.OPENED, self._startup_elapsed_ms())
             return
 
-        self._proc.kill()
+        await self._proc.kill()
         self._status = ServerStatus.CLOSED
+        self._settle_ready(False)
 
         self._ebus.emit(ServerEvent.HUNG)
         self._startup_task = None
 
-    def status(self) -> ServerStatus:
-        return self._status
+    @staticmethod
+    def _describe_exit(code: int) -> str:
+        if code < 0:
+            try:
+                return f"signal {signal.Signals(-code).name}"
+            except ValueError:
+                return f"signal {-code}"
 
-    def try_open(self) -> bool:
+        return f"exit code {code}"
+
+    def _handle_exit(self, code: int) -> None:
         """
-        Tries to open the server, returns wether it has opened or not
-        Emits event 'OPENING' when starting the operation
+        Called by the process as soon as it exits without being stopped
+        Emits event 'CRASHED' with the exit code, negative if it was killed by a signal
         """
-        if self._status != ServerStatus.CLOSED:
-            return False
+        if self._status == ServerStatus.OPENING:
+            self._logger.error(f"Server process exited during startup with {self._describe_exit(code)}")
 
+            if self._startup_task is not None and not self._startup_task.done():
+                self._startup_task.cancel()
+
+            self._startup_task = None
+            self._status = ServerStatus.CLOSED
+            self._settle_ready(False)
+            self._ebus.emit(ServerEvent.CRASHED, code)
+            return
+
+        if self._status == ServerStatus.OPEN:
+            self._logger.error(f"Server process exited unexpectedly with {self._describe_exit(code)}")
+            self._ebus.emit(ServerEvent.CRASHED, code)
+
+    def _spawn(self, coro: Coroutine) -> None:
+        """
+        Runs the coroutine in the background, keeping a reference until it finishes
+        """
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _begin_open(self) -> None:
+        """
+        Marks the server as opening, emits event 'OPENING'
+        """
         self._status = ServerStatus.OPENING
+        self._opening_since = time.monotonic()
+
+        self._settle_ready(False)
+        self._ready = asyncio.get_running_loop().create_future()
 
         self._ebus.emit(ServerEvent.OPENING)
 
+    async def _finish_open(self) -> bool:
+        """
+        Starts the process and the startup tracking, emits event 'HUNG' if the process can't be started
+        """
         try:
-            self._proc.start()
+            await self._proc.start()
             self._startup_task = asyncio.create_task(self._handle_startup())
             return True
         except ProcErr as e:
             self._logger.error(f"Server couldn't be opened: {e}")
             self._status = ServerStatus.CLOSED
+            self._settle_ready(False)
             self._ebus.emit(ServerEvent.HUNG)
             return False
 
-    def try_close(self) -> bool:
+    def _begin_close(self) -> None:
         """
-        Tries to close the server, returns wether it has closed or not
-        Emits event 'CLOSING' when starting the operation and event 'CLOSED' when finished closing
+        Marks the server as closing, emits event 'CLOSING'
         """
-        if self._status != ServerStatus.OPEN:
-            return False
-        
         if self._startup_task is not None and not self._startup_task.done():
             self._startup_task.cancel()
             self._startup_task = None
 
+        if self._status == ServerStatus.OPENING:
+            self._logger.warning("Server closed before completing startup: idle timeout could be too low")
+
         self._status = ServerStatus.CLOSING
+        self._settle_ready(False)
 
         self._ebus.emit(ServerEvent.CLOSING)
 
+    async def _finish_close(self) -> None:
+        """
+        Stops the process, emits event 'CLOSED' when finished
+        """
         try:
-            self._proc.stop()
+            await self._proc.stop()
         except ProcErr as e:
             # Nothing can be done, the app assumes the process stopped
             # and the admin needs to manually check if the process is still alive or in a zombie state
@@ -109,20 +171,129 @@ class EventCntl(ServerCntl):
 
         self._ebus.emit(ServerEvent.CLOSED)
 
+    def status(self) -> ServerStatus:
+        return self._status
+
+    def try_open(self) -> bool:
+        """
+        Tries to open the server in the background, returns wether the operation started or not
+        Emits event 'OPENING' when starting the operation
+        """
+        if self._status != ServerStatus.CLOSED:
+            return False
+
+        self._begin_open()
+        self._spawn(self._finish_open())
+
+        return True
+
+    async def try_open_async(self) -> bool:
+        """
+        Tries to open the server, returns wether the process started or not
+        Emits event 'OPENING' when starting the operation
+        """
+        if self._status != ServerStatus.CLOSED:
+            return False
+
+        self._begin_open()
+
+        return await self._finish_open()
+
+    def try_close(self) -> bool:
+        """
+        Tries to close the server in the background, returns wether the operation started or not
+        Emits event 'CLOSING' when starting the operation and event 'CLOSED' when finished closing
+        """
+        if self._status != ServerStatus.OPEN:
+            return False
+
+        self._begin_close()
+        self._spawn(self._finish_close())
+
+        return True
+
+    async def try_close_async(self) -> bool:
+        """
+        Tries to close the server, returns wether it has closed or not
+        Emits event 'CLOSING' when starting the operation and event 'CLOSED' when finished closing
+        """
+        if self._status != ServerStatus.OPEN:
+            return False
+
+        self._begin_close()
+        await self._finish_close()
+
         return True
 
     def try_restart(self) -> bool:
-        return self.try_close() and self.try_open()
+        """
+        Tries to restart the server in the background, returns wether the operation started or not
+        """
+        if self._status != ServerStatus.OPEN:
+            return False
+
+        self._spawn(self.try_restart_async())
+
+        return True
+
+    async def try_restart_async(self) -> bool:
+        return await self.try_close_async() and await self.try_open_async()
+
+    def _startup_elapsed_ms(self) -> Optional[int]:
+        """
+        Returns how long the current startup has taken in milliseconds
+        """
+        if self._opening_since is None:
+            return None
+
+        return int((time.monotonic() - self._opening_since) * 1000)
+
+    def _startup_budget(self) -> float:
+        """
+        Returns how much of the startup timeout is left for the current startup
+        """
+        if self._opening_since is None:
+            return self._startup_timeout
+
+        return self._startup_timeout - (time.monotonic() - self._opening_since)
+
+    def _settle_ready(self, opened: bool) -> None:
+        """
+        Resolves the outcome of the current startup for everyone waiting on it, only the first outcome counts
+        """
+        if self._ready is not None and not self._ready.done():
+            self._ready.set_result(opened)
+
+        self._ready = None
+
+    async def _probe_open(self) -> bool:
+        """
+        Probes the server until it opens or the startup timeout expires
+        Returns wether it opened or not
+        """
+        budget = self._startup_budget()
+
+        if budget <= 0:
+            self._logger.warning("Timeout reached opening the server")
+            return False
 
-    async def wait_open(self) -> bool:
         try:
-            await self._conn.wait_open(self._startup_timeout)
+            await self._conn.wait_open(budget)
             return True
         except TimeoutExpired:
             self._logger.warning("Timeout reached opening the server")
             return False
         except asyncio.CancelledError:
-            self._logger.warning("Server closed before completing startup: idle timeout could be too low")
             return False
 
+    async def wait_open(self) -> bool:
+        if self._status == ServerStatus.OPEN:
+            return True
+
+        if self._ready is None:
+            return False
+
+        # shielded so a caller that gives up doesn't cancel the outcome for everyone else
+        return await asyncio.shield(self._ready)
+
 
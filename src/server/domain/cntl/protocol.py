@@ -19,28 +19,49 @@ class ServerCntl(Protocol):
     @abstractmethod
     def try_open(self) -> bool:
         """
-        Tries to open the server, returns wether it has opened or not
+        Tries to open the server in the background, returns wether the operation started or not
         """
         ...
 
     @abstractmethod
     def try_close(self) -> bool:
         """
-        Tries to close the server, returns wether it has closed or not
+        Tries to close the server in the background, returns wether the operation started or not
         """
         ...
 
     @abstractmethod
     def try_restart(self) -> bool:
         """
-        Tries to restart the server, returns wether it has restarted or not
+        Tries to restart the server in the background, returns wether the operation started or not
+        """
+        ...
+
+    @abstractmethod
+    async def try_open_async(self) -> bool:
+        """
+        Same as `try_open` but waits until the process has been started
+        """
+        ...
+
+    @abstractmethod
+    async def try_close_async(self) -> bool:
+        """
+        Same as `try_close` but waits until the process has been stopped, without blocking the event loop
+        """
+        ...
+
+    @abstractmethod
+    async def try_restart_async(self) -> bool:
+        """
+        Same as `try_restart` but waits until the process has been stopped and started again
         """
         ...
 
     @abstractmethod
     async def wait_open(self) -> bool:
         """
-        Sleeps until the server opens or the timeout expires
-        Returns wether it opened or not
+        Sleeps until the current startup opens the server, hangs or is abandoned
+        Every caller shares the same outcome, returns wether it opened or not
         """
         ...
@@ -0,0 +1,130 @@
+import asyncio
+
+from typing import Any, Awaitable, Callable, Optional
+
+from .ebus import ServerEventBus
+from .types import ServerEvent, EventRecord
+
+
+class _Subscriber:
+    """
+    Coroutine handler with its own queue of pending events, run by its own worker task
+    """
+
+    def __init__(self, handler: Callable[[], Awaitable[Any]], timeout: Optional[float]) -> None:
+        self.handler: Callable[[], Awaitable[Any]] = handler
+        self.timeout: Optional[float] = timeout
+        self.queue: asyncio.Queue[tuple[ServerEvent, asyncio.Future[None]]] = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+
+class AsyncEventBus(ServerEventBus):
+    """
+    Event bus that also accepts coroutine handlers
+    Each coroutine subscriber runs on its own task, so a slow handler never delays the emitter or
+    the other subscribers, and its failures or timeouts are logged without affecting them
+    Synchronous handlers keep being called in order on the emitter's stack
+    """
+
+    def __init__(self, first_seq: int = 0) -> None:
+        super().__init__(first_seq)
+        self._subscribers: dict[ServerEvent, list[_Subscriber]] = {}
+
+    def subscribe_async(
+        self,
+        event: ServerEvent,
+        handler: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        The caller suscribes to an event so that when it is emitted, the provided coroutine handler is scheduled
+        If a timeout is provided the handler is cancelled once it expires
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError("Handler timeout must be greater than zero")
+
+        self._subscribers.setdefault(event, []).append(_Subscriber(handler, timeout))
+
+    def _dispatch(self, event: ServerEvent) -> list[asyncio.Future[None]]:
+        """
+        Queues the event on every coroutine subscriber, returns futures that resolve once each has handled it
+        """
+        subscribers = self._subscribers.get(event, [])
+
+        if not subscribers:
+            return []
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._logger.error(f"Event {event} emitted outside the event loop, async handlers were skipped")
+            return []
+
+        futures = []
+
+        for sub in subscribers:
+            future = loop.create_future()
+            sub.queue.put_nowait((event, future))
+
+            if sub.task is None or sub.task.done():
+                # named after the handler, so the loop can tell which one is slow
+                sub.task = loop.create_task(self._worker(sub), name=f"ebus {getattr(sub.handler, '__qualname__', sub.handler)}")
+
+            futures.append(future)
+
+        return futures
+
+    async def _worker(self, sub: _Subscriber) -> None:
+        """
+        Continous task that runs the handler once for every event queued on its subscriber
+        """
+        while True:
+            event, future = await sub.queue.get()
+
+            try:
+                async with asyncio.timeout(sub.timeout):
+                    await sub.handler()
+            except TimeoutError:
+                self._logger.error(f"Handler {sub.handler} for event {event} timed out after {sub.timeout}s")
+            except Exception as e:
+                self._logger.error(f"Handler {sub.handler} for event {event} failed: {e}")
+            finally:
+                if not future.done():
+                    future.set_result(None)
+
+    def emit(self, event: ServerEvent, payload: Optional[int] = None) -> EventRecord:
+        """
+        Calls the synchronous handlers and schedules the coroutine handlers without waiting for them
+        """
+        record = super().emit(event, payload)
+        self._dispatch(event)
+        return record
+
+    async def emit_async(self, event: ServerEvent, payload: Optional[int] = None, wait: bool = True) -> EventRecord:
+        """
+        Same as `emit`, but if wait is true it also waits until every coroutine handler has handled the event
+        Must not be awaited with wait from a coroutine handler of the same event, as it would wait for itself
+        """
+        record = super().emit(event, payload)
+        futures = self._dispatch(event)
+
+        if wait and futures:
+            await asyncio.gather(*futures)
+
+        return record
+
+    async def close(self) -> None:
+        """
+        Cancels the worker tasks of every coroutine subscriber
+        """
+        tasks = [
+            sub.task
+            for subs in self._subscribers.values()
+            for sub in subs
+            if sub.task is not None and not sub.task.done()
+        ]
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
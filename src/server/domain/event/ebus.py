@@ -1,15 +1,20 @@
 import logging
+import time
 
-from typing import Callable
+from typing import Callable, Optional
 
-from .types import ServerEvent
+from .types import ServerEvent, EventRecord
 
 class ServerEventBus:
     """
     Allows communication between classes through events
+    Every emitted event is stamped into an `EventRecord` with a sequence id and timestamps
     """
-    def __init__(self) -> None:
+    def __init__(self, first_seq: int = 0) -> None:
         self._handlers: dict[ServerEvent, list[Callable[[], None]]] = {}
+        self._taps: list[Callable[[EventRecord], None]] = []
+        self._seq: int = first_seq
+        self._slow: Optional[tuple[float, Callable[[str, float], None]]] = None
         self._logger: logging.Logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
     def subscribe(self, event: ServerEvent, handler: Callable[[], None]) -> None:
@@ -19,13 +24,54 @@ class ServerEventBus:
         """
         self._handlers.setdefault(event, []).append(handler)
 
-    def emit(self, event: ServerEvent) -> None:
+    def tap(self, handler: Callable[[EventRecord], None]) -> None:
+        """
+        The caller receives the record of every event emitted, before any other handler is called
+        """
+        self._taps.append(handler)
+
+    def on_slow(self, threshold: float, handler: Callable[[str, float], None]) -> None:
+        """
+        The handler is called with the name and duration of every tap or handler that runs longer than the threshold,
+        since they run on the emitter's stack the loop only sees the emitter as slow
+        """
+        if threshold <= 0:
+            raise ValueError("Slow handler threshold must be greater than zero")
+
+        self._slow = (threshold, handler)
+
+    def _call(self, kind: str, fn: Callable[..., None], event: ServerEvent, *args) -> None:
+        """
+        Calls a tap or handler, logging its failures and reporting it if it was slow
+        """
+        start = time.perf_counter()
+
+        try:
+            fn(*args)
+        except Exception as e:
+            self._logger.error(f"{kind} {fn} for event {event} failed: {e}")
+
+        if self._slow is not None and (elapsed := time.perf_counter() - start) > self._slow[0]:
+            self._slow[1](f"{kind.lower()} {getattr(fn, '__qualname__', fn)} for {event.name}", elapsed)
+
+    def _record(self, event: ServerEvent, payload: Optional[int]) -> EventRecord:
+        record = EventRecord(self._seq, event, time.monotonic_ns(), time.time_ns(), payload)
+        self._seq += 1
+        return record
+
+    def emit(self, event: ServerEvent, payload: Optional[int] = None) -> EventRecord:
         """
         After emitting an event all the subscribed handlers are called
+        Returns the record of the event
         """
-        self._logger.info(f"Event {event} has been emitted")
+        record = self._record(event, payload)
+
+        self._logger.info(f"Event {event} has been emitted (#{record.seq})")
+
+        for tap in self._taps:
+            self._call("Tap", tap, event, record)
+
         for handler in self._handlers.get(event, []):
-            try:
-                handler()
-            except Exception as e:
-                self._logger.error(f"Handler {handler} for event {event} failed: {e}")
+            self._call("Handler", handler, event)
+
+        return record
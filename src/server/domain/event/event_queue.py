@@ -0,0 +1,174 @@
+import asyncio
+import time
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from .types import ServerEvent, OverflowPolicy
+
+
+@dataclass(frozen=True)
+class EventQueueStats:
+    queued: int
+    dropped: int
+    coalesced: int
+    pending: int = 0        # events waiting for room under `BLOCK`
+
+
+class EventQueueFull(Exception):
+    pass
+
+
+class EventQueue:
+    """
+    Bounded ring buffer of events with a configurable overflow policy
+    An incoming event can cancel out the last queued one if they form a coalescing pair
+    and arrived within the window, e.g. EMPTY followed shortly by OCCUPIED leaves nothing queued
+    """
+
+    DEFAULT_COALESCE = {
+        ServerEvent.OCCUPIED: ServerEvent.EMPTY,
+        ServerEvent.EMPTY: ServerEvent.OCCUPIED,
+    }
+
+    def __init__(
+        self,
+        capacity: int,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        coalesce_window: float = 0.0,
+        coalesce: Optional[dict[ServerEvent, ServerEvent]] = None,
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError("Event queue capacity must be greater than zero")
+
+        if coalesce_window < 0:
+            raise ValueError("Coalesce window can't be negative")
+
+        self._capacity: int = capacity
+        self._policy: OverflowPolicy = policy
+        self._coalesce_window: float = coalesce_window
+        self._coalesce: dict[ServerEvent, ServerEvent] = (
+            dict(self.DEFAULT_COALESCE) if coalesce is None else coalesce
+        )
+
+        self._buf: list[Optional[tuple[ServerEvent, float]]] = [None] * capacity
+        self._head: int = 0
+        self._size: int = 0
+
+        self._getters: deque[asyncio.Future[None]] = deque()
+        self._putters: deque[asyncio.Future[None]] = deque()
+
+        self._dropped: int = 0
+        self._coalesced: int = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def full(self) -> bool:
+        return self._size == self._capacity
+
+    def stats(self) -> EventQueueStats:
+        return EventQueueStats(self._size, self._dropped, self._coalesced)
+
+    @staticmethod
+    def _wake(waiters: deque[asyncio.Future[None]]) -> None:
+        while waiters:
+            waiter = waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _try_coalesce(self, event: ServerEvent, now: float) -> bool:
+        """
+        Removes the last queued event if the incoming one cancels it out, returns whether it did
+        """
+        cancels = self._coalesce.get(event)
+
+        if cancels is None or self._size == 0:
+            return False
+
+        tail = (self._head + self._size - 1) % self._capacity
+        last = self._buf[tail]
+
+        if last is None or last[0] != cancels or now - last[1] > self._coalesce_window:
+            return False
+
+        self._buf[tail] = None
+        self._size -= 1
+        self._coalesced += 2
+        self._wake(self._putters)
+
+        return True
+
+    def _append(self, event: ServerEvent, now: float) -> None:
+        self._buf[(self._head + self._size) % self._capacity] = (event, now)
+        self._size += 1
+        self._wake(self._getters)
+
+    def _popleft(self) -> ServerEvent:
+        item = self._buf[self._head]
+        assert item is not None
+
+        self._buf[self._head] = None
+        self._head = (self._head + 1) % self._capacity
+        self._size -= 1
+        self._wake(self._putters)
+
+        return item[0]
+
+    def put_nowait(self, event: ServerEvent) -> None:
+        """
+        Queues the event, applying the overflow policy if the queue is full
+        Raises `EventQueueFull` if it is full and the policy is `BLOCK`
+        """
+        now = time.monotonic()
+
+        if self._try_coalesce(event, now):
+            return
+
+        if self.full():
+            match self._policy:
+                case OverflowPolicy.DROP_OLDEST:
+                    self._popleft()
+                    self._dropped += 1
+                case OverflowPolicy.DROP_NEWEST:
+                    self._dropped += 1
+                    return
+                case OverflowPolicy.BLOCK:
+                    raise EventQueueFull
+
+        self._append(event, now)
+
+    async def put(self, event: ServerEvent) -> None:
+        """
+        Queues the event, waiting for room if the queue is full and the policy is `BLOCK`
+        """
+        while True:
+            try:
+                self.put_nowait(event)
+                return
+            except EventQueueFull:
+                waiter = asyncio.get_running_loop().create_future()
+                self._putters.append(waiter)
+
+                try:
+                    await waiter
+                finally:
+                    waiter.cancel()
+
+    async def get(self) -> ServerEvent:
+        """
+        Waits until there is an event in the queue and pops it
+        """
+        while self._size == 0:
+            waiter = asyncio.get_running_loop().create_future()
+            self._getters.append(waiter)
+
+            try:
+                await waiter
+            finally:
+                waiter.cancel()
+
+        return self._popleft()
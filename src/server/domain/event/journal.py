@@ -0,0 +1,258 @@
+import io
+import logging
+import mmap
+import os
+import struct
+
+from bisect import bisect_left
+from typing import BinaryIO, Iterator, Optional
+
+from .types import ServerEvent, EventRecord
+
+
+class _Segment:
+    """
+    Read only view of a journal segment through a memory map
+    """
+
+    def __init__(self, path: str, first_seq: int) -> None:
+        self.path: str = path
+        self.first_seq: int = first_seq
+
+    def __len__(self) -> int:
+        return max(os.path.getsize(self.path) - EventJournal.HEADER_LEN, 0) // EventJournal.RECORD.size
+
+
+class EventJournal:
+    """
+    Append-only binary journal of event records, split in segments of a fixed maximum size
+    Every record has the same size, so segments are read through a memory map and time ranges are bisected
+    Segments are named after the sequence id of their first record and the oldest are removed past the limit
+    Wall clock stamps are clamped so they never go backwards, otherwise a clock stepped back by ntp
+    would break the bisection of time ranges
+    """
+
+    MAGIC = b"MCDJRN01"
+    HEADER_LEN = len(MAGIC)
+    SUFFIX = ".seg"
+
+    # seq, wall_ns, mono_ns, event, has payload, payload
+    RECORD = struct.Struct("<QqqBBxxi")
+
+    # codes are stored on disk, new events must only be appended to `ServerEvent`
+    CODES: dict[ServerEvent, int] = {event: code for code, event in enumerate(ServerEvent)}
+    EVENTS: list[ServerEvent] = list(ServerEvent)
+
+    def __init__(self, path: str, segment_records: int = 32768, max_segments: int = 64, readonly: bool = False) -> None:
+        if segment_records <= 0:
+            raise ValueError("Journal segment size must be greater than zero")
+
+        if max_segments <= 0:
+            raise ValueError("Journal must keep at least one segment")
+
+        self._path: str = path
+        self._segment_records: int = segment_records
+        self._max_segments: int = max_segments
+
+        self._file: Optional[BinaryIO] = None
+        self._file_records: int = 0
+        self._next_seq: int = 0
+        self._last_wall_ns: int = 0
+        self._readonly: bool = readonly
+
+        self._logger: logging.Logger = logging.getLogger(
+            f"{__name__}.{self.__class__.__name__}"
+        )
+
+        # the segments may belong to a running daemon, which is the only one allowed to repair them
+        if readonly:
+            if not os.path.isdir(path):
+                raise FileNotFoundError(f"There is no journal at {path}")
+            return
+
+        os.makedirs(path, exist_ok=True)
+        self._recover()
+
+    @staticmethod
+    def open_readonly(path: str) -> "EventJournal":
+        """
+        Opens an existing journal only to query it, nothing on disk is created, truncated or removed
+        and a torn record at the end of the last segment is ignored instead of repaired
+        """
+        return EventJournal(path, readonly=True)
+
+    def _segments(self) -> list[_Segment]:
+        """
+        Returns the segments on disk ordered by their first sequence id
+        """
+        segments = []
+
+        for name in os.listdir(self._path):
+            stem, ext = os.path.splitext(name)
+
+            if ext == self.SUFFIX and stem.isdigit():
+                segments.append(_Segment(os.path.join(self._path, name), int(stem)))
+
+        return sorted(segments, key=lambda segment: segment.first_seq)
+
+    def _recover(self) -> None:
+        """
+        Drops any torn record left at the end of the last segment and resumes the sequence after it
+        """
+        segments = self._segments()
+
+        if not segments:
+            return
+
+        last = segments[-1]
+        size = os.path.getsize(last.path)
+        valid = self.HEADER_LEN + len(last) * self.RECORD.size
+
+        if size < self.HEADER_LEN:
+            os.remove(last.path)
+            self._logger.warning(f"Removed empty journal segment {last.path}")
+            self._next_seq = last.first_seq
+            return
+
+        if size != valid:
+            self._logger.warning(f"Truncating torn record at the end of {last.path}")
+            os.truncate(last.path, valid)
+
+        self._next_seq = last.first_seq + len(last)
+
+        if len(last) > 0:
+            with open(last.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                self._last_wall_ns = self._wall_at(buf, len(last) - 1)
+
+    def next_seq(self) -> int:
+        """
+        Returns the sequence id the next record is expected to have
+        """
+        return self._next_seq
+
+    def _open_segment(self, first_seq: int) -> None:
+        if self._file is not None:
+            self._file.close()
+
+        path = os.path.join(self._path, f"{first_seq:020d}{self.SUFFIX}")
+        exists = os.path.exists(path)
+
+        self._file = open(path, "ab")
+        self._file_records = (os.path.getsize(path) - self.HEADER_LEN) // self.RECORD.size if exists else 0
+
+        if not exists:
+            self._file.write(self.MAGIC)
+
+        segments = self._segments()
+
+        for segment in segments[: max(len(segments) - self._max_segments, 0)]:
+            os.remove(segment.path)
+
+    def append(self, record: EventRecord) -> None:
+        """
+        Appends the record to the current segment, rotating it if it is full
+        Raises `io.UnsupportedOperation` if the journal was opened read only
+        """
+        if self._readonly:
+            raise io.UnsupportedOperation("Journal was opened read only")
+
+        if self._file is None:
+            segments = self._segments()
+
+            if segments and len(segments[-1]) < self._segment_records:
+                self._open_segment(segments[-1].first_seq)
+            else:
+                self._open_segment(record.seq)
+
+        elif self._file_records >= self._segment_records:
+            self._open_segment(record.seq)
+
+        assert self._file is not None
+
+        self._last_wall_ns = max(record.wall_ns, self._last_wall_ns)
+
+        self._file.write(self.RECORD.pack(
+            record.seq,
+            self._last_wall_ns,
+            record.mono_ns,
+            self.CODES[record.event],
+            record.payload is not None,
+            record.payload or 0,
+        ))
+        self._file.flush()
+
+        self._file_records += 1
+        self._next_seq = record.seq + 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _decode(buf: mmap.mmap, offset: int) -> EventRecord:
+        seq, wall_ns, mono_ns, code, has_payload, payload = EventJournal.RECORD.unpack_from(buf, offset)
+        return EventRecord(seq, EventJournal.EVENTS[code], mono_ns, wall_ns, payload if has_payload else None)
+
+    @staticmethod
+    def _wall_at(buf: mmap.mmap, index: int) -> int:
+        offset = EventJournal.HEADER_LEN + index * EventJournal.RECORD.size
+        return struct.unpack_from("<q", buf, offset + 8)[0]
+
+    def query(
+        self,
+        events: Optional[set[ServerEvent]] = None,
+        since_ns: Optional[int] = None,
+        until_ns: Optional[int] = None,
+    ) -> Iterator[EventRecord]:
+        """
+        Yields the records in sequence order, optionally only the given events within a wall clock range
+        Segments outside the range are skipped and the start of the range is bisected,
+        which relies on the stamps being clamped when appended, records stamped while the clock was behind
+        carry the stamp of the record before them
+        """
+        if self._file is not None:
+            self._file.flush()
+
+        codes = None if events is None else {self.CODES[event] for event in events}
+
+        for segment in self._segments():
+            try:
+                count = len(segment)
+                f = open(segment.path, "rb")
+            except FileNotFoundError:
+                # removed meanwhile by the daemon rotating its segments
+                continue
+
+            if count == 0:
+                f.close()
+                continue
+
+            with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if since_ns is not None and self._wall_at(buf, count - 1) < since_ns:
+                    continue
+
+                if until_ns is not None and self._wall_at(buf, 0) > until_ns:
+                    return
+
+                start = 0
+
+                if since_ns is not None:
+                    start = bisect_left(range(count), since_ns, key=lambda i: self._wall_at(buf, i))
+
+                for i in range(start, count):
+                    offset = self.HEADER_LEN + i * self.RECORD.size
+
+                    if until_ns is not None and self._wall_at(buf, i) > until_ns:
+                        return
+
+                    if codes is not None and buf[offset + 24] not in codes:
+                        continue
+
+                    yield self._decode(buf, offset)
+
+    def replay(self) -> Iterator[EventRecord]:
+        """
+        Yields every record in the journal in sequence order
+        """
+        return self.query()
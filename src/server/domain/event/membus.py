@@ -1,31 +1,74 @@
 import asyncio
 
-from typing import Callable
+from dataclasses import replace
+from typing import Optional
 
-from .ebus import ServerEventBus
-from .types import ServerEvent
+from .async_ebus import AsyncEventBus
+from .event_queue import EventQueue, EventQueueFull, EventQueueStats
+from .types import ServerEvent, EventRecord, OverflowPolicy
 
 
-class MemoryEventBus(ServerEventBus):
+class MemoryEventBus(AsyncEventBus):
     """
     This class stores all the events (that the user has subscribed to) emitted by the bus
+    Events are kept in a bounded queue, so memory stays flat even if nobody pops them
     """
-    def __init__(self, subs: list[ServerEvent]) -> None:
-        self._queue: asyncio.Queue[ServerEvent] = asyncio.Queue()
+
+    # events emitted without waiting that may wait for room under `BLOCK`, the rest are dropped
+    MAX_PENDING = 64
+
+    def __init__(
+        self,
+        subs: list[ServerEvent],
+        capacity: int = 256,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        coalesce_window: float = 0.0,
+        first_seq: int = 0,
+    ) -> None:
+        self._queue: EventQueue = EventQueue(capacity, policy, coalesce_window)
         self._subs: list[ServerEvent] = list(set(subs))
-        super().__init__()
+        self._tasks: set[asyncio.Task] = set()
+        self._dropped: int = 0
+        super().__init__(first_seq)
 
-    def subscribe(self, event: ServerEvent, handler: Callable[[], None]) -> None:
-        return super().subscribe(event, handler)
+    def _store(self, event: ServerEvent) -> None:
+        """
+        Queues the event without blocking the emitter,
+        if the queue is full and the policy is `BLOCK` it is queued as soon as there is room,
+        unless too many events are already waiting, then it is dropped
+        """
+        try:
+            self._queue.put_nowait(event)
+        except EventQueueFull:
+            if len(self._tasks) >= self.MAX_PENDING:
+                self._dropped += 1
+                return
+
+            task = asyncio.create_task(self._queue.put(event))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
 
-    def emit(self, event: ServerEvent) -> None:
+    def emit(self, event: ServerEvent, payload: Optional[int] = None) -> EventRecord:
         if event in self._subs:
-            self._queue.put_nowait(event)
+            self._store(event)
 
-        super().emit(event)
+        return super().emit(event, payload)
+
+    async def emit_async(self, event: ServerEvent, payload: Optional[int] = None, wait: bool = True) -> EventRecord:
+        if event in self._subs:
+            await self._queue.put(event)
+
+        return await super().emit_async(event, payload, wait)
 
     async def pop(self) -> ServerEvent:
         """
         Waits until there is an event in the queue and pops it
         """
         return await self._queue.get()
+
+    def stats(self) -> EventQueueStats:
+        """
+        Returns how many events are queued, waiting for room, and how many have been dropped or coalesced
+        """
+        stats = self._queue.stats()
+        return replace(stats, dropped=stats.dropped + self._dropped, pending=len(self._tasks))
@@ -1,13 +1,42 @@
+from dataclasses import dataclass
 from enum import Enum
+from typing import Optional
 
 
 class ServerEvent(Enum):
-    OPENED   = "OPENED"         # server has finished startup
-    CLOSED   = "CLOSED"         # server has finished closing
-    OPENING  = "OPENING"        # server is opening
-    CLOSING  = "CLOSING"        # server is closing
-    CRASHED  = "CRASHED"        # serves has crashed
-    HUNG     = "HUNG"           # server timed out during startup
-    OCCUPIED = "OCCUPIED"       # server has been occupied after being empty
-    EMPTY    = "EMPTY"          # server is empty after being occupied
-    IDLE     = "IDLE"           # server idle timeout has expired
+    OPENED    = "OPENED"        # server has finished startup
+    CLOSED    = "CLOSED"        # server has finished closing
+    OPENING   = "OPENING"       # server is opening
+    CLOSING   = "CLOSING"       # server is closing
+    CRASHED   = "CRASHED"       # serves has crashed
+    HUNG      = "HUNG"          # server timed out during startup
+    OCCUPIED  = "OCCUPIED"      # server has been occupied after being empty
+    EMPTY     = "EMPTY"         # server is empty after being occupied
+    IDLE      = "IDLE"          # server idle timeout has expired
+    LAGGING   = "LAGGING"       # server ticks are taking longer than the threshold
+    RECOVERED = "RECOVERED"     # server ticks are back under the threshold after lagging
+    FROZEN    = "FROZEN"        # server stopped answering while open
+
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = "DROP_OLDEST"     # the oldest queued event is discarded to make room
+    DROP_NEWEST = "DROP_NEWEST"     # the incoming event is discarded
+    BLOCK       = "BLOCK"           # the producer waits until there is room
+
+    def __str__(self) -> str:
+        return self.value.lower().replace("_", "-")
+
+
+@dataclass(frozen=True)
+class EventRecord:
+    """
+    Occurrence of an event, ordered by its sequence id
+    The payload carries an optional figure tied to the event, like the client count or an exit code
+    `CRASHED` carries the exit code of the process, negative if it was killed by a signal,
+    or no payload if the crash was noticed by the monitor instead
+    """
+    seq: int
+    event: ServerEvent
+    mono_ns: int
+    wall_ns: int
+    payload: Optional[int] = None
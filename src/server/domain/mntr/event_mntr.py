@@ -2,50 +2,155 @@ import asyncio
 import logging
 import time
 
-from typing import Optional
+from typing import Callable, Optional
 
 from server.domain.event.types import ServerEvent
 from server.domain.event.ebus import ServerEventBus
-from server.services.conn.protocol import ServerConn
+from server.services.conn.protocol import ServerConn, ServerPing
+from server.services.conn.types import ConnSnapshot
+from server.services.offload.errors import OffloadTimeout
+from server.domain.stats.protocol import ServerStats
+from server.services.metrics.registry import MetricsRegistry, Histogram, Gauge
 
 from .protocol import ServerMntr
+from .poll_schedule import PollSchedule
 
 
 class EventMntr(ServerMntr):
     def __init__(
         self,
         idle_timeout: Optional[float],
-        polling_intv: float,
+        polling_floor: float,
+        polling_ceil: float,
         conn: ServerConn,
         ebus: ServerEventBus,
+        stats: Optional[ServerStats] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        ping: Optional[ServerPing] = None,
     ) -> None:
         if idle_timeout is not None and idle_timeout <= 0:
             raise ValueError("Startup timeout must be greater than zero")
 
-        if polling_intv <= 0:
-            raise ValueError("Polling interval must be greater than zero")
-
         self._task: Optional[asyncio.Task] = None
-        self._idle_since: Optional[float] = None
+        self._idle_deadline: Optional[float] = None
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        self._idle_confirm: Optional[asyncio.Task] = None
+        self._last_clients: Optional[int] = None
+        self._sample_handlers: list[Callable[[int], None]] = []
+        self._deadline_handlers: list[Callable[[], None]] = []
         self._logger: logging.Logger = logging.getLogger(
             f"{__name__}.{self.__class__.__name__}"
         )
 
         self._idle_timeout: Optional[float] = idle_timeout
-        self._polling_intv: float = polling_intv
+        self._schedule: PollSchedule = PollSchedule(polling_floor, polling_ceil)
         self._conn: ServerConn = conn
         self._ebus: ServerEventBus = ebus
+        self._stats: Optional[ServerStats] = stats
+        self._ping: Optional[ServerPing] = ping
+
+        metrics = metrics or MetricsRegistry()
+        self._tick_time: Histogram = metrics.histogram(
+            "mntr_tick_seconds", "Time taken by a monitor tick, socket scan and health checks included",
+        )
+        self._poll_intv: Gauge = metrics.gauge(
+            "mntr_poll_interval_seconds", "Time the monitor waits until its next check",
+        )
 
         self._ebus.subscribe(ServerEvent.OPENED, self._start)
         self._ebus.subscribe(ServerEvent.CLOSING, self._stop)
+        self._ebus.subscribe(ServerEvent.EMPTY, self._arm_idle)
+        self._ebus.subscribe(ServerEvent.OCCUPIED, self._disarm_idle)
+
+    def last_count(self) -> Optional[int]:
+        return self._last_clients
+
+    def on_sample(self, handler: Callable[[int], None]) -> None:
+        self._sample_handlers.append(handler)
+
+    def on_deadline(self, handler: Callable[[], None]) -> None:
+        self._deadline_handlers.append(handler)
 
     def timeout_in(self) -> Optional[float]:
-        if self._idle_timeout is None:
-            return None
-        if self._idle_since is None:
+        if self._idle_deadline is None:
             return None
 
-        return max(self._idle_timeout - (time.time() - self._idle_since), 0)
+        return max(self._idle_deadline - asyncio.get_running_loop().time(), 0)
+
+    def _arm_idle(self) -> None:
+        """
+        Schedules event 'IDLE' for when the idle timeout expires, on the monotonic clock of the loop
+        """
+        if self._idle_timeout is None:
+            return
+
+        self._disarm_idle()
+
+        loop = asyncio.get_running_loop()
+        self._idle_deadline = loop.time() + self._idle_timeout
+        self._idle_handle = loop.call_at(self._idle_deadline, self._idle_expired)
+
+        for handler in self._deadline_handlers:
+            handler()
+
+    def _disarm_idle(self) -> None:
+        """
+        Cancels the pending idle timeout, if any
+        """
+        armed = self._idle_deadline is not None
+
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+
+        if self._idle_confirm is not None and self._idle_confirm is not asyncio.current_task():
+            self._idle_confirm.cancel()
+
+        self._idle_handle = None
+        self._idle_confirm = None
+        self._idle_deadline = None
+
+        if armed:
+            for handler in self._deadline_handlers:
+                handler()
+
+    def _idle_expired(self) -> None:
+        """
+        Confirms the server is still empty when the idle timeout expires, counting players may need a ping
+        """
+        self._idle_handle = None
+        self._idle_confirm = asyncio.create_task(self._confirm_idle())
+
+    async def _confirm_idle(self) -> None:
+        """
+        Emits `IDLE` unless a fresh count finds that someone has joined since the last tick,
+        waits a whole idle timeout again if the scan doesn't finish in time
+        """
+        try:
+            clients = await self._count(await self._conn.snapshot_async())
+        except OffloadTimeout:
+            self._logger.warning("Socket scan timed out while confirming idle, waiting again")
+            self._arm_idle()
+            return
+
+        self._idle_confirm = None
+
+        if clients > 0:
+            self._empty_check(clients)
+            return
+
+        self._ebus.emit(ServerEvent.IDLE)
+
+    async def _count(self, snapshot: ConnSnapshot) -> int:
+        """
+        Returns the players reported by the server list ping if available,
+        otherwise the connections found by the scan, which also counts pings and half open logins
+        """
+        if self._ping is None:
+            return snapshot.clients
+
+        status = await self._ping.status()
+
+        return snapshot.clients if status is None else status.online
 
     def _start(self) -> None:
         """
@@ -68,35 +173,55 @@ class EventMntr(ServerMntr):
 
         self._task.cancel()
 
-    def _crash_check(self):
+    def _crash_check(self, snapshot: ConnSnapshot):
         """
         Checks if the serves has unexpectedly crashed
         Emits `CRASHED` if the server has stopped listening for clients
         """
-        if not self._conn.is_open():
+        if not snapshot.listening:
             self._ebus.emit(ServerEvent.CRASHED)
 
-    def _empty_check(self):
+    def _empty_check(self, clients: int):
         """
-        Checks if the server is empty and how long has it been like that
+        Checks if the server has just emptied or been occupied, the idle timeout is tracked by the events
         Emits `OCCUPIED` if it has been occupied after just being empty
-        Emits `EMPTY` if it has emptied after just being occupied
-        Emits `IDLE` if it has been empty longer than the provided timeout
+        Emits `EMPTY` if it has emptied after just being occupied, which arms the idle timeout
         """
         if self._idle_timeout is None:
             return
 
-        if not self._conn.is_empty():
-            if self._idle_since is not None:
-                self._ebus.emit(ServerEvent.OCCUPIED)
-                self._idle_since = None
+        if clients > 0:
+            if self._idle_deadline is not None:
+                self._ebus.emit(ServerEvent.OCCUPIED, clients)
             return
 
-        if self._idle_since is None:
-            self._idle_since = time.time()
+        if self._idle_deadline is None:
             self._ebus.emit(ServerEvent.EMPTY)
-        elif time.time() - self._idle_since > self._idle_timeout:
-            self._ebus.emit(ServerEvent.IDLE)
+
+    async def _tick(self) -> Optional[int]:
+        """
+        Performs every health check once and returns the players found,
+        returns None if the socket scan didn't finish in time and nothing could be checked
+        """
+        try:
+            snapshot = await self._conn.snapshot_async()
+        except OffloadTimeout:
+            self._logger.warning("Socket scan timed out, skipping this check")
+            return None
+
+        self._crash_check(snapshot)
+
+        clients = await self._count(snapshot) if snapshot.listening else 0
+
+        if self._stats is not None:
+            self._stats.add(time.time(), clients)
+
+        self._empty_check(clients)
+
+        for handler in self._sample_handlers:
+            handler(clients)
+
+        return clients
 
     async def _monitor_loop(self) -> None:
         """
@@ -104,11 +229,22 @@ class EventMntr(ServerMntr):
         """
         try:
             while True:
-                self._crash_check()
-                self._empty_check()
-                await asyncio.sleep(self._polling_intv)
+                with self._tick_time.time():
+                    clients = await self._tick()
+
+                changed = clients is not None and clients != self._last_clients
+
+                if clients is not None:
+                    self._last_clients = clients
+
+                delay = self._schedule.next(changed)
+                self._poll_intv.set(delay)
+
+                await asyncio.sleep(delay)
         except asyncio.CancelledError:
             pass
         finally:
             self._task = None
-            self._idle_since = None
+            self._disarm_idle()
+            self._last_clients = None
+            self._poll_intv.set(0)
@@ -1,7 +1,11 @@
+from typing import Optional
+
 from conf.types import GlobalConf
 
-from server.services.conn.protocol import ServerConn
+from server.services.conn.protocol import ServerConn, ServerPing
 from server.domain.event.ebus import ServerEventBus
+from server.domain.stats.protocol import ServerStats
+from server.services.metrics.registry import MetricsRegistry
 
 from .protocol import ServerMntr
 from .event_mntr import EventMntr
@@ -9,13 +13,24 @@ from .event_mntr import EventMntr
 
 class MntrFactory:
     @staticmethod
-    def make(conf: GlobalConf, conn: ServerConn, ebus: ServerEventBus) -> ServerMntr:
+    def make(
+        conf: GlobalConf,
+        conn: ServerConn,
+        ebus: ServerEventBus,
+        stats: ServerStats,
+        metrics: MetricsRegistry,
+        ping: Optional[ServerPing] = None,
+    ) -> ServerMntr:
         """
         Makes a new instance of `ServerMntr` through `ServerConf`
         """
         return EventMntr(
             idle_timeout=conf.idle_timeout,
-            polling_intv=conf.polling_intv,
+            polling_floor=min(conf.polling_floor, conf.polling_intv),
+            polling_ceil=conf.polling_intv,
             conn=conn,
             ebus=ebus,
+            stats=stats,
+            metrics=metrics,
+            ping=ping,
         )
@@ -0,0 +1,37 @@
+class PollSchedule:
+    """
+    Decides how long the monitor waits between checks
+    It polls at the floor interval after a change, like the server opening or players coming and going,
+    and backs off geometrically up to the ceiling while nothing changes
+    """
+
+    BACKOFF: float = 1.5
+
+    def __init__(self, floor: float, ceiling: float) -> None:
+        if floor <= 0:
+            raise ValueError("Polling floor must be greater than zero")
+
+        if ceiling < floor:
+            raise ValueError("Polling ceiling can't be lower than the floor")
+
+        self._floor: float = floor
+        self._ceiling: float = ceiling
+        self._intv: float = floor
+
+    def reset(self) -> None:
+        """
+        Polls at the floor interval again, called when something changed
+        """
+        self._intv = self._floor
+
+    def next(self, changed: bool) -> float:
+        """
+        Returns how long to wait until the next check, the floor interval if something changed since the last one
+        """
+        if changed:
+            self.reset()
+
+        intv = self._intv
+        self._intv = min(self._intv * self.BACKOFF, self._ceiling)
+
+        return intv
@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Protocol, Optional
+from typing import Callable, Protocol, Optional
 
 
 class ServerMntr(Protocol):
@@ -13,3 +13,24 @@ class ServerMntr(Protocol):
         Returns how much time is left until the server shuts down due to inactivity, or None if it is occupied
         """
         ...
+
+    @abstractmethod
+    def last_count(self) -> Optional[int]:
+        """
+        Returns the player count found by the latest check of the monitor, or None if it isn't running
+        """
+        ...
+
+    @abstractmethod
+    def on_sample(self, handler: Callable[[int], None]) -> None:
+        """
+        The handler is called with the player count after every check of the monitor
+        """
+        ...
+
+    @abstractmethod
+    def on_deadline(self, handler: Callable[[], None]) -> None:
+        """
+        The handler is called whenever the idle timeout is armed, re-armed or cancelled
+        """
+        ...
@@ -0,0 +1,13 @@
+from conf.types import GlobalConf
+
+from .protocol import ServerStats
+from .ring_stats import RingStats
+
+
+class StatsFactory:
+    @staticmethod
+    def make(conf: GlobalConf) -> ServerStats:
+        """
+        Makes a new instance of `ServerStats` through `ServerConf`
+        """
+        return RingStats(conf.stats_file)
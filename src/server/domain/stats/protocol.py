@@ -0,0 +1,25 @@
+from abc import abstractmethod
+from typing import Protocol, Optional
+
+from .types import StatsSummary
+
+
+class ServerStats(Protocol):
+    """
+    Keeps a history of how many clients were connected to the server
+    """
+
+    @abstractmethod
+    def add(self, timestamp: float, clients: int) -> None:
+        """
+        Records the client count sampled at the provided wall clock timestamp
+        """
+        ...
+
+    @abstractmethod
+    def summary(self, since: float, until: float) -> Optional[StatsSummary]:
+        """
+        Returns the peak, average and percentiles of the client count between both timestamps,
+        or None if there are no samples in the range
+        """
+        ...
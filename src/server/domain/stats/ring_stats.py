@@ -0,0 +1,398 @@
+import logging
+import mmap
+import operator
+import os
+import struct
+
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+from .protocol import ServerStats
+from .types import StatsSummary
+
+
+class _Ring:
+    """
+    Fixed size ring of `(bucket start, mean, peak, samples)` slots living inside a memory map
+    Each field is stored in its own column, so ranges are read as typed memoryviews without unpacking
+    The slot at index 0 is the oldest one
+    Rings with histogram bins also keep, for every slot, how many samples fell in each bin from the first slot
+    ever added up to that one, so the histogram of any range is the difference of two rows
+    Bins hold a single client count up to `HIST_EXACT`, above it every power of two is split in `HIST_SUB` bins,
+    so no bin is wider than 1 / `HIST_SUB` of the counts it holds and every count fits in a few dozen bins
+    The row of the last evicted slot is kept as the base of the oldest one, counts wrap around like the
+    unsigned columns that hold them and the difference is taken with the same wrap
+    """
+
+    STATE = struct.Struct("<II")
+
+    # column typecodes, ordered from the widest so every column stays aligned
+    COLUMNS = ("q", "f", "H", "H")
+    HIST = "I"
+
+    MAX_SAMPLES = 0xFFFF
+    HIST_MASK = 0xFFFFFFFF
+
+    HIST_EXACT = 8
+    HIST_SUB = 4
+    HIST_BINS = HIST_EXACT + (MAX_SAMPLES.bit_length() - HIST_EXACT.bit_length() + 1) * HIST_SUB
+
+    def __init__(
+        self,
+        buf: mmap.mmap,
+        state_offset: int,
+        data_offset: int,
+        resolution: int,
+        capacity: int,
+        bins: int = 0,
+    ) -> None:
+        self.buf: mmap.mmap = buf
+        self.state_offset: int = state_offset
+        self.resolution: int = resolution
+        self.capacity: int = capacity
+        self.bins: int = bins
+
+        columns = []
+        offset = data_offset
+
+        for code in self.COLUMNS:
+            size = capacity * struct.calcsize(code)
+            columns.append(memoryview(buf)[offset : offset + size].cast(code))
+            offset += size
+
+        self.starts, self.means, self.peaks, self.counts = columns
+
+        # the base row goes right before the rows of the slots
+        size = (capacity + 1) * bins * struct.calcsize(self.HIST)
+        self.hists: memoryview = memoryview(buf)[offset : offset + size].cast(self.HIST)
+
+        self.head, self.count = self.STATE.unpack_from(buf, state_offset)
+
+        if self.head >= capacity or self.count > capacity:
+            self.head, self.count = 0, 0
+            self._save_state()
+
+    @staticmethod
+    def size(capacity: int, bins: int) -> int:
+        """
+        Returns the bytes taken by the columns of a ring
+        """
+        slot = sum(struct.calcsize(code) for code in _Ring.COLUMNS)
+        return capacity * slot + (capacity + 1) * bins * struct.calcsize(_Ring.HIST)
+
+    def release(self) -> None:
+        for column in (self.starts, self.means, self.peaks, self.counts, self.hists):
+            column.release()
+
+    def _save_state(self) -> None:
+        self.STATE.pack_into(self.buf, self.state_offset, self.head, self.count)
+
+    def _pos(self, index: int) -> int:
+        return (self.head + index) % self.capacity
+
+    def start_at(self, index: int) -> int:
+        return self.starts[self._pos(index)]
+
+    def runs(self, start: int, end: int) -> list[slice]:
+        """
+        Returns the physical slices holding the index range, two if the range wraps around
+        """
+        if start >= end:
+            return []
+
+        first = self._pos(start)
+        last = first + (end - start)
+
+        if last <= self.capacity:
+            return [slice(first, last)]
+
+        return [slice(first, self.capacity), slice(0, last - self.capacity)]
+
+    def _row(self, index: int) -> int:
+        """
+        Returns the offset of the cumulative histogram of the slot at the index, -1 being the base row
+        """
+        return 0 if index < 0 else (self._pos(index) + 1) * self.bins
+
+    @staticmethod
+    def hist_bin(clients: int) -> int:
+        """
+        Returns the histogram bin of the client count, counts past the last bin fall in it
+        """
+        clients = min(max(clients, 0), _Ring.MAX_SAMPLES)
+
+        if clients < _Ring.HIST_EXACT:
+            return clients
+
+        exp = clients.bit_length() - 1
+        sub = (clients >> (exp - _Ring.HIST_SUB.bit_length() + 1)) & (_Ring.HIST_SUB - 1)
+
+        return _Ring.HIST_EXACT + (exp - _Ring.HIST_EXACT.bit_length() + 1) * _Ring.HIST_SUB + sub
+
+    @staticmethod
+    def hist_range(index: int) -> tuple[int, int]:
+        """
+        Returns the lowest client count of the bin and the lowest one of the next bin
+        """
+        if index < _Ring.HIST_EXACT:
+            return index, index + 1
+
+        exp, sub = divmod(index - _Ring.HIST_EXACT, _Ring.HIST_SUB)
+        low = _Ring.HIST_EXACT << exp
+        width = low // _Ring.HIST_SUB
+
+        return low + sub * width, low + (sub + 1) * width
+
+    def histogram(self, start: int, end: int) -> list[int]:
+        """
+        Returns how many samples of the index range fell in each bin
+        """
+        hi = self._row(end - 1)
+        lo = self._row(start - 1)
+
+        return [
+            (high - low) & self.HIST_MASK
+            for high, low in zip(self.hists[hi : hi + self.bins], self.hists[lo : lo + self.bins])
+        ]
+
+    def add(self, timestamp: int, clients: int) -> None:
+        bucket = timestamp - timestamp % self.resolution if self.resolution else timestamp
+
+        if self.resolution and self.count > 0:
+            pos = self._pos(self.count - 1)
+
+            if self.starts[pos] == bucket:
+                samples = min(self.counts[pos] + 1, self.MAX_SAMPLES)
+                self.means[pos] += (clients - self.means[pos]) / samples
+                self.peaks[pos] = max(self.peaks[pos], min(clients, self.MAX_SAMPLES))
+                self.counts[pos] = samples
+                self._count_sample(self._row(self.count - 1), clients)
+                return
+
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            if self.bins:
+                oldest = self._row(0)
+                self.hists[: self.bins] = self.hists[oldest : oldest + self.bins]
+
+            self.head = (self.head + 1) % self.capacity
+
+        pos = self._pos(self.count - 1)
+
+        self.starts[pos] = bucket
+        self.means[pos] = float(clients)
+        self.peaks[pos] = min(clients, self.MAX_SAMPLES)
+        self.counts[pos] = 1
+
+        if self.bins:
+            row, prev = self._row(self.count - 1), self._row(self.count - 2)
+            self.hists[row : row + self.bins] = self.hists[prev : prev + self.bins]
+            self._count_sample(row, clients)
+
+        self._save_state()
+
+    def _count_sample(self, row: int, clients: int) -> None:
+        if self.bins:
+            i = row + self.hist_bin(clients)
+            self.hists[i] = (self.hists[i] + 1) & self.HIST_MASK
+
+    def span(self, since: float, until: float) -> tuple[int, int]:
+        """
+        Returns the range of slot indexes whose bucket overlaps the time range
+        """
+        start = bisect_left(range(self.count), since - self.resolution, key=self.start_at)
+
+        if self.resolution:
+            while start < self.count and self.start_at(start) + self.resolution <= since:
+                start += 1
+
+        end = bisect_right(range(self.count), until, key=self.start_at)
+
+        return start, end
+
+
+class RingStats(ServerStats):
+    """
+    Round robin store of client count samples, kept at several resolutions in fixed size rings,
+    raw samples, per minute, per hour and per day aggregates, so memory stays constant however long it runs
+    Rings are kept in a memory mapped file if a path is provided, so the history survives restarts
+    Summaries are computed from the finest ring that covers the range with a bounded number of slots,
+    percentiles come from the histogram of the samples in the range, so they aren't diluted by the aggregation
+    """
+
+    MAGIC = b"MCDSTAT3"
+
+    # resolution in seconds, 0 keeps every sample, and capacity of each ring
+    # each tier covers the ranges the finer one can't within the point budget
+    TIERS = [
+        (0, 4096),
+        (60, 2 * 24 * 60),
+        (60 * 60, 60 * 24),
+        (24 * 60 * 60, 5 * 365),
+    ]
+
+    MAX_POINTS = 2048
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._logger: logging.Logger = logging.getLogger(
+            f"{__name__}.{self.__class__.__name__}"
+        )
+
+        header = len(self.MAGIC) + _Ring.STATE.size * len(self.TIERS)
+        size = header + sum(_Ring.size(capacity, self._bins(resolution)) for resolution, capacity in self.TIERS)
+
+        self._buf: mmap.mmap = self._map(path, size)
+
+        if self._buf[: len(self.MAGIC)] != self.MAGIC:
+            self._buf[:] = bytes(size)
+            self._buf[: len(self.MAGIC)] = self.MAGIC
+
+        self._rings: list[_Ring] = []
+        data_offset = header
+
+        for i, (resolution, capacity) in enumerate(self.TIERS):
+            state_offset = len(self.MAGIC) + i * _Ring.STATE.size
+            bins = self._bins(resolution)
+            self._rings.append(_Ring(self._buf, state_offset, data_offset, resolution, capacity, bins))
+            data_offset += _Ring.size(capacity, bins)
+
+        # slots have to stay sorted by time, so samples never go back before the newest one
+        self._last_timestamp: int = max(
+            (ring.start_at(ring.count - 1) for ring in self._rings if ring.count > 0), default=0
+        )
+
+    @staticmethod
+    def _bins(resolution: int) -> int:
+        """
+        Returns the histogram bins of a ring, raw slots hold a single sample so they don't need any
+        """
+        return _Ring.HIST_BINS if resolution else 0
+
+    def _map(self, path: Optional[str], size: int) -> mmap.mmap:
+        """
+        Maps the file, creating or resetting it if it doesn't have the expected size,
+        or anonymous memory if no path is provided
+        """
+        if path is None:
+            return mmap.mmap(-1, size)
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            if os.fstat(fd).st_size != size:
+                if os.fstat(fd).st_size != 0:
+                    self._logger.warning(f"Stats file {path} has an unexpected layout, it will be reset")
+
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+
+            return mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def add(self, timestamp: float, clients: int) -> None:
+        self._last_timestamp = max(int(timestamp), self._last_timestamp)
+
+        for ring in self._rings:
+            ring.add(self._last_timestamp, clients)
+
+    def _pick(self, since: float, until: float) -> Optional[tuple[_Ring, int, int]]:
+        """
+        Picks the finest ring that reaches back to the start of the range, or holds every sample since the first one,
+        without exceeding the point budget, the coarsest ring covers any range within it
+        """
+        fallback = None
+
+        for ring in self._rings:
+            if ring.count == 0:
+                continue
+
+            start, end = ring.span(since, until)
+
+            if start >= end:
+                continue
+
+            fallback = (ring, start, end)
+
+            if (ring.start_at(0) <= since or ring.count < ring.capacity) and end - start <= self.MAX_POINTS:
+                return fallback
+
+        return fallback
+
+    @staticmethod
+    def _percentile(values: list[float], pct: float) -> float:
+        return values[min(int(pct * len(values)), len(values) - 1)]
+
+    @staticmethod
+    def _hist_percentile(hist: list[int], pct: float, peak: int) -> float:
+        """
+        Returns the client count below which the percentage of the samples falls,
+        spreading the samples of its bin evenly from the bottom of the bin up to the top of it, or the peak if lower
+        """
+        samples = sum(hist)
+        index = min(int(pct * samples), samples - 1)
+        seen = 0
+
+        for i, count in enumerate(hist):
+            if seen + count > index:
+                low, high = _Ring.hist_range(i)
+                top = max(min(high - 1, peak), low)
+
+                return low + (top - low) * (index - seen) / max(count - 1, 1)
+
+            seen += count
+
+        return float(peak)
+
+    def summary(self, since: float, until: float) -> Optional[StatsSummary]:
+        picked = self._pick(since, until)
+
+        if picked is None:
+            return None
+
+        ring, start, end = picked
+
+        means: list[float] = []
+        peak = 0
+        samples = 0
+        total = 0.0
+
+        for run in ring.runs(start, end):
+            run_means = ring.means[run]
+            run_counts = ring.counts[run]
+
+            if not ring.bins:
+                means.extend(run_means)
+
+            peak = max(peak, max(ring.peaks[run]))
+            samples += sum(run_counts)
+            total += sum(map(operator.mul, run_means, run_counts))
+
+        if ring.bins:
+            hist = ring.histogram(start, end)
+            p50 = self._hist_percentile(hist, 0.50, peak)
+            p95 = self._hist_percentile(hist, 0.95, peak)
+        else:
+            # every raw slot is a sample
+            means.sort()
+            p50 = self._percentile(means, 0.50)
+            p95 = self._percentile(means, 0.95)
+
+        return StatsSummary(
+            since=since,
+            until=until,
+            resolution=ring.resolution,
+            samples=samples,
+            peak=peak,
+            average=total / samples,
+            p50=p50,
+            p95=p95,
+        )
+
+    def close(self) -> None:
+        for ring in self._rings:
+            ring.release()
+
+        self._buf.flush()
+        self._buf.close()
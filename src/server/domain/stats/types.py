@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class StatsSummary:
+    """
+    Occupancy of the server over a time range
+    Figures come from the finest resolution that covers the range, the range may be widened to its buckets
+    Percentiles are taken over the samples, the counts over the last histogram bin are reported as the peak
+    """
+    since: float
+    until: float
+    resolution: float
+    samples: int
+    peak: int
+    average: float
+    p50: float
+    p95: float
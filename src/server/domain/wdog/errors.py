@@ -0,0 +1,2 @@
+class TickQueryErr(Exception):
+    pass
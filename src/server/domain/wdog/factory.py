@@ -0,0 +1,24 @@
+from conf.types import GlobalConf
+
+from server.domain.event.async_ebus import AsyncEventBus
+from server.services.rcon.protocol import AsyncServerRcon
+from server.services.metrics.registry import MetricsRegistry
+
+from .protocol import ServerWdog
+from .rcon_wdog import RconWdog
+
+
+class WdogFactory:
+    @staticmethod
+    def make(conf: GlobalConf, rcon: AsyncServerRcon, ebus: AsyncEventBus, metrics: MetricsRegistry) -> ServerWdog:
+        """
+        Makes a new instance of `ServerWdog` through `ServerConf`
+        """
+        return RconWdog(
+            sample_intv=conf.tick_sample_intv,
+            lag_mspt=conf.tick_lag_mspt,
+            frozen_after=conf.tick_frozen_after,
+            rcon=rcon,
+            ebus=ebus,
+            metrics=metrics,
+        )
@@ -0,0 +1,32 @@
+from abc import abstractmethod
+from typing import Protocol, Optional
+
+from .types import TickHealth
+
+
+class ServerWdog(Protocol):
+    """
+    Watches the tick timing of the server while open to notice when it lags or freezes
+    """
+
+    @abstractmethod
+    def health(self) -> TickHealth:
+        """
+        Returns the health of the server judged by its latest tick timings
+        """
+        ...
+
+    @abstractmethod
+    def mspt(self) -> Optional[float]:
+        """
+        Returns the average milliseconds per tick over the sampling window, or None if nothing has been sampled
+        """
+        ...
+
+    @abstractmethod
+    def tps(self) -> Optional[float]:
+        """
+        Returns the ticks per second matching the average tick time, capped at the target rate,
+        or None if nothing has been sampled
+        """
+        ...
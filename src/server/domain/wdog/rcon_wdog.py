@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import re
+
+from collections import deque
+from typing import Optional
+
+from server.domain.event.async_ebus import AsyncEventBus
+from server.domain.event.types import ServerEvent
+from server.services.rcon.protocol import AsyncServerRcon
+from server.services.rcon.errors import CommErr, RconErr
+from server.services.metrics.registry import MetricsRegistry
+
+from .errors import TickQueryErr
+from .protocol import ServerWdog
+from .types import TickHealth
+
+
+class RconWdog(ServerWdog):
+    """
+    Samples the tick timing through rcon on a fixed interval and keeps a moving window of milliseconds per tick
+    Emits `LAGGING` when the window average goes over the threshold and `RECOVERED` once it is comfortably below it,
+    and `FROZEN` if the server stops answering after having answered, rcon runs on the main thread so a deadlocked
+    server can't answer it
+    """
+
+    # vanilla 1.20.3+, paper and its forks answer `mspt` instead
+    COMMS = ["tick query", "mspt"]
+
+    VANILLA_MSPT = re.compile(r"Average time per tick: ([\d.]+) ?ms")
+    VANILLA_RATE = re.compile(r"Target tick rate: ([\d.]+)")
+    PAPER_MSPT = re.compile(r"([\d.]+)/[\d.]+/[\d.]+")
+    FORMATTING = re.compile(r"§.")
+
+    DEFAULT_RATE: float = 20.0
+    RECOVER_RATIO: float = 0.8
+
+    def __init__(
+        self,
+        sample_intv: Optional[float],
+        lag_mspt: float,
+        frozen_after: int,
+        rcon: AsyncServerRcon,
+        ebus: AsyncEventBus,
+        window: int = 6,
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        if sample_intv is not None and sample_intv <= 0:
+            raise ValueError("Tick sampling interval must be greater than zero")
+
+        if lag_mspt <= 0:
+            raise ValueError("Lag threshold must be greater than zero")
+
+        if frozen_after <= 0:
+            raise ValueError("Failed samples before freezing must be greater than zero")
+
+        if window <= 0:
+            raise ValueError("Sampling window must be greater than zero")
+
+        self._task: Optional[asyncio.Task] = None
+        self._logger: logging.Logger = logging.getLogger(
+            f"{__name__}.{self.__class__.__name__}"
+        )
+
+        self._sample_intv: Optional[float] = sample_intv
+        self._lag_mspt: float = lag_mspt
+        self._frozen_after: int = frozen_after
+        self._rcon: AsyncServerRcon = rcon
+        self._ebus: AsyncEventBus = ebus
+
+        self._comm: Optional[str] = RconWdog.COMMS[0]
+        self._window: deque[float] = deque(maxlen=window)
+        self._rate: float = RconWdog.DEFAULT_RATE
+        self._health: TickHealth = TickHealth.UNKNOWN
+        self._failed: int = 0
+
+        metrics = metrics or MetricsRegistry()
+        metrics.gauge("tick_mspt", "Average milliseconds per tick over the sampling window", supplier=lambda: self.mspt() or 0)
+        metrics.gauge("tick_tps", "Ticks per second matching the average tick time", supplier=lambda: self.tps() or 0)
+
+        if sample_intv is not None:
+            self._ebus.subscribe(ServerEvent.OPENED, self._start)
+            self._ebus.subscribe(ServerEvent.CLOSING, self._stop)
+
+    def health(self) -> TickHealth:
+        return self._health
+
+    def mspt(self) -> Optional[float]:
+        if not self._window:
+            return None
+
+        return sum(self._window) / len(self._window)
+
+    def tps(self) -> Optional[float]:
+        mspt = self.mspt()
+
+        if mspt is None:
+            return None
+
+        return self._rate if mspt <= 0 else min(self._rate, 1000 / mspt)
+
+    def _start(self) -> None:
+        """
+        Tries to start the sampling task
+        """
+        if self._task is not None and not self._task.done():
+            self._logger.warning("Tried to start watchdog while already running")
+            return
+
+        self._task = asyncio.create_task(self._sample_loop())
+
+    def _stop(self) -> None:
+        """
+        Tries to stop the sampling task
+        """
+        if self._task is None or self._task.done():
+            self._task = None
+            return
+
+        self._task.cancel()
+
+    def _parse(self, resp: str) -> float:
+        """
+        Returns the milliseconds per tick reported by either command, updating the target rate if it is reported
+        Raises `TickQueryErr` if the response doesn't contain them
+        """
+        resp = self.FORMATTING.sub("", resp)
+
+        if (match := self.VANILLA_MSPT.search(resp)) is not None:
+            if (rate := self.VANILLA_RATE.search(resp)) is not None:
+                self._rate = float(rate.group(1))
+            return float(match.group(1))
+
+        if (match := self.PAPER_MSPT.search(resp)) is not None:
+            return float(match.group(1))
+
+        raise TickQueryErr(f"Unexpected response to `{self._comm}`: {resp[:80]!r}")
+
+    async def _sample(self) -> Optional[float]:
+        """
+        Asks the server for its tick timing, returns None if the server didn't answer
+        Falls back to the next known command if the server doesn't understand the current one
+        Raises `TickQueryErr` if no known command works
+        """
+        while self._comm is not None:
+            try:
+                return self._parse(await self._rcon.execute(self._comm))
+            except RconErr as e:
+                self._logger.debug(f"Tick sample failed: {e}")
+                return None
+            except (CommErr, TickQueryErr) as e:
+                index = RconWdog.COMMS.index(self._comm) + 1
+                self._comm = RconWdog.COMMS[index] if index < len(RconWdog.COMMS) else None
+                self._logger.info(f"Tick timing can't be sampled this way, trying the next command: {e}")
+
+        raise TickQueryErr("The server doesn't answer any known tick timing command")
+
+    def _judge(self) -> None:
+        """
+        Compares the window average with the threshold
+        Emits `LAGGING` or `RECOVERED` when the health changes, with the average milliseconds per tick
+        """
+        mspt = self.mspt()
+        assert mspt is not None
+
+        if self._health != TickHealth.LAGGING and mspt > self._lag_mspt:
+            self._health = TickHealth.LAGGING
+            self._ebus.emit(ServerEvent.LAGGING, round(mspt))
+        elif self._health != TickHealth.HEALTHY and mspt < self._lag_mspt * self.RECOVER_RATIO:
+            if self._health in (TickHealth.LAGGING, TickHealth.FROZEN):
+                self._ebus.emit(ServerEvent.RECOVERED, round(mspt))
+
+            self._health = TickHealth.HEALTHY
+
+    def _missed(self) -> None:
+        """
+        Counts a sample the server didn't answer
+        Emits `FROZEN` once enough have been missed in a row, if the server had answered before
+        """
+        self._failed += 1
+
+        if self._health in (TickHealth.UNKNOWN, TickHealth.FROZEN):
+            return
+
+        if self._failed >= self._frozen_after:
+            self._health = TickHealth.FROZEN
+            self._ebus.emit(ServerEvent.FROZEN, self._failed)
+
+    async def _sample_loop(self) -> None:
+        """
+        Continous task that samples the tick timing while the server is open
+        """
+        assert self._sample_intv is not None
+
+        try:
+            while True:
+                await asyncio.sleep(self._sample_intv)
+
+                mspt = await self._sample()
+
+                if mspt is None:
+                    self._missed()
+                    continue
+
+                self._failed = 0
+                self._window.append(mspt)
+                self._judge()
+        except TickQueryErr as e:
+            self._logger.warning(f"Tick watchdog disabled: {e}")
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._task = None
+            self._window.clear()
+            self._failed = 0
+            self._health = TickHealth.UNKNOWN
+            self._comm = RconWdog.COMMS[0]
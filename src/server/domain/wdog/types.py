@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class TickHealth(Enum):
+    UNKNOWN = "UNKNOWN"         # no tick timing has been sampled yet
+    HEALTHY = "HEALTHY"         # ticks keep up with the target rate
+    LAGGING = "LAGGING"         # the average tick takes longer than the threshold
+    FROZEN  = "FROZEN"          # the server stopped answering while open
+
+    def __str__(self) -> str:
+        return self.value.lower()
@@ -1,33 +1,199 @@
+import sys
+
+from typing import Optional
+
 from conf.types import GlobalConf
 
-from server.domain.event.ebus import ServerEventBus
+from server.domain.event.async_ebus import AsyncEventBus
+from server.domain.event.types import ServerEvent, EventRecord
+from server.domain.cntl.protocol import ServerCntl
+from server.domain.cntl.types import ServerStatus
+from server.domain.mntr.protocol import ServerMntr
 from server.domain.mntr.factory import MntrFactory
 from server.domain.cntl.factory import CntlFactory
+from server.domain.stats.factory import StatsFactory
+from server.domain.wdog.factory import WdogFactory
 
+from server.services.conn.protocol import ServerConn, ServerPing
+from server.services.conn.cached_conn import CachedConn
 from server.services.conn.psutil_conn import PsutilConn
-from server.services.rcon.mcipc_rcon import McipcRcon
+from server.services.conn.netlink_conn import NetlinkConn
+from server.services.conn.slp_ping import SlpPing
+from server.services.conn.types import ReadinessProbe, CountSource
+from server.services.rcon.async_rcon import AsyncRcon
+from server.services.metrics.registry import MetricsRegistry
+from server.services.offload.offload import Offload, OffloadLane
 
 from .types import ServerData
 
 
 class ServerDataFactory:
+    CONN_BACKENDS = {
+        "psutil": PsutilConn,
+        "netlink": NetlinkConn,
+    }
+
+    # must differ between the servers of one daemon
+    UNIQUE_FIELDS = ("minecraft_port", "rcon_port", "stats_file")
+
+    @staticmethod
+    def _make_conn(
+        conf: GlobalConf,
+        metrics: MetricsRegistry,
+        lane: OffloadLane,
+        shared: Optional[CachedConn] = None,
+    ) -> CachedConn:
+        """
+        Makes a new instance of `ServerConn` with the backend provided by the user,
+        defaults to netlink on linux and psutil elsewhere
+        If another connection is provided the new one joins its scan, and its backend and lane
+        """
+        backend = conf.conn_backend
+
+        if backend is None:
+            backend = "netlink" if sys.platform.startswith("linux") else "psutil"
+
+        conn_cls = ServerDataFactory.CONN_BACKENDS.get(backend.lower())
+
+        if conn_cls is None:
+            raise ValueError(f"Invalid connection backend: {backend}")
+
+        if shared is not None:
+            conn_cls = type(shared)
+
+        try:
+            readiness = ReadinessProbe(conf.readiness_probe.upper())
+        except ValueError:
+            raise ValueError(f"Invalid readiness probe: {conf.readiness_probe}")
+
+        return conn_cls(conf.minecraft_port, conf.conn_snapshot_ttl, readiness, metrics, shared, lane)
+
+    @staticmethod
+    def _count_source(conf: GlobalConf) -> CountSource:
+        """
+        Returns how the user wants players to be counted
+        """
+        try:
+            return CountSource(conf.player_count.upper())
+        except ValueError:
+            raise ValueError(f"Invalid player count source: {conf.player_count}")
+
+    @staticmethod
+    def _instrument(
+        metrics: MetricsRegistry,
+        ebus: AsyncEventBus,
+        mntr: ServerMntr,
+        ping: Optional[ServerPing],
+        cntl: ServerCntl,
+    ) -> None:
+        """
+        Registers the metrics that are derived from the events and the state of the server
+        """
+        counts = {
+            event: metrics.counter("events", "Events emitted by the server", {"event": event.name})
+            for event in ServerEvent
+        }
+        startup = metrics.histogram(
+            "startup_seconds", "Time from OPENING to OPENED",
+            buckets=(5.0, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0),
+        )
+
+        def on_record(record: EventRecord) -> None:
+            counts[record.event].inc()
+
+            if record.event == ServerEvent.OPENED and record.payload is not None:
+                startup.observe(record.payload / 1000)
+
+        ebus.tap(on_record)
+
+        for status in ServerStatus:
+            metrics.gauge(
+                "status", "Whether the server is in the given status", {"status": status.name},
+                supplier=lambda status=status: float(cntl.status() == status),
+            )
+
+        def clients() -> float:
+            if cntl.status() != ServerStatus.OPEN:
+                return 0
+
+            # the latest ping and tick are enough, scraping shouldn't scan sockets or send pings of its own
+            status = ping.cached() if ping is not None else None
+            return float((mntr.last_count() or 0) if status is None else status.online)
+
+        metrics.gauge("clients", "Players connected to the server", supplier=clients)
+
     @staticmethod
-    def make(conf: GlobalConf, ebus: ServerEventBus) -> ServerData:
+    def make(conf: GlobalConf, ebus: AsyncEventBus, metrics: MetricsRegistry, offload: Offload) -> ServerData:
         """
         Makes a new instance of `ServerData` through `ServerConf`
         """
-        conn = PsutilConn(conf.minecraft_port)
-        rcon = McipcRcon(
+        lane = offload.lane("conn", timeout=conf.offload_timeout)
+        return ServerDataFactory._make(conf, ebus, metrics, ServerDataFactory._make_conn(conf, metrics, lane))
+
+    @staticmethod
+    def make_all(
+        confs: dict[str, GlobalConf],
+        ebuses: dict[str, AsyncEventBus],
+        metrics: MetricsRegistry,
+        offload: Offload,
+    ) -> dict[str, ServerData]:
+        """
+        Makes a `ServerData` for every named instance, their connections share a single socket scan
+        and their metrics are told apart by an `instance` label
+        Raises `ValueError` if two instances would use the same port or file
+        """
+        for field in ServerDataFactory.UNIQUE_FIELDS:
+            seen: dict[object, str] = {}
+
+            for name, conf in confs.items():
+                value = getattr(conf, field)
+
+                if value is not None and value in seen:
+                    raise ValueError(f"Instances {seen[value]} and {name} have the same {field}: {value}")
+
+                seen[value] = name
+
+        servers: dict[str, ServerData] = {}
+        conn: Optional[CachedConn] = None
+
+        for name, conf in confs.items():
+            # the scan is shared, so its timing isn't labelled with the instance and the first lane is kept
+            lane = offload.lane("conn", timeout=conf.offload_timeout)
+            conn = ServerDataFactory._make_conn(conf, metrics, lane, conn)
+            servers[name] = ServerDataFactory._make(conf, ebuses[name], metrics.labelled({"instance": name}), conn)
+
+        return servers
+
+    @staticmethod
+    def _make(conf: GlobalConf, ebus: AsyncEventBus, metrics: MetricsRegistry, conn: ServerConn) -> ServerData:
+        """
+        Makes the rest of the `ServerData` around the provided connection
+        """
+        rcon = AsyncRcon(
             port=conf.rcon_port,
             timeout=conf.rcon_timeout,
             pwd=conf.rcon_pwd,
             max_comm_len=conf.rcon_max_comm_len,
             banned_comms=conf.rcon_banned_comm,
+            metrics=metrics,
         )
 
+        ping = SlpPing(conf.minecraft_port, conf.ping_ttl)
+        counting = ping if ServerDataFactory._count_source(conf) == CountSource.PING else None
+
+        stats = StatsFactory.make(conf)
+        cntl = CntlFactory.make(conf, conn, ebus)
+
+        mntr = MntrFactory.make(conf, conn, ebus, stats, metrics, counting)
+
+        ServerDataFactory._instrument(metrics, ebus, mntr, counting, cntl)
+
         return ServerData(
             conn=conn,
+            ping=ping,
             rcon=rcon,
-            mntr=MntrFactory.make(conf, conn, ebus),
-            cntl=CntlFactory.make(conf, conn, ebus),
+            mntr=mntr,
+            cntl=cntl,
+            stats=stats,
+            wdog=WdogFactory.make(conf, rcon, ebus, metrics),
         )
@@ -0,0 +1,49 @@
+import asyncio
+import random
+
+from typing import Awaitable, Callable, Optional
+
+from .errors import TimeoutExpired
+
+
+IMM_RETRIES: int = 8
+MIN_BACKOFF: float = 0.1
+MAX_BACKOFF: float = 1.6
+JITTER_RATIO: float = 0.25
+
+
+async def backoff_until(supplier: Callable[[], Awaitable[bool]], timeout: Optional[float] = None) -> None:
+    """
+    Sleeps using exponential backoff until the boolean supplier returns true
+    Raises `TimeoutExpired` if a timeout is provided and it expires
+    """
+    backoff = MIN_BACKOFF
+    jitter = backoff * JITTER_RATIO
+
+    for _ in range(IMM_RETRIES):
+        if await supplier():
+            return
+
+        time = backoff + random.uniform(-jitter, jitter)
+
+        await asyncio.sleep(time)
+
+        if timeout:
+            timeout -= time
+
+            if timeout <= 0:
+                raise TimeoutExpired
+
+    while not await supplier():
+        backoff = min(backoff * 2, MAX_BACKOFF)
+        jitter = backoff * JITTER_RATIO
+
+        time = backoff + random.uniform(-jitter, jitter)
+
+        await asyncio.sleep(time)
+
+        if timeout:
+            timeout -= time
+
+            if timeout <= 0:
+                raise TimeoutExpired
@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+from abc import abstractmethod
+from typing import Optional
+
+from .protocol import ServerConn
+from .types import ConnSnapshot, ReadinessProbe
+from .errors import TimeoutExpired, SlpErr
+from .backoff import backoff_until
+from .slp import ServerListPing
+from .shared_scan import SharedScan
+
+from server.services.metrics.registry import MetricsRegistry
+from server.services.offload.offload import OffloadLane
+from server.services.offload.errors import OffloadTimeout
+
+
+class CachedConn(ServerConn):
+    """
+    Base for connection backends that answer every query from a `ConnSnapshot`,
+    reusing the last snapshot while it is younger than the provided ttl
+    Connections made with another one as `shared` join its scan, one scan then covers the ports of all of them
+    Scans made from coroutines run in the offload lane if one is provided, so the loop isn't blocked
+    """
+
+    HOST = "127.0.0.1"
+    PROBE_INTV: float = 0.25
+    PROBE_TIMEOUT: float = 2.0
+
+    def __init__(
+        self,
+        port: int,
+        snapshot_ttl: float,
+        readiness: ReadinessProbe = ReadinessProbe.SCAN,
+        metrics: Optional[MetricsRegistry] = None,
+        shared: Optional["CachedConn"] = None,
+        lane: Optional[OffloadLane] = None,
+    ) -> None:
+        if port < 0 or port > 65535:
+            raise ValueError("Minecraft server port outside valid range")
+
+        self._port: int = port
+        self._readiness: ReadinessProbe = readiness
+
+        if shared is not None:
+            self._shared: SharedScan = shared._shared
+        else:
+            self._shared = SharedScan(
+                self._take_snapshots,
+                snapshot_ttl,
+                (metrics or MetricsRegistry()).histogram(
+                    "conn_scan_seconds", "Time taken by a socket scan of the server ports",
+                    {"backend": self.__class__.__name__},
+                ),
+                lane,
+            )
+
+        self._shared.watch(port)
+
+    @abstractmethod
+    def _take_snapshots(self, ports: frozenset[int]) -> dict[int, ConnSnapshot]:
+        """
+        Scans the sockets on the provided ports and builds a fresh snapshot of each one
+        """
+        ...
+
+    def snapshot(self) -> ConnSnapshot:
+        return self._shared.snapshot(self._port)
+
+    async def snapshot_async(self) -> ConnSnapshot:
+        return await self._shared.snapshot_async(self._port)
+
+    async def _listening_now(self) -> bool:
+        try:
+            return (await self._shared.fresh_async(self._port)).listening
+        except OffloadTimeout:
+            # a slow scan says nothing about the server, the startup timeout decides
+            return False
+
+    def is_open(self) -> bool:
+        return self.snapshot().listening
+
+    def is_empty(self) -> bool:
+        return self.snapshot().clients == 0
+
+    def client_count(self) -> int:
+        return self.snapshot().clients
+
+    async def _probe(self, timeout: float) -> bool:
+        """
+        Returns whether the server accepts connections, or answers a ping if the readiness probe is `PING`
+        """
+        if self._readiness == ReadinessProbe.CONNECT:
+            return await ServerListPing.connect(self.HOST, self._port, timeout)
+
+        try:
+            await ServerListPing.status(self.HOST, self._port, timeout)
+            return True
+        except SlpErr:
+            return False
+
+    async def _probe_until_ready(self, timeout: Optional[float]) -> None:
+        """
+        Probes the port at a fixed short interval, each attempt bounded by what is left of the timeout
+        Raises `TimeoutExpired` if a timeout is provided and it expires
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            remaining = self.PROBE_TIMEOUT if deadline is None else deadline - time.monotonic()
+
+            if remaining <= 0:
+                raise TimeoutExpired
+
+            if await self._probe(min(self.PROBE_TIMEOUT, remaining)):
+                return
+
+            remaining = self.PROBE_INTV if deadline is None else deadline - time.monotonic()
+
+            if remaining <= 0:
+                raise TimeoutExpired
+
+            await asyncio.sleep(min(self.PROBE_INTV, remaining))
+
+    async def wait_open(self, timeout: Optional[float] = None) -> None:
+        if self._readiness != ReadinessProbe.SCAN:
+            await self._probe_until_ready(timeout)
+
+            # the cached scan may predate the opening, other servers keep it fresh only for themselves
+            await self._listening_now()
+            return
+
+        # always rescan, a cached snapshot would only delay noticing the server opened
+        await backoff_until(self._listening_now, timeout)
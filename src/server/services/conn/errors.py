@@ -1,2 +1,6 @@
 class TimeoutExpired(Exception):
     pass
+
+
+class SlpErr(Exception):
+    pass
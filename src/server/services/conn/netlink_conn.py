@@ -0,0 +1,249 @@
+import ipaddress
+import logging
+import os
+import socket
+import struct
+import time
+
+from typing import Iterator, Optional
+
+from server.services.metrics.registry import MetricsRegistry
+from server.services.offload.offload import OffloadLane
+
+from .cached_conn import CachedConn
+from .types import ConnSnapshot, ReadinessProbe
+
+
+class NetlinkConn(CachedConn):
+    """
+    Asks the kernel only for the sockets bound to the watched ports through an INET_DIAG netlink query,
+    falling back to a port filtered parse of `/proc/net/tcp{,6}` if netlink is unavailable
+    """
+
+    NETLINK_SOCK_DIAG = 4
+    SOCK_DIAG_BY_FAMILY = 20
+
+    NLM_F_REQUEST = 0x1
+    NLM_F_DUMP = 0x300
+    NLMSG_ERROR = 0x2
+    NLMSG_DONE = 0x3
+
+    INET_DIAG_REQ_BYTECODE = 1
+    INET_DIAG_BC_JMP = 1
+    INET_DIAG_BC_S_GE = 2
+    INET_DIAG_BC_S_LE = 3
+
+    TCP_ESTABLISHED = 1
+    TCP_LISTEN = 10
+
+    NLMSG_HDR = struct.Struct("=IHHII")
+    NLMSG_ERR = struct.Struct("=i")
+    RTATTR_HDR = struct.Struct("=HH")
+    BC_OP = struct.Struct("=BBH")
+    # family, protocol, ext, pad, states, sport, dport, src, dst, if, cookie
+    DIAG_REQ = struct.Struct("=BBBBIHH16s16sI8s")
+    # family, state, timer, retrans, sport, dport, src, dst
+    DIAG_MSG = struct.Struct("=BBBB2s2s16s16s")
+
+    RECV_BUFSIZE = 1 << 16
+
+    PROC_PATHS = {
+        socket.AF_INET: "/proc/net/tcp",
+        socket.AF_INET6: "/proc/net/tcp6",
+    }
+
+    def __init__(
+        self,
+        port: int,
+        snapshot_ttl: float = 0.0,
+        readiness: ReadinessProbe = ReadinessProbe.SCAN,
+        metrics: Optional[MetricsRegistry] = None,
+        shared: Optional[CachedConn] = None,
+        lane: Optional[OffloadLane] = None,
+    ) -> None:
+        self._use_netlink: bool = hasattr(socket, "AF_NETLINK")
+        self._logger: logging.Logger = logging.getLogger(
+            f"{__name__}.{self.__class__.__name__}"
+        )
+
+        self._request_ports: frozenset[int] = frozenset()
+        self._requests: dict[int, bytes] = {}
+
+        super().__init__(port, snapshot_ttl, readiness, metrics, shared, lane)
+
+    def _build_filter(self, ports: frozenset[int]) -> bytes:
+        """
+        Builds the bytecode accepting sockets whose source port is any of the provided ones
+        """
+        # two comparisons of an op and a port each, and a jump
+        block = 5 * self.BC_OP.size
+        length = block * len(ports)
+        code = []
+
+        # every port is a block of sport >= port, sport <= port and a jump to the end, which accepts the socket,
+        # a failed check goes to the next block, or past the end after the last one so the socket is rejected
+        for i, port in enumerate(sorted(ports)):
+            start = i * block
+            failed = start + block if i < len(ports) - 1 else length + 4
+
+            code += [
+                self.BC_OP.pack(self.INET_DIAG_BC_S_GE, 8, failed - start),
+                self.BC_OP.pack(0, 0, port),
+                self.BC_OP.pack(self.INET_DIAG_BC_S_LE, 8, failed - start - 8),
+                self.BC_OP.pack(0, 0, port),
+                self.BC_OP.pack(self.INET_DIAG_BC_JMP, 4, length - start - 16),
+            ]
+
+        return b"".join(code)
+
+    def _build_request(self, family: int, ports: frozenset[int]) -> bytes:
+        """
+        Builds the sock_diag dump request for the provided family,
+        filtering listening and established sockets whose source port is one of the server ports
+        """
+        states = (1 << self.TCP_LISTEN) | (1 << self.TCP_ESTABLISHED)
+
+        bytecode = self._build_filter(ports)
+        attr = self.RTATTR_HDR.pack(self.RTATTR_HDR.size + len(bytecode), self.INET_DIAG_REQ_BYTECODE) + bytecode
+
+        req = self.DIAG_REQ.pack(
+            family, socket.IPPROTO_TCP, 0, 0, states,
+            0, 0, b"", b"", 0, b"\xff" * 8,
+        )
+        payload = req + attr
+
+        header = self.NLMSG_HDR.pack(
+            self.NLMSG_HDR.size + len(payload),
+            self.SOCK_DIAG_BY_FAMILY,
+            self.NLM_F_REQUEST | self.NLM_F_DUMP,
+            0,
+            0,
+        )
+
+        return header + payload
+
+    def _netlink_scan(self, ports: frozenset[int]) -> Iterator[tuple[int, int, Optional[tuple[str, int]]]]:
+        """
+        Yields the local port, state and peer address of every socket on the server ports reported by the kernel
+        Raises `OSError` if the netlink query fails
+        """
+        if ports != self._request_ports:
+            self._requests = {family: self._build_request(family, ports) for family in self.PROC_PATHS}
+            self._request_ports = ports
+
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, self.NETLINK_SOCK_DIAG) as sock:
+            for family, request in self._requests.items():
+                sock.send(request)
+
+                done = False
+                while not done:
+                    data = sock.recv(self.RECV_BUFSIZE)
+                    offset = 0
+
+                    while offset + self.NLMSG_HDR.size <= len(data):
+                        msg_len, msg_type, _, _, _ = self.NLMSG_HDR.unpack_from(data, offset)
+
+                        if msg_len < self.NLMSG_HDR.size:
+                            raise OSError("Malformed netlink message")
+
+                        body = offset + self.NLMSG_HDR.size
+
+                        if msg_type == self.NLMSG_DONE:
+                            done = True
+                            break
+
+                        if msg_type == self.NLMSG_ERROR:
+                            (errno,) = self.NLMSG_ERR.unpack_from(data, body)
+                            raise OSError(-errno, os.strerror(-errno))
+
+                        if msg_type == self.SOCK_DIAG_BY_FAMILY:
+                            _, state, _, _, sport, dport, _, dst = self.DIAG_MSG.unpack_from(data, body)
+                            yield int.from_bytes(sport, "big"), state, self._peer_from_diag(family, dport, dst)
+
+                        offset += (msg_len + 3) & ~3
+
+    @staticmethod
+    def _peer_from_diag(family: int, dport: bytes, dst: bytes) -> Optional[tuple[str, int]]:
+        port = int.from_bytes(dport, "big")
+
+        if port == 0:
+            return None
+
+        addr = dst[:4] if family == socket.AF_INET else dst
+
+        return str(ipaddress.ip_address(addr)), port
+
+    def _proc_scan(self, ports: frozenset[int]) -> Iterator[tuple[int, int, Optional[tuple[str, int]]]]:
+        """
+        Yields the local port, state and peer address of every socket on the server ports found in `/proc/net/tcp{,6}`,
+        only lines whose local port matches are fully parsed
+        """
+        proc_ports = {f":{port:04X}": port for port in ports}
+
+        for family, path in self.PROC_PATHS.items():
+            try:
+                proc = open(path, "r")
+            except FileNotFoundError:
+                continue
+
+            with proc:
+                next(proc, None)
+
+                for line in proc:
+                    fields = line.split(None, 4)
+
+                    if len(fields) < 4 or (port := proc_ports.get(fields[1][-5:])) is None:
+                        continue
+
+                    state = int(fields[3], 16)
+
+                    yield port, state, self._peer_from_proc(family, fields[2]) if state == self.TCP_ESTABLISHED else None
+
+    @staticmethod
+    def _peer_from_proc(family: int, raddr: str) -> Optional[tuple[str, int]]:
+        host, port = raddr.split(":")
+
+        # /proc prints each 32 bit word of the address in host byte order
+        packed = b"".join(
+            struct.pack("=I", int(host[i:i + 8], 16)) for i in range(0, len(host), 8)
+        )
+
+        if family == socket.AF_INET:
+            packed = packed[:4]
+
+        return str(ipaddress.ip_address(packed)), int(port, 16)
+
+    def _scan(self, ports: frozenset[int]) -> Iterator[tuple[int, int, Optional[tuple[str, int]]]]:
+        """
+        Yields the local port, state and peer address of every listening or established socket on the server ports
+        """
+        if self._use_netlink:
+            try:
+                # consume eagerly so a failure midway doesn't mix both sources
+                return iter(list(self._netlink_scan(ports)))
+            except OSError as e:
+                self._use_netlink = False
+                self._logger.warning(f"Netlink sock_diag unavailable, falling back to /proc: {e}")
+
+        return self._proc_scan(ports)
+
+    def _take_snapshots(self, ports: frozenset[int]) -> dict[int, ConnSnapshot]:
+        listening: set[int] = set()
+        clients: dict[int, int] = dict.fromkeys(ports, 0)
+        peers: dict[int, list[tuple[str, int]]] = {port: [] for port in ports}
+
+        for port, state, peer in self._scan(ports):
+            if state == self.TCP_LISTEN:
+                listening.add(port)
+            elif state == self.TCP_ESTABLISHED:
+                clients[port] += 1
+
+                if peer is not None:
+                    peers[port].append(peer)
+
+        taken_at = time.monotonic()
+
+        return {
+            port: ConnSnapshot(port in listening, clients[port], peers[port], taken_at)
+            for port in ports
+        }
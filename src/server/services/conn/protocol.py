@@ -1,12 +1,29 @@
 from typing import Protocol, Optional
 from abc import abstractmethod
 
+from .types import ConnSnapshot, PingStatus
+
 
 class ServerConn(Protocol):
     """
     Provides information about the server looking at the connections on it's port
     """
 
+    @abstractmethod
+    def snapshot(self) -> ConnSnapshot:
+        """
+        Returns the listen state, client count and peers on the provided port from a single scan
+        Snapshots are cached for a short time so callers within the same window share one scan
+        """
+        ...
+
+    @abstractmethod
+    async def snapshot_async(self) -> ConnSnapshot:
+        """
+        Same as `snapshot`, but a new scan runs outside the loop if the backend can do it
+        """
+        ...
+
     @abstractmethod
     def is_open(self) -> bool:
         """
@@ -35,3 +52,24 @@ class ServerConn(Protocol):
         Raises `TimeoutExpired` if a timeout is provided and it expires
         """
         ...
+
+
+class ServerPing(Protocol):
+    """
+    Asks the server itself how many players are online through the server list ping
+    """
+
+    @abstractmethod
+    async def status(self) -> Optional[PingStatus]:
+        """
+        Returns the status reported by the server, or None if it didn't answer
+        Results are cached for a short time and concurrent callers share the same ping
+        """
+        ...
+
+    @abstractmethod
+    def cached(self) -> Optional[PingStatus]:
+        """
+        Returns the latest status without pinging, None if the latest ping failed or there hasn't been any
+        """
+        ...
@@ -1,84 +1,52 @@
-import asyncio
 import psutil
-import random
+import time
 
 from typing import Optional
 
-from .protocol import ServerConn
-from .errors import TimeoutExpired
+from server.services.metrics.registry import MetricsRegistry
+from server.services.offload.offload import OffloadLane
 
+from .cached_conn import CachedConn
+from .types import ConnSnapshot, ReadinessProbe
 
-class PsutilConn(ServerConn):
-    IMM_RETRIES: int = 8
-    MIN_BACKOFF: float = 0.1
-    MAX_BACKOFF: float = 1.6
-    JITTER_RATIO: float = 0.25
 
-    def __init__(self, port: int) -> None:
-        if port < 0 or port > 65535:
-            raise ValueError("Minecraft server port outside valid range")
+class PsutilConn(CachedConn):
+    def __init__(
+        self,
+        port: int,
+        snapshot_ttl: float = 0.0,
+        readiness: ReadinessProbe = ReadinessProbe.SCAN,
+        metrics: Optional[MetricsRegistry] = None,
+        shared: Optional[CachedConn] = None,
+        lane: Optional[OffloadLane] = None,
+    ) -> None:
+        super().__init__(port, snapshot_ttl, readiness, metrics, shared, lane)
 
-        self._port: int = port
+    def _take_snapshots(self, ports: frozenset[int]) -> dict[int, ConnSnapshot]:
+        listening: set[int] = set()
+        clients: dict[int, int] = dict.fromkeys(ports, 0)
+        peers: dict[int, list[tuple[str, int]]] = {port: [] for port in ports}
 
-    def is_open(self) -> bool:
         for conn in psutil.net_connections(kind="tcp"):
             if isinstance(conn.laddr, tuple) and len(conn.laddr) == 0:
                 continue
-            if conn.status == psutil.CONN_LISTEN and conn.laddr.port == self._port:
-                return True
-        return False
 
-    def is_empty(self) -> bool:
-        for conn in psutil.net_connections(kind="tcp"):
-            if isinstance(conn.laddr, tuple) and len(conn.laddr) == 0:
-                continue
-            if conn.status == psutil.CONN_ESTABLISHED and conn.laddr.port == self._port:
-                return False
-        return True
-
-    def client_count(self) -> int:
-        clients = 0
+            port = conn.laddr.port
 
-        for conn in psutil.net_connections(kind="tcp"):
-            if isinstance(conn.laddr, tuple) and len(conn.laddr) == 0:
+            if port not in ports:
                 continue
-            if conn.status == psutil.CONN_ESTABLISHED and conn.laddr.port == self._port:
-                clients += 1
-
-        return clients
-
-    async def wait_open(self, timeout: Optional[float] = None) -> None:
-        """
-        Sleeps using exponential backoff until the boolean supplier returns true
-        Raises `TimeoutExpired` if a timeout is provided and it expires
-        """
-        backoff = PsutilConn.MIN_BACKOFF
-        jitter = backoff * PsutilConn.JITTER_RATIO
-
-        for _ in range(PsutilConn.IMM_RETRIES):
-            if self.is_open():
-                return
-
-            time = backoff + random.uniform(-jitter, jitter)
-
-            await asyncio.sleep(time)
-
-            if timeout:
-                timeout -= time
-
-                if timeout <= 0:
-                    raise TimeoutExpired
-
-        while not self.is_open():
-            backoff = min(backoff * 2, PsutilConn.MAX_BACKOFF)
-            jitter = backoff * PsutilConn.JITTER_RATIO
 
-            time = backoff + random.uniform(-jitter, jitter)
+            if conn.status == psutil.CONN_LISTEN:
+                listening.add(port)
+            elif conn.status == psutil.CONN_ESTABLISHED:
+                clients[port] += 1
 
-            await asyncio.sleep(time)
+                if conn.raddr:
+                    peers[port].append((conn.raddr.ip, conn.raddr.port))
 
-            if timeout:
-                timeout -= time
+        taken_at = time.monotonic()
 
-                if timeout <= 0:
-                    raise TimeoutExpired
+        return {
+            port: ConnSnapshot(port in listening, clients[port], peers[port], taken_at)
+            for port in ports
+        }
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from typing import Callable, Optional
+
+from .types import ConnSnapshot
+
+from server.services.metrics.registry import Histogram
+from server.services.offload.offload import OffloadLane
+
+
+class SharedScan:
+    """
+    Scans the sockets of every watched port at once and keeps the snapshots while they are younger than the ttl,
+    so several servers on the same machine share one scan per tick instead of scanning the same table each
+    Async scans run in the offload lane if there is one, and callers asking at the same time share one scan
+    """
+
+    def __init__(
+        self,
+        scan: Callable[[frozenset[int]], dict[int, ConnSnapshot]],
+        ttl: float,
+        scan_time: Histogram,
+        lane: Optional[OffloadLane] = None,
+    ) -> None:
+        if ttl < 0:
+            raise ValueError("Snapshot ttl can't be negative")
+
+        self._scan: Callable[[frozenset[int]], dict[int, ConnSnapshot]] = scan
+        self._ttl: float = ttl
+        self._scan_time: Histogram = scan_time
+        self._lane: Optional[OffloadLane] = lane
+
+        self._ports: frozenset[int] = frozenset()
+        self._snapshots: dict[int, ConnSnapshot] = {}
+        self._taken_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Future[None]] = None
+
+    def watch(self, port: int) -> None:
+        """
+        Adds the port to the ones covered by every scan
+        """
+        self._ports = self._ports | {port}
+        self._taken_at = None
+
+    def _timed_scan(self, ports: frozenset[int]) -> tuple[dict[int, ConnSnapshot], float]:
+        start = time.perf_counter()
+        snapshots = self._scan(ports)
+        return snapshots, time.perf_counter() - start
+
+    def _store(self, snapshots: dict[int, ConnSnapshot], elapsed: float) -> None:
+        self._scan_time.observe(elapsed)
+        self._snapshots = snapshots
+        self._taken_at = time.monotonic()
+
+    def _get(self, port: int) -> ConnSnapshot:
+        return self._snapshots.get(port) or ConnSnapshot(False, 0, [], self._taken_at or 0.0)
+
+    def _stale(self) -> bool:
+        return self._taken_at is None or time.monotonic() - self._taken_at > self._ttl
+
+    def fresh(self, port: int) -> ConnSnapshot:
+        """
+        Scans every watched port now, on the loop, and returns the snapshot of the provided one
+        """
+        self._store(*self._timed_scan(self._ports))
+        return self._get(port)
+
+    def snapshot(self, port: int) -> ConnSnapshot:
+        """
+        Returns the snapshot of the provided port from the latest scan, scanning again on the loop if it is too old
+        """
+        return self.fresh(port) if self._stale() else self._get(port)
+
+    async def _refresh(self) -> None:
+        assert self._lane is not None
+
+        try:
+            self._store(*await self._lane.run(self._timed_scan, self._ports))
+        finally:
+            self._inflight = None
+
+    async def fresh_async(self, port: int) -> ConnSnapshot:
+        """
+        Same as `fresh`, but the scan runs in the offload lane and is shared with the callers asking meanwhile
+        Raises `OffloadTimeout` if the scan doesn't finish in time
+        """
+        if self._lane is None:
+            return self.fresh(port)
+
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+
+        # shielded so a cancelled caller doesn't cancel the scan others are waiting for
+        await asyncio.shield(self._inflight)
+
+        return self._get(port)
+
+    async def snapshot_async(self, port: int) -> ConnSnapshot:
+        """
+        Same as `snapshot`, but scanning again through `fresh_async`
+        """
+        return await self.fresh_async(port) if self._stale() else self._get(port)
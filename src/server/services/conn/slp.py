@@ -0,0 +1,183 @@
+import asyncio
+import json
+import struct
+import time
+
+from typing import Any
+
+from .errors import SlpErr
+from .types import PingStatus
+
+
+class ServerListPing:
+    """
+    Minimal asyncio client for the Minecraft Server List Ping protocol
+    """
+
+    PROTOCOL_VERSION = -1
+    NEXT_STATE_STATUS = 1
+    PACKET_HANDSHAKE = 0x00
+    PACKET_STATUS = 0x00
+    PACKET_PING = 0x01
+
+    MAX_VARINT_BYTES = 5
+    MAX_RESPONSE_LEN = 1 << 21
+
+    @staticmethod
+    def _varint(value: int) -> bytes:
+        value &= 0xFFFFFFFF
+        out = bytearray()
+
+        while True:
+            byte = value & 0x7F
+            value >>= 7
+
+            if value:
+                out.append(byte | 0x80)
+            else:
+                out.append(byte)
+                return bytes(out)
+
+    @staticmethod
+    def _packet(packet_id: int, payload: bytes = b"") -> bytes:
+        body = ServerListPing._varint(packet_id) + payload
+        return ServerListPing._varint(len(body)) + body
+
+    @staticmethod
+    async def _read_varint(reader: asyncio.StreamReader) -> int:
+        value = 0
+
+        for i in range(ServerListPing.MAX_VARINT_BYTES):
+            (byte,) = await reader.readexactly(1)
+            value |= (byte & 0x7F) << (7 * i)
+
+            if not byte & 0x80:
+                return value
+
+        raise SlpErr("VarInt is too big")
+
+    @staticmethod
+    def _handshake(host: str, port: int) -> bytes:
+        addr = host.encode("utf-8")
+
+        return ServerListPing._packet(
+            ServerListPing.PACKET_HANDSHAKE,
+            ServerListPing._varint(ServerListPing.PROTOCOL_VERSION)
+            + ServerListPing._varint(len(addr)) + addr
+            + struct.pack(">H", port)
+            + ServerListPing._varint(ServerListPing.NEXT_STATE_STATUS),
+        )
+
+    @staticmethod
+    async def _exchange(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, port: int) -> dict[str, Any]:
+        writer.write(ServerListPing._handshake(host, port))
+        writer.write(ServerListPing._packet(ServerListPing.PACKET_STATUS))
+        await writer.drain()
+
+        length = await ServerListPing._read_varint(reader)
+
+        if length <= 0 or length > ServerListPing.MAX_RESPONSE_LEN:
+            raise SlpErr(f"Invalid response length {length}")
+
+        if await ServerListPing._read_varint(reader) != ServerListPing.PACKET_STATUS:
+            raise SlpErr("Unexpected packet in status response")
+
+        data = await reader.readexactly(await ServerListPing._read_varint(reader))
+
+        return json.loads(data)
+
+    @staticmethod
+    async def _ping(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> float:
+        """
+        Sends a ping through an open status connection, returns the round trip in milliseconds
+        """
+        token = struct.pack(">q", time.monotonic_ns())
+        start = time.perf_counter()
+
+        writer.write(ServerListPing._packet(ServerListPing.PACKET_PING, token))
+        await writer.drain()
+
+        length = await ServerListPing._read_varint(reader)
+
+        if await ServerListPing._read_varint(reader) != ServerListPing.PACKET_PING or length != 9:
+            raise SlpErr("Unexpected packet in ping response")
+
+        if await reader.readexactly(8) != token:
+            raise SlpErr("Ping response doesn't match the request")
+
+        return (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def _parse_status(status: dict[str, Any], latency_ms: float) -> PingStatus:
+        try:
+            players = status["players"]
+            version = status.get("version", {})
+
+            return PingStatus(
+                online=int(players["online"]),
+                max_players=int(players["max"]),
+                sample=[str(player["name"]) for player in players.get("sample", [])],
+                version=str(version.get("name", "")) if isinstance(version, dict) else "",
+                latency_ms=latency_ms,
+                taken_at=time.monotonic(),
+            )
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise SlpErr(f"Malformed status response: {e!r}")
+
+    @staticmethod
+    async def query(host: str, port: int, timeout: float) -> PingStatus:
+        """
+        Requests the status and pings the server through the same connection,
+        returns the players online, the player sample, the version and the ping latency
+        Raises `SlpErr` if the server can't be reached or answers with something unexpected
+        """
+        writer = None
+
+        try:
+            async with asyncio.timeout(timeout):
+                reader, writer = await asyncio.open_connection(host, port)
+                status = await ServerListPing._exchange(reader, writer, host, port)
+                latency_ms = await ServerListPing._ping(reader, writer)
+        except SlpErr:
+            raise
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            raise SlpErr(f"Server list ping failed: {e!r}")
+        finally:
+            if writer is not None:
+                writer.close()
+
+        return ServerListPing._parse_status(status, latency_ms)
+
+    @staticmethod
+    async def status(host: str, port: int, timeout: float) -> dict[str, Any]:
+        """
+        Performs the handshake and status request, returns the decoded status response
+        Raises `SlpErr` if the server can't be reached or answers with something unexpected
+        """
+        writer = None
+
+        try:
+            async with asyncio.timeout(timeout):
+                reader, writer = await asyncio.open_connection(host, port)
+                return await ServerListPing._exchange(reader, writer, host, port)
+        except SlpErr:
+            raise
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            raise SlpErr(f"Server list ping failed: {e!r}")
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    async def connect(host: str, port: int, timeout: float) -> bool:
+        """
+        Returns whether a TCP connection to the port can be established before the timeout
+        """
+        try:
+            async with asyncio.timeout(timeout):
+                _, writer = await asyncio.open_connection(host, port)
+        except (OSError, TimeoutError):
+            return False
+
+        writer.close()
+        return True
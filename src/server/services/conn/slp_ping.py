@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from typing import Optional
+
+from .errors import SlpErr
+from .protocol import ServerPing
+from .slp import ServerListPing
+from .types import PingStatus
+
+
+class SlpPing(ServerPing):
+    """
+    Server list ping behind a ttl cache, at most one ping is sent per ttl however many callers ask
+    Failed pings are cached too, so an unreachable server isn't pinged more often
+    """
+
+    HOST = "127.0.0.1"
+
+    def __init__(self, port: int, ttl: float, timeout: float = 2.0) -> None:
+        if port < 0 or port > 65535:
+            raise ValueError("Minecraft server port outside valid range")
+
+        if ttl < 0:
+            raise ValueError("Ping ttl can't be negative")
+
+        if timeout <= 0:
+            raise ValueError("Ping timeout must be greater than zero")
+
+        self._port: int = port
+        self._ttl: float = ttl
+        self._timeout: float = timeout
+
+        self._status: Optional[PingStatus] = None
+        self._taken_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Future[Optional[PingStatus]]] = None
+
+    def cached(self) -> Optional[PingStatus]:
+        return self._status
+
+    async def _refresh(self) -> Optional[PingStatus]:
+        try:
+            self._status = await ServerListPing.query(self.HOST, self._port, self._timeout)
+        except SlpErr:
+            self._status = None
+        finally:
+            self._taken_at = time.monotonic()
+            self._inflight = None
+
+        return self._status
+
+    async def status(self) -> Optional[PingStatus]:
+        if self._taken_at is not None and time.monotonic() - self._taken_at <= self._ttl:
+            return self._status
+
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+
+        # shielded so a cancelled caller doesn't cancel the ping others are waiting for
+        return await asyncio.shield(self._inflight)
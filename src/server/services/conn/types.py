@@ -0,0 +1,43 @@
+from dataclasses import dataclass, field
+from enum import Enum
+
+
+class ReadinessProbe(Enum):
+    SCAN    = "SCAN"            # the port shows up as listening in the socket table
+    CONNECT = "CONNECT"         # a tcp connection to the port succeeds
+    PING    = "PING"            # the server answers a server list ping
+
+    def __str__(self) -> str:
+        return self.value.lower()
+
+
+class CountSource(Enum):
+    SCAN    = "SCAN"            # established connections on the game port, status pings included
+    PING    = "PING"            # players reported by the server list ping, falling back to the scan
+
+    def __str__(self) -> str:
+        return self.value.lower()
+
+
+@dataclass(frozen=True)
+class PingStatus:
+    """
+    Status reported by the server through a server list ping
+    """
+    online: int
+    max_players: int
+    sample: list[str] = field(default_factory=list)
+    version: str = ""
+    latency_ms: float = 0.0
+    taken_at: float = 0.0
+
+
+@dataclass(frozen=True)
+class ConnSnapshot:
+    """
+    State of the connections on the server port gathered from a single socket scan
+    """
+    listening: bool
+    clients: int
+    peers: list[tuple[str, int]] = field(default_factory=list)
+    taken_at: float = 0.0
@@ -0,0 +1,14 @@
+from conf.types import GlobalConf
+
+from server.services.metrics.registry import MetricsRegistry
+
+from .loop_lag import LoopLag
+
+
+class LagFactory:
+    @staticmethod
+    def make(conf: GlobalConf, metrics: MetricsRegistry) -> LoopLag:
+        """
+        Makes a new instance of `LoopLag` through `ServerConf`
+        """
+        return LoopLag(conf.loop_lag_intv, conf.loop_slow_callback, metrics)
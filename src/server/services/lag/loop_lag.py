@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import re
+import time
+
+from collections import deque
+from typing import Optional
+
+from server.services.metrics.registry import MetricsRegistry, Counter, Histogram
+
+from .types import LagSummary, SlowCall
+
+
+class _SlowCallbackFilter(logging.Filter):
+    """
+    Takes the slow callback warnings of the asyncio debug mode out of the logs and hands them to the monitor,
+    which logs them summarized instead
+    """
+
+    MSG = "Executing %s took %.3f seconds"
+
+    def __init__(self, lag: "LoopLag") -> None:
+        super().__init__()
+        self._lag: LoopLag = lag
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.msg != self.MSG or not isinstance(record.args, tuple) or len(record.args) != 2:
+            return True
+
+        handle, secs = record.args
+        self._lag.record_slow(LoopLag.attribute(str(handle)), float(secs))
+        return False
+
+
+class LoopLag:
+    """
+    Measures how late the loop runs what is scheduled on it, with a heartbeat that sleeps for a fixed interval
+    and checks how much longer it actually slept
+    If a threshold is provided it also turns on the debug mode of the loop, which reports every callback
+    that runs for longer, and attributes each one to the task or handler that ran it
+    The debug mode records where every callback was scheduled, so it is meant for finding the culprit, not to stay on
+    """
+
+    SUMMARY_INTV: float = 5 * 60.0
+    WARN_LAG: float = 0.25
+    MAX_SLOW_CALLS: int = 1024
+    TOP_SLOW_CALLS: int = 5
+
+    TASK_NAME = re.compile(r"name='([^']*)'")
+    TASK_CORO = re.compile(r"coro=<([\w.<>]+)\(")
+    HANDLE_CALLBACK = re.compile(r"Handle (?:when=[\d.]+ )?([\w.<>]+)\(")
+    DEFAULT_TASK_NAME = re.compile(r"Task-\d+")
+
+    def __init__(self, intv: float, slow_callback: Optional[float] = None, metrics: Optional[MetricsRegistry] = None) -> None:
+        if intv <= 0:
+            raise ValueError("Heartbeat interval must be greater than zero")
+
+        if slow_callback is not None and slow_callback <= 0:
+            raise ValueError("Slow callback threshold must be greater than zero")
+
+        self._task: Optional[asyncio.Task] = None
+        self._started_at: float = time.monotonic()
+        self._filter: _SlowCallbackFilter = _SlowCallbackFilter(self)
+        self._logger: logging.Logger = logging.getLogger(
+            f"{__name__}.{self.__class__.__name__}"
+        )
+
+        self._intv: float = intv
+        self._slow_callback: Optional[float] = slow_callback
+
+        # both cover the last summary period
+        self._lags: deque[float] = deque(maxlen=max(int(self.SUMMARY_INTV / intv), 1))
+        self._slow_calls: deque[tuple[float, str, float]] = deque(maxlen=self.MAX_SLOW_CALLS)
+
+        metrics = metrics or MetricsRegistry()
+        self._lag_time: Histogram = metrics.histogram(
+            "loop_lag_seconds", "Time the loop took to run a heartbeat after it was due",
+        )
+        self._slow_count: Counter = metrics.counter(
+            "loop_slow_callbacks", "Callbacks that held the loop longer than the threshold",
+        )
+
+    def slow_callback(self) -> Optional[float]:
+        return self._slow_callback
+
+    @staticmethod
+    def attribute(handle: str) -> str:
+        """
+        Returns the coroutine of the task, along with its name if it has one, or the callback of the handle
+        that the loop describes with the provided string
+        """
+        if (coro := LoopLag.TASK_CORO.search(handle)) is not None:
+            name = LoopLag.TASK_NAME.search(handle)
+
+            if name is None or LoopLag.DEFAULT_TASK_NAME.fullmatch(name.group(1)):
+                return coro.group(1)
+
+            return f"{coro.group(1)} [{name.group(1)}]"
+
+        if (callback := LoopLag.HANDLE_CALLBACK.search(handle)) is not None:
+            return callback.group(1)
+
+        return handle[:80]
+
+    def record_slow(self, source: str, secs: float) -> None:
+        """
+        Counts a callback that held the loop for the provided time
+        """
+        self._slow_count.inc()
+        self._slow_calls.append((time.monotonic(), source, secs))
+
+    def summary(self) -> Optional[LagSummary]:
+        """
+        Returns the lag and slow callbacks of the last summary period, or None if there isn't any heartbeat yet
+        """
+        if not self._lags:
+            return None
+
+        since = time.monotonic() - self.SUMMARY_INTV
+        grouped: dict[str, list[float]] = {}
+
+        for at, source, secs in self._slow_calls:
+            if at >= since:
+                grouped.setdefault(source, []).append(secs)
+
+        slow_calls = sorted(
+            (SlowCall(source, len(times), sum(times), max(times)) for source, times in grouped.items()),
+            key=lambda call: call.total,
+            reverse=True,
+        )
+        lags = sorted(self._lags)
+
+        return LagSummary(
+            period=min(time.monotonic() - self._started_at, self.SUMMARY_INTV),
+            samples=len(lags),
+            current=self._lags[-1],
+            p50=lags[min(int(0.50 * len(lags)), len(lags) - 1)],
+            p95=lags[min(int(0.95 * len(lags)), len(lags) - 1)],
+            worst=lags[-1],
+            slow_calls=slow_calls,
+        )
+
+    def _log_summary(self) -> None:
+        """
+        Logs the lag of the last summary period and its slowest callbacks, as a warning if anything held the loop
+        """
+        summary = self.summary()
+
+        if summary is None:
+            return
+
+        msg = (
+            f"Loop lag over the last {summary.period:.0f}s: "
+            f"median {summary.p50 * 1000:.1f}ms, p95 {summary.p95 * 1000:.1f}ms, worst {summary.worst * 1000:.1f}ms"
+        )
+
+        if summary.slow_calls:
+            msg += ", slowest callbacks: " + ", ".join(
+                f"{call.source} {call.count}x up to {call.worst * 1000:.0f}ms"
+                for call in summary.slow_calls[:self.TOP_SLOW_CALLS]
+            )
+
+        if summary.slow_calls or summary.worst > self.WARN_LAG:
+            self._logger.warning(msg)
+        else:
+            self._logger.info(msg)
+
+    async def _heartbeat(self) -> None:
+        """
+        Continous task that measures the lag of every sleep and logs a summary once per period
+        """
+        loop = asyncio.get_running_loop()
+        next_summary = loop.time() + self.SUMMARY_INTV
+
+        try:
+            while True:
+                start = loop.time()
+                await asyncio.sleep(self._intv)
+                now = loop.time()
+
+                lag = max(now - start - self._intv, 0.0)
+                self._lags.append(lag)
+                self._lag_time.observe(lag)
+
+                if now >= next_summary:
+                    next_summary = now + self.SUMMARY_INTV
+                    self._log_summary()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._task = None
+
+    def start(self) -> None:
+        """
+        Starts the heartbeat on the running loop, and its debug mode if there is a threshold
+        """
+        if self._task is not None and not self._task.done():
+            self._logger.warning("Tried to start lag monitor while already running")
+            return
+
+        loop = asyncio.get_running_loop()
+
+        if self._slow_callback is not None:
+            loop.slow_callback_duration = self._slow_callback
+            loop.set_debug(True)
+            logging.getLogger("asyncio").addFilter(self._filter)
+            self._logger.info(f"Reporting callbacks that hold the loop longer than {self._slow_callback}s")
+
+        self._started_at = time.monotonic()
+        self._task = loop.create_task(self._heartbeat(), name="loop lag heartbeat")
+
+    def stop(self) -> None:
+        """
+        Stops the heartbeat and the debug mode of the loop
+        """
+        if self._slow_callback is not None:
+            asyncio.get_running_loop().set_debug(False)
+            logging.getLogger("asyncio").removeFilter(self._filter)
+
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
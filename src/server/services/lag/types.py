@@ -0,0 +1,27 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class SlowCall:
+    """
+    Callbacks from the same source that held the loop longer than the threshold
+    """
+    source: str
+    count: int
+    total: float
+    worst: float
+
+
+@dataclass(frozen=True)
+class LagSummary:
+    """
+    Scheduling lag measured by the heartbeats over a time range, in seconds,
+    and the slow callbacks caught meanwhile from the slowest to the fastest
+    """
+    period: float
+    samples: int
+    current: float
+    p50: float
+    p95: float
+    worst: float
+    slow_calls: list[SlowCall] = field(default_factory=list)
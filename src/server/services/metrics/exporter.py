@@ -0,0 +1,68 @@
+import logging
+
+from typing import Optional
+
+from aiohttp import web
+
+from .registry import MetricsRegistry
+
+
+class MetricsExporter:
+    """
+    Serves the metrics of the registry over http for a prometheus scraper,
+    it is meant to be bound to localhost only
+    """
+
+    HOST = "127.0.0.1"
+    PATH = "/metrics"
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, registry: MetricsRegistry, port: int) -> None:
+        if port < 0 or port > 65535:
+            raise ValueError("Metrics port outside valid range")
+
+        self._registry: MetricsRegistry = registry
+        self._port: int = port
+        self._runner: Optional[web.AppRunner] = None
+
+        self._logger: logging.Logger = logging.getLogger(
+            f"{__name__}.{self.__class__.__name__}"
+        )
+
+    async def _handle(self, _: web.Request) -> web.Response:
+        return web.Response(
+            body=self._registry.render().encode("utf-8"),
+            headers={"Content-Type": self.CONTENT_TYPE},
+        )
+
+    async def start(self) -> None:
+        """
+        Starts serving the metrics, does nothing if it is already running
+        """
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get(self.PATH, self._handle)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+
+        try:
+            await web.TCPSite(runner, self.HOST, self._port).start()
+        except OSError:
+            await runner.cleanup()
+            raise
+
+        self._runner = runner
+        self._logger.info(f"Serving metrics on http://{self.HOST}:{self._port}{self.PATH}")
+
+    async def stop(self) -> None:
+        """
+        Stops serving the metrics
+        """
+        if self._runner is None:
+            return
+
+        await self._runner.cleanup()
+        self._runner = None
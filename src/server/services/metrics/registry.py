@@ -0,0 +1,215 @@
+import math
+import time
+
+from bisect import bisect_left
+from typing import Callable, Iterator, Optional, Union
+
+from .types import MetricType
+
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Counter:
+    """
+    Value that only goes up
+    Updates are plain attribute writes, they must only happen from the event loop thread
+    """
+
+    def __init__(self) -> None:
+        self.value: float = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def samples(self, name: str, labels: Labels) -> Iterator[tuple[str, Labels, float]]:
+        yield name, labels, self.value
+
+
+class Gauge:
+    """
+    Value that goes up and down, either set directly or read from a supplier when scraped
+    """
+
+    def __init__(self, supplier: Optional[Callable[[], float]] = None) -> None:
+        self.value: float = 0.0
+        self._supplier: Optional[Callable[[], float]] = supplier
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self, name: str, labels: Labels) -> Iterator[tuple[str, Labels, float]]:
+        yield name, labels, self._supplier() if self._supplier is not None else self.value
+
+
+class Histogram:
+    """
+    Distribution of observed values, every observation increments a single bucket
+    Buckets are only accumulated when scraped
+    """
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._bounds: tuple[float, ...] = bounds
+        self._counts: list[int] = [0] * (len(bounds) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> "_Timer":
+        """
+        Returns a context manager that observes how many seconds its body took
+        """
+        return _Timer(self)
+
+    def samples(self, name: str, labels: Labels) -> Iterator[tuple[str, Labels, float]]:
+        cumulative = 0
+
+        for bound, count in zip(self._bounds + (math.inf,), self._counts):
+            cumulative += count
+            yield f"{name}_bucket", labels + (("le", _format_value(bound)),), cumulative
+
+        yield f"{name}_sum", labels, self.sum
+        yield f"{name}_count", labels, self.count
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram: Histogram = histogram
+        self._start: float = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *_) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class _Family:
+    def __init__(self, name: str, doc: str, metric_type: MetricType) -> None:
+        self.name: str = name
+        self.doc: str = doc
+        self.type: MetricType = metric_type
+        self.children: dict[Labels, Metric] = {}
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """
+    Holds every metric of the app and renders them in the prometheus text exposition format
+    Asking twice for the same name and labels returns the same metric, so components can share them
+    """
+
+    # seconds, from a fast socket scan up to a slow rcon response
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, prefix: str = "mcdaemon") -> None:
+        self._prefix: str = prefix
+        self._families: dict[str, _Family] = {}
+        self._labels: dict[str, str] = {}
+
+    def labelled(self, labels: dict[str, str]) -> "MetricsRegistry":
+        """
+        Returns a view of the registry that adds the labels to every metric asked through it,
+        the view renders the same metrics, so every server of the daemon can share one registry
+        """
+        view = MetricsRegistry(self._prefix)
+        view._families = self._families
+        view._labels = {**self._labels, **labels}
+        return view
+
+    def _child(
+        self,
+        name: str,
+        doc: str,
+        metric_type: MetricType,
+        labels: Optional[dict[str, str]],
+        make: Callable[[], Metric],
+    ) -> Metric:
+        name = f"{self._prefix}_{name}"
+        family = self._families.get(name)
+
+        if family is None:
+            family = self._families[name] = _Family(name, doc, metric_type)
+        elif family.type != metric_type:
+            raise ValueError(f"Metric {name} is already registered as a {family.type}")
+
+        key = tuple(sorted({**self._labels, **(labels or {})}.items()))
+        child = family.children.get(key)
+
+        if child is None:
+            child = family.children[key] = make()
+
+        return child
+
+    def counter(self, name: str, doc: str, labels: Optional[dict[str, str]] = None) -> Counter:
+        """
+        Counters are always exposed with the `_total` suffix
+        """
+        if not name.endswith("_total"):
+            name = f"{name}_total"
+
+        metric = self._child(name, doc, MetricType.COUNTER, labels, Counter)
+        assert isinstance(metric, Counter)
+        return metric
+
+    def gauge(
+        self,
+        name: str,
+        doc: str,
+        labels: Optional[dict[str, str]] = None,
+        supplier: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        metric = self._child(name, doc, MetricType.GAUGE, labels, lambda: Gauge(supplier))
+        assert isinstance(metric, Gauge)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        doc: str,
+        labels: Optional[dict[str, str]] = None,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = self._child(name, doc, MetricType.HISTOGRAM, labels, lambda: Histogram(buckets))
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def render(self) -> str:
+        """
+        Renders every metric in the prometheus text exposition format
+        """
+        lines = []
+
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.doc}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+
+            for labels, child in family.children.items():
+                for name, sample_labels, value in child.samples(family.name, labels):
+                    if sample_labels:
+                        pairs = ",".join(f'{key}="{_escape(val)}"' for key, val in sample_labels)
+                        lines.append(f"{name}{{{pairs}}} {_format_value(value)}")
+                    else:
+                        lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
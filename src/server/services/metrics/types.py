@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class MetricType(Enum):
+    COUNTER   = "counter"       # only ever goes up
+    GAUGE     = "gauge"         # current value of something that goes up and down
+    HISTOGRAM = "histogram"     # distribution of observed values in cumulative buckets
+
+    def __str__(self) -> str:
+        return self.value
@@ -0,0 +1,2 @@
+class OffloadTimeout(Exception):
+    pass
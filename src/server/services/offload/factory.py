@@ -0,0 +1,14 @@
+from conf.types import GlobalConf
+
+from server.services.metrics.registry import MetricsRegistry
+
+from .offload import Offload
+
+
+class OffloadFactory:
+    @staticmethod
+    def make(conf: GlobalConf, metrics: MetricsRegistry) -> Offload:
+        """
+        Makes a new instance of `Offload` through `ServerConf`
+        """
+        return Offload(conf.offload_workers, metrics)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from server.services.metrics.registry import MetricsRegistry, Counter, Histogram
+
+from .errors import OffloadTimeout
+
+
+T = TypeVar("T")
+
+
+class OffloadLane:
+    """
+    Share of the pool used by one service, at most `limit` of its calls run at once and the rest wait their turn
+    A call that times out keeps its slot until its thread actually finishes, so a stuck call can't pile up threads
+    """
+
+    def __init__(
+        self,
+        name: str,
+        offload: "Offload",
+        limit: int,
+        timeout: Optional[float],
+        metrics: MetricsRegistry,
+    ) -> None:
+        if limit <= 0:
+            raise ValueError("Lane concurrency limit must be greater than zero")
+
+        if timeout is not None and timeout <= 0:
+            raise ValueError("Lane timeout must be greater than zero")
+
+        self._name: str = name
+        self._offload: Offload = offload
+        self._timeout: Optional[float] = timeout
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(limit)
+        self._waiting: int = 0
+
+        labels = {"lane": name}
+        metrics.gauge(
+            "offload_queue_depth", "Blocking calls waiting for a slot of their lane", labels,
+            supplier=lambda: self._waiting,
+        )
+        self._wait_time: Histogram = metrics.histogram(
+            "offload_wait_seconds", "Time from asking to run a blocking call until a thread starts it", labels,
+        )
+        self._run_time: Histogram = metrics.histogram(
+            "offload_run_seconds", "Time a blocking call keeps its thread busy", labels,
+        )
+        self._timeouts: Counter = metrics.counter(
+            "offload_timeouts", "Blocking calls given up on after the timeout of their lane", labels,
+        )
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        Runs the blocking function in the pool without blocking the loop and returns its result
+        Raises `OffloadTimeout` if it doesn't finish in time, and whatever the function raises
+        """
+        asked = time.perf_counter()
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        started: list[float] = []
+
+        def call() -> T:
+            started.append(time.perf_counter())
+            return fn(*args)
+
+        def done(_) -> None:
+            self._slots.release()
+            self._offload._running -= 1
+
+            # observed here, on the loop thread, metrics aren't updated from the workers
+            if started:
+                self._wait_time.observe(started[0] - asked)
+                self._run_time.observe(time.perf_counter() - started[0])
+
+        future = asyncio.get_running_loop().run_in_executor(self._offload._pool, call)
+        future.add_done_callback(done)
+        self._offload._running += 1
+
+        try:
+            # shielded so giving up on the call doesn't hand its slot back while it still runs
+            return await asyncio.wait_for(asyncio.shield(future), self._timeout)
+        except TimeoutError:
+            self._timeouts.inc()
+            raise OffloadTimeout(f"Blocking call {getattr(fn, '__qualname__', fn)} of lane {self._name} timed out")
+
+
+class Offload:
+    """
+    Bounded thread pool shared by every service for the calls that would block the loop,
+    which also keeps the discord gateway alive, each service gets a lane with its own limit and timeout
+    """
+
+    def __init__(self, max_workers: int = 4, metrics: Optional[MetricsRegistry] = None) -> None:
+        if max_workers <= 0:
+            raise ValueError("Offload pool needs at least one worker")
+
+        self._max_workers: int = max_workers
+        self._pool: ThreadPoolExecutor = ThreadPoolExecutor(max_workers, thread_name_prefix="offload")
+        self._lanes: dict[str, OffloadLane] = {}
+        self._running: int = 0
+        self._metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        self._metrics.gauge(
+            "offload_pool_backlog", "Blocking calls handed to the pool that wait for a free worker",
+            supplier=lambda: max(self._running - self._max_workers, 0),
+        )
+
+    def lane(self, name: str, limit: int = 1, timeout: Optional[float] = None) -> OffloadLane:
+        """
+        Returns the lane with the provided name, creating it the first time it is asked for
+        """
+        lane = self._lanes.get(name)
+
+        if lane is None:
+            lane = self._lanes[name] = OffloadLane(name, self, limit, timeout, self._metrics)
+
+        return lane
+
+    def shutdown(self) -> None:
+        """
+        Stops accepting calls and drops the ones that haven't started, running calls finish on their own
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+
+from typing import Callable, Optional
+
+from .protocol import AsyncServerProc
+from .errors import ProcErr
+
+
+class AsyncMinecraftProc(AsyncServerProc):
+    STOP_COMMAND = b"/stop\n"
+
+    def __init__(self, startup_script: str, timeout: float) -> None:
+        if timeout <= 0:
+            raise ValueError("Process operation timeout must be greater than zero")
+
+        self._startup_script: str = startup_script
+        self._timeout: float = timeout
+        self._inst: Optional[asyncio.subprocess.Process] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._exit_handlers: list[Callable[[int], None]] = []
+        self._logger: logging.Logger = logging.getLogger(
+            f"{__name__}.{self.__class__.__name__}"
+        )
+
+    def on_exit(self, handler: Callable[[int], None]) -> None:
+        self._exit_handlers.append(handler)
+
+    async def _watch(self, inst: asyncio.subprocess.Process) -> None:
+        """
+        Waits for the process to exit through the child watcher of the loop, which uses a pidfd on linux,
+        and calls the exit handlers, it is cancelled before the process is stopped on purpose
+        """
+        code = await inst.wait()
+
+        if self._inst is not inst:
+            return
+
+        for handler in self._exit_handlers:
+            try:
+                handler(code)
+            except Exception as e:
+                self._logger.error(f"Exit handler {handler} failed: {e}")
+
+    def _unwatch(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def start(self) -> None:
+        if self.alive():
+            raise ProcErr("Failed to start: process is currently running")
+
+        try:
+            self._inst = await asyncio.create_subprocess_exec(
+                self._startup_script,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except (ValueError, OSError) as e:
+            raise ProcErr(f"Failed to start process: {e}")
+        except Exception as e:
+            raise ProcErr(f"Failed to start process: Unexpected error: {e}")
+
+        self._watch_task = asyncio.create_task(self._watch(self._inst))
+
+    def alive(self) -> bool:
+        return self._inst is not None and self._inst.returncode is None
+
+    async def stop(self) -> None:
+        if self._inst is None:
+            raise ProcErr("Failed to stop: process isn't currently running")
+
+        self._unwatch()
+
+        if not self.alive():
+            self._inst = None
+            return
+
+        try:
+            await asyncio.wait_for(
+                self._inst.communicate(input=self.STOP_COMMAND), self._timeout
+            )
+        except asyncio.TimeoutError:
+            self._logger.warning(
+                f"Timeout reached comunicating stop command to server instance"
+            )
+        except Exception as e:
+            self._logger.error(
+                f"Error communicating stop command to server instance: {e}"
+            )
+
+        try:
+            await asyncio.wait_for(self._inst.wait(), self._timeout)
+        except asyncio.TimeoutError:
+            self._logger.warning("Timeout reached waiting for server instance to stop")
+            self._logger.warning("Killing instance...")
+            await self.kill()
+        except Exception as e:
+            self._logger.warning(
+                f"Error while waiting for server instance to stop: {e}"
+            )
+            self._logger.warning("Killing instance...")
+            await self.kill()
+        finally:
+            self._inst = None
+
+    async def kill(self) -> None:
+        if not self._inst:
+            return
+
+        self._unwatch()
+
+        if not self.alive():
+            self._inst = None
+            return
+
+        try:
+            self._inst.kill()
+            await asyncio.wait_for(self._inst.wait(), self._timeout)
+        except Exception as e:
+            self._logger.critical(f"Error killing instance: {e}")
+            self._logger.critical("Instance could be in zombie state, check inmediatly")
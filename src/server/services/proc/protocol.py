@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Protocol
+from typing import Callable, Protocol
 
 
 class ServerProc(Protocol):
@@ -36,3 +36,47 @@ class ServerProc(Protocol):
         Kills the process
         """
         ...
+
+
+class AsyncServerProc(Protocol):
+    """
+    Same as `ServerProc` but every lifecycle operation is awaitable, so it never blocks the event loop
+    """
+
+    @abstractmethod
+    async def start(self) -> None:
+        """
+        Starts the process
+        Raises `ProcErr` if the process hadn't stopped or if it can't be started
+        """
+        ...
+
+    @abstractmethod
+    def alive(self) -> bool:
+        """
+        The process won't be alive if it hasn't started yet or if it has crashed
+        """
+        ...
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """
+        Stops the process
+        Raises `ProcErr` if the process hadn't started or if it can't be stopped
+        """
+        ...
+
+    @abstractmethod
+    async def kill(self) -> None:
+        """
+        Kills the process
+        """
+        ...
+
+    @abstractmethod
+    def on_exit(self, handler: Callable[[int], None]) -> None:
+        """
+        The handler is called with the exit code as soon as the process exits without being stopped or killed,
+        the code is negative if it was terminated by a signal
+        """
+        ...
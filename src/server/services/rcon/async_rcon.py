@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import struct
+import time
+
+from typing import Optional
+
+from .errors import RconErr
+from .comm_policy import CommPolicy
+from .protocol import AsyncServerRcon
+from .types import CommResult
+
+from server.services.metrics.registry import MetricsRegistry, Histogram
+
+
+class _Pending:
+    """
+    Response being assembled for a command that is still in flight
+    """
+
+    def __init__(self, future: asyncio.Future[str], started: asyncio.Future[None], sentinel_id: int) -> None:
+        self.future: asyncio.Future[str] = future
+        self.started: asyncio.Future[None] = started
+        self.sentinel_id: int = sentinel_id
+        self.fragments: list[bytes] = []
+
+
+class AsyncRcon(AsyncServerRcon):
+    """
+    Asyncio rcon client that keeps one authenticated connection open and sends commands over it one at a time
+    Responses are matched to commands by packet id, multi-packet responses are reassembled by following
+    every command with a sentinel packet, whose reply the server only sends after the last fragment
+    The vanilla server only handles the first packet of every read, so the sentinel is only written once
+    the command started answering, and the next command only once the sentinel was answered
+    """
+
+    TYPE_RESPONSE = 0
+    TYPE_COMMAND = 2
+    TYPE_LOGIN = 3
+    TYPE_SENTINEL = 100
+
+    AUTH_FAILED_ID = -1
+    MAX_ID = 0x7FFFFFFF
+
+    HEADER = struct.Struct("<ii")
+    LENGTH = struct.Struct("<i")
+    MAX_PACKET_LEN = 4096 + 10
+
+    MIN_BACKOFF: float = 0.1
+    MAX_BACKOFF: float = 3.2
+
+    def __init__(
+        self,
+        port: int,
+        pwd: Optional[str],
+        timeout: float,
+        max_comm_len: int,
+        banned_comms: list[str],
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        if port < 0 or port > 65535:
+            raise ValueError("Rcon port outside valid range")
+
+        if timeout <= 0:
+            raise ValueError("Rcon timeout must be greater than zero")
+
+        self._port: int = port
+        self._pwd: Optional[str] = pwd
+        self._timeout: float = timeout
+        self._policy: CommPolicy = CommPolicy(max_comm_len, banned_comms, AsyncServerRcon.ILLEGAL_COMMS)
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._conn_lock: asyncio.Lock = asyncio.Lock()
+        self._send_lock: asyncio.Lock = asyncio.Lock()
+
+        self._next_id: int = 0
+        self._pending: dict[int, _Pending] = {}
+        self._sentinels: dict[int, int] = {}
+
+        self._backoff: float = AsyncRcon.MIN_BACKOFF
+        self._retry_at: float = 0.0
+
+        metrics = metrics or MetricsRegistry()
+        self._latency: Histogram = metrics.histogram(
+            "rcon_latency_seconds", "Time from sending rcon commands until every response arrived", {"mode": "single"},
+        )
+        self._batch_latency: Histogram = metrics.histogram(
+            "rcon_latency_seconds", "Time from sending rcon commands until every response arrived", {"mode": "batch"},
+        )
+
+        self._logger: logging.Logger = logging.getLogger(
+            f"{__name__}.{self.__class__.__name__}"
+        )
+
+    def _alloc_id(self) -> int:
+        self._next_id = self._next_id % AsyncRcon.MAX_ID + 1
+        return self._next_id
+
+    @staticmethod
+    def _encode(req_id: int, req_type: int, payload: bytes) -> bytes:
+        body = AsyncRcon.HEADER.pack(req_id, req_type) + payload + b"\x00\x00"
+        return AsyncRcon.LENGTH.pack(len(body)) + body
+
+    @staticmethod
+    async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+        """
+        Reads a single packet, returns its id, type and payload
+        """
+        (length,) = AsyncRcon.LENGTH.unpack(await reader.readexactly(AsyncRcon.LENGTH.size))
+
+        if length < 10 or length > AsyncRcon.MAX_PACKET_LEN:
+            raise RconErr(f"Invalid packet length {length}")
+
+        body = await reader.readexactly(length)
+        req_id, req_type = AsyncRcon.HEADER.unpack_from(body)
+
+        return req_id, req_type, body[8:-2]
+
+    async def _login(self) -> None:
+        """
+        Opens a new connection and authenticates it
+        Raises `RconErr` if it can't connect or the password is wrong
+        """
+        try:
+            async with asyncio.timeout(self._timeout):
+                reader, writer = await asyncio.open_connection(AsyncServerRcon.HOST, self._port)
+        except (OSError, TimeoutError) as e:
+            raise RconErr(f"Couldn't connect to rcon: {e!r}")
+
+        try:
+            async with asyncio.timeout(self._timeout):
+                login_id = self._alloc_id()
+                writer.write(self._encode(login_id, self.TYPE_LOGIN, (self._pwd or "").encode("utf-8")))
+                await writer.drain()
+
+                req_id, _, _ = await self._read_packet(reader)
+
+            if req_id == self.AUTH_FAILED_ID or req_id != login_id:
+                raise RconErr("Rcon authentication failed")
+        except RconErr:
+            writer.close()
+            raise
+        except (OSError, TimeoutError, asyncio.IncompleteReadError) as e:
+            writer.close()
+            raise RconErr(f"Couldn't connect to rcon: {e!r}")
+
+        self._reader, self._writer = reader, writer
+        self._reader_task = asyncio.create_task(self._read_loop(reader))
+
+    async def _ensure_connected(self) -> asyncio.StreamWriter:
+        """
+        Reuses the open connection or reconnects, backing off exponentially between failed attempts
+        Returns the writer of the connection, raises `RconErr` if it can't connect
+        """
+        if self._writer is not None and not self._writer.is_closing():
+            return self._writer
+
+        async with self._conn_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return self._writer
+
+            delay = self._retry_at - time.monotonic()
+
+            if delay > 0:
+                if delay > self._timeout:
+                    raise RconErr("Rcon is unreachable, waiting before reconnecting")
+                await asyncio.sleep(delay)
+
+            try:
+                await self._login()
+            except RconErr:
+                self._retry_at = time.monotonic() + self._backoff
+                self._backoff = min(self._backoff * 2, AsyncRcon.MAX_BACKOFF)
+                raise
+
+            self._backoff = AsyncRcon.MIN_BACKOFF
+            self._retry_at = 0.0
+
+            assert self._writer is not None
+            return self._writer
+
+    def _dispatch(self, req_id: int, payload: bytes) -> None:
+        """
+        Stores a response fragment, or completes its command if it is a sentinel reply
+        """
+        if (comm_id := self._sentinels.pop(req_id, None)) is not None:
+            if (pending := self._pending.pop(comm_id, None)) is not None and not pending.future.done():
+                pending.future.set_result(b"".join(pending.fragments).decode("utf-8", errors="replace"))
+            return
+
+        if (pending := self._pending.get(req_id)) is not None:
+            pending.fragments.append(payload)
+
+            if not pending.started.done():
+                pending.started.set_result(None)
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        """
+        Continous task that routes every packet received to its command
+        """
+        err: Exception = RconErr("Rcon connection closed")
+
+        try:
+            while True:
+                req_id, _, payload = await self._read_packet(reader)
+                self._dispatch(req_id, payload)
+        except asyncio.CancelledError:
+            pass
+        except (OSError, asyncio.IncompleteReadError, RconErr) as e:
+            self._logger.warning(f"Rcon connection lost: {e!r}")
+            err = RconErr(f"Rcon connection lost: {e!r}")
+        finally:
+            self._drop_connection(reader, err)
+
+    def _drop_connection(self, reader: Optional[asyncio.StreamReader], err: Exception) -> None:
+        """
+        Closes the connection the reader belongs to and fails every command still in flight
+        """
+        if reader is not self._reader:
+            return
+
+        if self._writer is not None:
+            self._writer.close()
+
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+
+        for pending in self._pending.values():
+            if not pending.started.done():
+                pending.started.set_exception(err)
+            elif not pending.future.done():
+                pending.future.set_exception(err)
+
+        self._pending.clear()
+        self._sentinels.clear()
+
+    async def _roundtrip(self, writer: asyncio.StreamWriter, comm: str) -> str:
+        """
+        Writes the command, then its sentinel once the response started arriving, and returns the whole response
+        Only one command is in flight at a time, the others wait for their turn
+        """
+        async with self._send_lock:
+            if writer.is_closing():
+                raise RconErr("Rcon connection closed")
+
+            comm_id = self._alloc_id()
+            sentinel_id = self._alloc_id()
+
+            loop = asyncio.get_running_loop()
+            pending = _Pending(loop.create_future(), loop.create_future(), sentinel_id)
+
+            self._pending[comm_id] = pending
+            self._sentinels[sentinel_id] = comm_id
+
+            try:
+                writer.write(self._encode(comm_id, self.TYPE_COMMAND, comm.encode("utf-8")))
+                await writer.drain()
+                await pending.started
+
+                writer.write(self._encode(sentinel_id, self.TYPE_SENTINEL, b""))
+                await writer.drain()
+                return await pending.future
+            finally:
+                self._pending.pop(comm_id, None)
+                self._sentinels.pop(sentinel_id, None)
+
+    async def execute(self, comm: str) -> str:
+        self._policy.check(comm)
+
+        writer = await self._ensure_connected()
+
+        try:
+            async with asyncio.timeout(self._timeout):
+                with self._latency.time():
+                    return await self._roundtrip(writer, comm)
+        except TimeoutError:
+            raise RconErr("Timeout reached waiting for rcon response")
+        except (OSError, ConnectionError) as e:
+            raise RconErr(str(e))
+
+    async def execute_many(self, comms: list[str]) -> list[CommResult]:
+        errs = self._policy.check_each(comms)
+        allowed = [comm for comm, err in zip(comms, errs) if err is None]
+        sent = iter(await self._run_batch(allowed) if allowed else [])
+
+        return [next(sent) if err is None else CommResult(comm, err=err) for comm, err in zip(comms, errs)]
+
+    async def _run_batch(self, comms: list[str]) -> list[CommResult]:
+        """
+        Runs the commands one after another within a single timeout, the ones left when it fails share its error
+        """
+        try:
+            writer = await self._ensure_connected()
+        except RconErr as e:
+            return [CommResult(comm, err=e) for comm in comms]
+
+        results: list[CommResult] = []
+        failure = RconErr("Timeout reached waiting for rcon response")
+
+        try:
+            async with asyncio.timeout(self._timeout):
+                with self._batch_latency.time():
+                    for comm in comms:
+                        try:
+                            results.append(CommResult(comm, resp=await self._roundtrip(writer, comm)))
+                        except RconErr as e:
+                            results.append(CommResult(comm, err=e))
+        except TimeoutError:
+            pass
+        except (OSError, ConnectionError) as e:
+            failure = RconErr(str(e))
+
+        results.extend(CommResult(comm, err=failure) for comm in comms[len(results):])
+        return results
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+
+        self._drop_connection(self._reader, RconErr("Rcon connection closed"))
@@ -0,0 +1,140 @@
+from typing import Optional
+
+from .errors import CommErr
+from .constants import MINECRAFT_COMMS
+
+
+class _Node:
+    __slots__ = ("banned", "children")
+
+    def __init__(self) -> None:
+        self.banned: Optional[str] = None
+        self.children: dict[str, _Node] = {}
+
+
+class CommPolicy:
+    """
+    Decides whether commands are allowed to be sent through rcon
+    Banned commands are compiled once into a trie of tokens, so a command is checked by looking up
+    its root token, and the tokens after it, instead of scanning it for every banned entry
+    """
+
+    PREFIX = "/"
+    NAMESPACE = "minecraft:"
+
+    # commands that take another command as argument, after the given keyword
+    WRAPPERS = {
+        "execute": "run",
+        "return": "run",
+    }
+
+    def __init__(self, max_comm_len: int, banned_comms: list[str], illegal_comms: list[str]) -> None:
+        if max_comm_len <= 0:
+            raise ValueError("Maximum command length must be greater than zero")
+
+        self._max_comm_len: int = max_comm_len
+        self._root: dict[str, _Node] = {}
+
+        for comm in banned_comms:
+            self._ban(comm, validate=True)
+
+        for comm in illegal_comms:
+            self._ban(comm, validate=False)
+
+    @staticmethod
+    def _root_token(token: str) -> str:
+        """
+        Normalizes the first token of a command, `/minecraft:stop` and `stop` are both `stop`
+        """
+        token = token.removeprefix(CommPolicy.PREFIX)
+        return token.removeprefix(CommPolicy.NAMESPACE)
+
+    def _ban(self, comm: str, validate: bool) -> None:
+        """
+        Adds the command, and optionally some of its arguments, to the trie of banned commands
+        Raises `ValueError` if validation is requested and it isn't a minecraft command
+        """
+        tokens = comm.lower().split()
+
+        if not tokens or (validate and CommPolicy.PREFIX + self._root_token(tokens[0]) not in MINECRAFT_COMMS):
+            raise ValueError(
+                f"Invalid minecraft command provided on banned commands: {comm}"
+            )
+
+        node = self._root.setdefault(self._root_token(tokens[0]), _Node())
+
+        for token in tokens[1:]:
+            node = node.children.setdefault(token, _Node())
+
+        node.banned = comm
+
+    def _check_at(self, tokens: list[str], start: int) -> None:
+        """
+        Walks the trie for the command starting at the token
+        Raises `CommErr` if it is banned
+        """
+        node = self._root.get(self._root_token(tokens[start]))
+        i = start
+
+        while node is not None:
+            if node.banned is not None:
+                raise CommErr(f"Command {node.banned} is not allowed")
+
+            i += 1
+
+            if i >= len(tokens):
+                break
+
+            node = node.children.get(tokens[i])
+
+    def _check_tokens(self, tokens: list[str]) -> None:
+        """
+        Walks the trie for the command and for every command nested in it through `execute ... run`
+        Arguments before the actual `run` may be named like it too, `execute as run run stop`,
+        so every token after any of them is checked as a command
+        Raises `CommErr` if any of them is banned
+        """
+        if not tokens:
+            return
+
+        self._check_at(tokens, 0)
+
+        if self._root_token(tokens[0]) not in self.WRAPPERS:
+            return
+
+        keywords = set(self.WRAPPERS.values())
+
+        for i in range(1, len(tokens) - 1):
+            if tokens[i] in keywords:
+                self._check_at(tokens, i + 1)
+
+    def check(self, comm: str) -> None:
+        """
+        Raises `CommErr` if the command is empty, too long or banned
+        """
+        if not comm.strip():
+            raise CommErr("The command is empty")
+
+        if len(comm) > self._max_comm_len:
+            raise CommErr("The command is too long")
+
+        self._check_tokens(comm.lower().split())
+
+    def check_each(self, comms: list[str]) -> list[Optional[CommErr]]:
+        """
+        Returns the reason each command of the batch is invalid, or None for the ones that are allowed
+        Raises `CommErr` if the batch has no commands
+        """
+        if not comms:
+            raise CommErr("There are no commands to execute")
+
+        errs: list[Optional[CommErr]] = []
+
+        for comm in comms:
+            try:
+                self.check(comm)
+                errs.append(None)
+            except CommErr as e:
+                errs.append(e)
+
+        return errs
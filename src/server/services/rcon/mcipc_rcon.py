@@ -1,9 +1,10 @@
 from typing import Optional
 from mcipc.rcon.je import Client
 
-from .errors import RconErr, CommErr
-from .constants import MINECRAFT_COMMS
+from .errors import RconErr
+from .comm_policy import CommPolicy
 from .protocol import ServerRcon
+from .types import CommResult
 
 
 class McipcRcon(ServerRcon):
@@ -21,33 +22,14 @@ class McipcRcon(ServerRcon):
         if timeout <= 0:
             raise ValueError("Rcon timeout must be greater than zero")
 
-        if max_comm_len <= 0:
-            raise ValueError("Maximum command length must be greater than zero")
-
-        for comm in banned_comms:
-            if comm not in MINECRAFT_COMMS:
-                raise ValueError(
-                    f"Invalid minecraft command provided on banned commands: {comm}"
-                )
-
         self._port: int = port
         self._pwd: Optional[str] = pwd
         self._timeout: float = timeout
-        self._max_comm_len: int = max_comm_len
-        self._bcomms: list[str] = banned_comms
-
-        self._bcomms.extend(ServerRcon.ILLEGAL_COMMS)
+        self._policy: CommPolicy = CommPolicy(max_comm_len, banned_comms, ServerRcon.ILLEGAL_COMMS)
 
     def execute(self, comm: str) -> str:
-        if not comm.strip():
-            raise CommErr("The command is empty")
-
-        if len(comm) > self._max_comm_len:
-            raise CommErr("The command is too long")
+        self._policy.check(comm)
 
-        for icomm in self._bcomms:
-            if icomm in comm.lower():
-                raise CommErr(f"Command {icomm} is not allowed")
         try:
             with Client(
                 ServerRcon.HOST, self._port, passwd=self._pwd, timeout=self._timeout
@@ -55,3 +37,28 @@ class McipcRcon(ServerRcon):
                 return client.run(comm)
         except Exception as e:
             raise RconErr(str(e))
+
+    def execute_many(self, comms: list[str]) -> list[CommResult]:
+        errs = self._policy.check_each(comms)
+        allowed = [comm for comm, err in zip(comms, errs) if err is None]
+        sent = iter(self._run_batch(allowed) if allowed else [])
+
+        return [next(sent) if err is None else CommResult(comm, err=err) for comm, err in zip(comms, errs)]
+
+    def _run_batch(self, comms: list[str]) -> list[CommResult]:
+        results: list[CommResult] = []
+
+        try:
+            with Client(
+                ServerRcon.HOST, self._port, passwd=self._pwd, timeout=self._timeout
+            ) as client:
+                for comm in comms:
+                    try:
+                        results.append(CommResult(comm, resp=client.run(comm)))
+                    except Exception as e:
+                        results.append(CommResult(comm, err=RconErr(str(e))))
+        except Exception as e:
+            err = RconErr(str(e))
+            results.extend(CommResult(comm, err=err) for comm in comms[len(results):])
+
+        return results
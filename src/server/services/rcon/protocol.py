@@ -1,6 +1,8 @@
 from typing import Protocol
 from abc import abstractmethod
 
+from .types import CommResult
+
 
 class ServerRcon(Protocol):
     """
@@ -17,3 +19,45 @@ class ServerRcon(Protocol):
         Raises `CommErr` if the command format is incorrect or it is banned and `RconErr` if the connection fails
         """
         ...
+
+    @abstractmethod
+    def execute_many(self, comms: list[str]) -> list[CommResult]:
+        """
+        Executes the commands provided in order and returns their results in the same order
+        Raises `CommErr` if there are no commands, invalid commands are reported per command without being sent,
+        as are connection failures
+        """
+        ...
+
+
+class AsyncServerRcon(Protocol):
+    """
+    Same as `ServerRcon` but commands are awaitable, so they never block the event loop
+    """
+
+    HOST = ServerRcon.HOST
+    ILLEGAL_COMMS = ServerRcon.ILLEGAL_COMMS
+
+    @abstractmethod
+    async def execute(self, comm: str) -> str:
+        """
+        Executes the command provided through the rcon protocol and returns the response
+        Raises `CommErr` if the command format is incorrect or it is banned and `RconErr` if the connection fails
+        """
+        ...
+
+    @abstractmethod
+    async def execute_many(self, comms: list[str]) -> list[CommResult]:
+        """
+        Executes the commands provided one after another over the same connection and returns their results in order
+        Raises `CommErr` if there are no commands, invalid commands are reported per command without being sent,
+        as are connection failures
+        """
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        """
+        Closes the connection to the server if there is one
+        """
+        ...
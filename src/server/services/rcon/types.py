@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from .errors import CommErr, RconErr
+
+
+@dataclass(frozen=True)
+class CommResult:
+    """
+    Outcome of a single command executed as part of a batch
+    Commands that are invalid or banned carry their `CommErr` and are never sent
+    """
+    comm: str
+    resp: Optional[str] = None
+    err: Optional[Union[CommErr, RconErr]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.err is None
@@ -2,14 +2,19 @@ from dataclasses import dataclass
 
 from server.domain.cntl.protocol import ServerCntl
 from server.domain.mntr.protocol import ServerMntr
+from server.domain.stats.protocol import ServerStats
+from server.domain.wdog.protocol import ServerWdog
 
-from server.services.conn.protocol import ServerConn
-from server.services.rcon.protocol import ServerRcon
+from server.services.conn.protocol import ServerConn, ServerPing
+from server.services.rcon.protocol import AsyncServerRcon
 
 
 @dataclass
 class ServerData:
     conn: ServerConn
-    rcon: ServerRcon
+    ping: ServerPing
+    rcon: AsyncServerRcon
     mntr: ServerMntr
     cntl: ServerCntl
+    stats: ServerStats
+    wdog: ServerWdog